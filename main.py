@@ -3,15 +3,23 @@ from AlgorithmImports import *
 from System import Action
 from src.config import StrategyConfig
 from src.UniverseSelection import SectorBasedUniverseSelection
+from src.analysis.AnalysisLog import AnalysisLog
 from src.analysis.DataProcessor import DataProcessor
 from src.analysis.CointegrationAnalyzer import CointegrationAnalyzer
 from src.analysis.BayesianModeler import BayesianModeler
 from src.analysis.PairSelector import PairSelector
+from src.analysis.AnalysisPipeline import AnalysisPipeline
+from src.analysis.BackgroundAnalysisWorker import BackgroundAnalysisWorker
+from src.analysis.AnalysisTriggerCoalescer import AnalysisTriggerCoalescer
+from src.analysis.StaggeredRemodelScheduler import StaggeredRemodelScheduler
 from src.Pairs import Pairs
 from src.PairsManager import PairsManager
+from src.BarSnapshot import BarSnapshot
+from src.SymbolRegistry import SymbolRegistry
 from src.TicketsManager import TicketsManager
+from src.OrderLatencyTracker import OrderLatencyTracker
 from src.risk import RiskManager
-from src.execution import ExecutionManager, OrderExecutor, MarginAllocator
+from src.execution import ExecutionManager, OrderExecutor, MarginAllocator, OrderNettingEngine, IntentQueue
 from src.trade import TradeAnalyzer
 
 # endregion
@@ -49,17 +57,53 @@ class BayesianCointegrationStrategy(QCAlgorithm):
         time_rule = self.TimeRules.At(*self.config.main['schedule_time'])
         self.Schedule.On(date_rule, time_rule, Action(self.universe_selector.trigger_selection))
 
+        # 历史数据预取调度器(可选): 选股执行前预先下载当前股票池的历史数据
+        prefetch_config = self.config.data_processor['prefetch']
+        if prefetch_config['enabled']:
+            self.Schedule.On(date_rule, self.TimeRules.At(*prefetch_config['schedule_time']), Action(self._prefetch_history))
+
         # === 初始化分析工具 ===
+        # 分析日志出口(后台分析时由工作线程缓冲,主线程输出)
+        self.analysis_log = AnalysisLog(self)
         self.data_processor = DataProcessor(self, self.config.analysis_shared, self.config.data_processor)
-        self.cointegration_analyzer = CointegrationAnalyzer(self, self.config.cointegration_analyzer)
+        self.cointegration_analyzer = CointegrationAnalyzer(self, self.config.analysis_shared, self.config.cointegration_analyzer)
         self.pair_selector = PairSelector(self, self.config.analysis_shared,self.config.pair_selector)
         self.bayesian_modeler = BayesianModeler(self, self.config.analysis_shared, self.config.bayesian_modeler)
+        self.analysis_pipeline = AnalysisPipeline(
+            self, self.config.analysis_shared, self.data_processor,
+            self.cointegration_analyzer, self.pair_selector, self.bayesian_modeler
+        )
+        # 后台分析(可选): 分析期间OnData照常交易和风控,结果在下一个bar边界生效
+        self.analysis_worker = None
+        if self.config.analysis_shared['background_analysis']:
+            self.analysis_worker = BackgroundAnalysisWorker(self, self.analysis_pipeline)
+        # 触发合并(可选): 同一窗口内的多次证券变更只分析一次
+        self.trigger_coalescer = None
+        if self.config.analysis_shared['trigger_coalesce']:
+            self.trigger_coalescer = AnalysisTriggerCoalescer(self, self.config.analysis_shared)
+        # 股票整数ID表(内部表以稠密整数ID为键,只在LEAN边界转回Symbol)
+        self.symbol_registry = SymbolRegistry()
         self.pairs_manager = PairsManager(self, self.config.pairs_trading)
+        # bar级价格快照(可选): 每bar每只股票只跨越一次Slice/Portfolio边界
+        self.bar_snapshot = BarSnapshot(self) if self.config.pairs_trading['bar_snapshot'] else None
+
+        # 分摊建模调度器(可选): 把月初集中的MCMC分散到之后的交易日
+        staggered_config = self.config.bayesian_modeler['staggered_remodel']
+        self.remodel_scheduler = None
+        if staggered_config['enabled']:
+            self.remodel_scheduler = StaggeredRemodelScheduler(
+                self, self.bayesian_modeler, self.data_processor, self.pairs_manager, staggered_config
+            )
+            self.Schedule.On(
+                self.DateRules.EveryDay(self.market_benchmark),
+                self.TimeRules.At(*staggered_config['schedule_time']),
+                Action(self._run_staggered_remodel)
+            )
 
 
         # === 初始化状态管理 ===
-        self.is_analyzing = False  # 是否正在分析
         self.last_analysis_time = None  # 上次分析时间
+        self.last_retest_date = None  # 上次协整日度复查日期
 
         # === 添加VIX指数（用于市场条件检查）===
         vix_config = self.config.risk_management['market_condition']
@@ -67,9 +111,33 @@ class BayesianCointegrationStrategy(QCAlgorithm):
         self.benchmark_symbols.append(self.vix_symbol)  # VIX也需过滤
 
         # === 初始化辅助工具 ===
-        self.tickets_manager = TicketsManager(self, self.pairs_manager)
+        latency_config = self.config.pairs_trading['order_latency']
+        self.order_latency_tracker = (
+            OrderLatencyTracker(self, csv_key=latency_config['csv_key'])
+            if latency_config['enabled'] else None
+        )
+        self.tickets_manager = TicketsManager(
+            self, self.pairs_manager,
+            verify_states=self.config.pairs_trading['verify_order_states'],
+            fill_history_depth=self.config.pairs_trading['fill_history_depth'],
+            latency_tracker=self.order_latency_tracker
+        )
         self.risk_manager = RiskManager(self, self.config, self.pairs_manager)
-        self.order_executor = OrderExecutor(self, self.tickets_manager)
+        self.cooldown_registry = self.risk_manager.cooldown_registry
+        submission_config = self.config.pairs_trading['order_submission']
+        self.order_executor = OrderExecutor(
+            self, self.tickets_manager,
+            submission_mode=submission_config['mode']
+        )
+        self.order_netting = None
+        if self.config.pairs_trading['order_netting']:
+            self.order_netting = OrderNettingEngine(self, self.tickets_manager, self.order_executor)
+            self.order_executor.netting = self.order_netting
+        self.intent_queue = None
+        queue_config = self.config.pairs_trading['intent_queue']
+        if queue_config['enabled']:
+            self.intent_queue = IntentQueue(self, self.tickets_manager, self.order_executor, queue_config)
+            self.order_executor.intent_queue = self.intent_queue
         self.margin_allocator = MarginAllocator(self, self.config)
         self.trade_analyzer = TradeAnalyzer(self)
         self.execution_manager = ExecutionManager(self, self.pairs_manager, self.risk_manager, self.tickets_manager, self.order_executor, self.margin_allocator, self.trade_analyzer)
@@ -116,53 +184,36 @@ class BayesianCointegrationStrategy(QCAlgorithm):
         self.symbols = [s for s in self.symbols if s not in removed_symbols]
 
         # === 触发配对分析 ===
-        if len(self.symbols) >= 2:
-            # 标记正在分析
-            self.is_analyzing = True
-            self.last_analysis_time = self.Time
-
-            # 执行分析流程
+        if self.trigger_coalescer is not None:
+            # 只记录触发,合并窗口结束后在OnData中按净股票集合分析一次
+            self.trigger_coalescer.record()
+        elif len(self.symbols) >= 2:
+            self._start_analysis()
+
+
+    def _start_analysis(self):
+        """启动一轮配对分析(同步或后台)"""
+        self.last_analysis_time = self.Time
+
+        if self.analysis_worker is not None:
+            # 后台执行,结果在OnData开头应用
+            self.analysis_worker.submit(self.symbols)
+        else:
+            # 同步执行流程
             self._analyze_and_create_pairs()
 
-            # 分析完成
-            self.is_analyzing = False
-
 
 
     def _analyze_and_create_pairs(self):
-        """执行配对分析流程（步骤1-5）"""
-
-        # === 步骤1: 数据处理 ===
-        data_result = self.data_processor.process(self.symbols)
-        clean_data = data_result['clean_data']
-        valid_symbols = data_result['valid_symbols']
-
-        if len(valid_symbols) < 2:
-            return
-
-        # === 步骤2: 协整检验 ===
-        cointegration_result = self.cointegration_analyzer.cointegration_procedure(valid_symbols, clean_data)
-        raw_pairs = cointegration_result['raw_pairs']
-
-        if not raw_pairs:
-            return
-
-        # === 步骤3: 构建PairData字典 ===
-        from src.analysis.PairData import PairData
-        pair_data_dict = {}
-        for pair_info in raw_pairs:
-            pair_key = (pair_info['symbol1'], pair_info['symbol2'])
-            pair_data_dict[pair_key] = PairData.from_clean_data(pair_info, clean_data)
+        """执行配对分析流程（步骤1-7）"""
 
-        # === 步骤4: 质量评估和配对筛选 ===
-        selected_pairs = self.pair_selector.selection_procedure(raw_pairs, pair_data_dict, clean_data)
+        # === 步骤1-5: 数据处理 → 协整检验 → 质量评估 → 贝叶斯建模 ===
+        modeling_results = self.analysis_pipeline.run(self.symbols)
+        self._apply_modeling_results(modeling_results)
 
-        if not selected_pairs:
-            return
-
-        # === 步骤5: 贝叶斯建模（复用PairData字典） ===
-        modeling_results = self.bayesian_modeler.modeling_procedure(selected_pairs, pair_data_dict)
 
+    def _apply_modeling_results(self, modeling_results):
+        """步骤6-7: 由建模结果创建Pairs对象并交给PairsManager(主线程调用)"""
         if not modeling_results:
             return
 
@@ -181,10 +232,37 @@ class BayesianCointegrationStrategy(QCAlgorithm):
 
     def OnData(self, data: Slice):
         """处理实时数据 - OnData架构的核心"""
+        self._process_bar(data)
 
-        # 如果正在分析，跳过
-        if self.is_analyzing:
-            return
+        # === 意图队列: 按优先级和令牌桶限速提交排队意图 ===
+        if self.intent_queue is not None:
+            self.intent_queue.drain()
+
+        # === 订单净额: 本bar全部配对的订单意图按股票净额后提交 ===
+        if self.order_netting is not None:
+            self.order_netting.flush()
+
+
+    def _process_bar(self, data: Slice):
+        """本bar的分析结果应用、风控和交易(提前return即结束本bar交易)"""
+
+        # === 执行合并后的分析触发 ===
+        if self.trigger_coalescer is not None and self.trigger_coalescer.is_due():
+            if self.trigger_coalescer.flush(self.symbols):
+                self._start_analysis()
+
+        # === 应用后台分析结果(bar边界,一次性替换配对集合) ===
+        if self.analysis_worker is not None:
+            modeling_results = self.analysis_worker.poll()
+            if modeling_results is not None:
+                self._apply_modeling_results(modeling_results)
+
+        # === 构建本bar价格快照(之后Pairs/PairBook/风控/执行读取快照) ===
+        if self.bar_snapshot is not None:
+            self.bar_snapshot.build(data, self.pairs_manager.get_tradeable_symbols())
+
+        # === 市场条件滚动指标(SPY波动率/VIX)随bar更新 ===
+        self.risk_manager.market_condition.update(data)
 
         # === Portfolio规则cooldown检查（第一道防线） ===
         # Portfolio规则排他性 - 任何规则在cooldown，阻止所有交易
@@ -207,17 +285,29 @@ class BayesianCointegrationStrategy(QCAlgorithm):
         if not self.pairs_manager.has_tradeable_pairs():
             return
 
+        # === 协整日度复查(失去协整性的配对降级,不再开新仓) ===
+        self._retest_cointegrated_pairs(data)
+
+        # === 向量化计算所有可交易配对的Z-score和信号(本bar内Pairs读取结果) ===
+        self.pairs_manager.evaluate_pair_book(data)
+
         # 分类获取配对
         pairs_with_position = self.pairs_manager.get_pairs_with_position()
         pairs_without_position = self.pairs_manager.get_pairs_without_position()
 
+        # 稀疏更新: 只评估有腿出现在本bar Slice中的配对(周期性全量评估时为None)
+        active_ids = self.pairs_manager.get_active_pair_ids(data)
+        if active_ids is not None:
+            pairs_with_position = {
+                pair_id: pair for pair_id, pair in pairs_with_position.items() if pair_id in active_ids
+            }
+            pairs_without_position = {
+                pair_id: pair for pair_id, pair in pairs_without_position.items() if pair_id in active_ids
+            }
+
         # === Pair层面风控检查 ===
-        # 直接循环检查每个配对
-        pair_intents = []
-        for pair in pairs_with_position.values():
-            intent = self.risk_manager.check_pair_risks(pair)
-            if intent:
-                pair_intents.append(intent)
+        # 全部持仓配对一次检查(vectorized_pair_rules时批量计算)
+        pair_intents = self.risk_manager.check_all_pair_risks(pairs_with_position)
 
         if pair_intents:
             # 传递risk_manager用于激活cooldown和清理HWM
@@ -235,10 +325,68 @@ class BayesianCointegrationStrategy(QCAlgorithm):
             self.execution_manager.handle_normal_open_intents(pairs_without_position, data)
 
 
+    def _retest_cointegrated_pairs(self, data: Slice):
+        """
+        协整日度复查(每个交易日一次)
+
+        在滚动统计量上追加当日bar并重新检验,p值超过阈值的配对从COINTEGRATED降级:
+        - 有持仓 → LEGACY(继续风控和平仓管理)
+        - 无持仓 → ARCHIVED(不再开仓)
+        """
+        if not self.cointegration_analyzer.daily_retest:
+            return
+
+        # 后台分析进行中: 滚动统计量由工作线程写入,本日跳过复查
+        if self.analysis_worker is not None and self.analysis_worker.is_busy:
+            return
+
+        current_date = self.Time.date()
+        if self.last_retest_date == current_date:
+            return
+        self.last_retest_date = current_date
+
+        # 收集当日价格
+        pair_bars = {}
+        for pair_id in self.pairs_manager.cointegrated_ids:
+            pair = self.pairs_manager.get_pair_by_id(pair_id)
+            prices = pair.get_price(data)
+            if prices is not None:
+                pair_bars[(pair.symbol1, pair.symbol2)] = (self.Time, prices[0], prices[1])
+
+        if not pair_bars:
+            return
+
+        # 增量复查
+        pvalues = self.cointegration_analyzer.retest_pairs(pair_bars)
+        threshold = self.cointegration_analyzer.pvalue_threshold
+        lost_pair_ids = [
+            (symbol1.Value, symbol2.Value)
+            for (symbol1, symbol2), pvalue in pvalues.items()
+            if pvalue >= threshold
+        ]
+
+        if lost_pair_ids:
+            self.pairs_manager.demote_pairs(lost_pair_ids)
+
+
+    def _prefetch_history(self):
+        """预取下一轮分析的历史数据(预期股票池 = 当前股票池,月度刷新通常只变化少数股票)"""
+        self.data_processor.prefetch(self.symbols)
+
+
+    def _run_staggered_remodel(self):
+        """分摊建模每日调度(后台分析进行中时跳过: 历史后验由工作线程写入)"""
+        if self.analysis_worker is not None and self.analysis_worker.is_busy:
+            return
+
+        self.remodel_scheduler.run_daily()
+
+
     def OnOrderEvent(self, event):
         """订单事件回调"""
-        # 委托给TicketsManager处理
-        self.tickets_manager.on_order_event(event)
+        # 委托给TicketsManager处理(净额订单先由OrderNettingEngine分摊到各配对腿)
+        if self.order_netting is None or not self.order_netting.on_order_event(event):
+            self.tickets_manager.on_order_event(event)
 
         # 检查是否有异常配对需要处理
         anomaly_pairs = self.tickets_manager.get_anomaly_pairs()
@@ -249,5 +397,18 @@ class BayesianCointegrationStrategy(QCAlgorithm):
 
     def OnEndOfAlgorithm(self):
         """回测结束时的统计汇总"""
+        if self.analysis_worker is not None:
+            self.analysis_worker.shutdown()
+
         # 输出所有统计维度的汇总信息（JSON Lines格式）
         self.trade_analyzer.log_summary()
+        self.execution_manager.signal_memo.log_statistics()
+        self.order_executor.log_statistics()
+        if self.order_netting is not None:
+            self.order_netting.log_statistics()
+        if self.intent_queue is not None:
+            self.intent_queue.log_statistics()
+        if self.order_latency_tracker is not None:
+            self.order_latency_tracker.log_summary()
+        if self.cooldown_registry is not None:
+            self.cooldown_registry.log_statistics()
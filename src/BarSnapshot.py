@@ -0,0 +1,144 @@
+# region imports
+from AlgorithmImports import *
+import numpy as np
+from typing import List, Optional
+# endregion
+
+
+class BarSnapshot:
+    """
+    bar级价格快照 - OnData开头一次性读取所有可交易配对股票的收盘价,持仓价格按需读取
+
+    问题:
+        Pairs.get_price 每次调用都要 `symbol in data` + 两次 `data[symbol]` + `.Close`,
+        get_position_info / get_pair_pnl 每次调用都要 `Portfolio[symbol].Price`;
+        这些都是Python.NET边界调用,同一股票出现在多个配对、同一bar内多次调用时被重复执行。
+
+    方案:
+        - build(): 每只股票每bar只跨越一次Slice边界,收盘价存入NumPy数组 + {股票整数ID: 列号}索引(SymbolRegistry)
+        - 持仓价格: build()只清空,某列在本bar首次被读取时才查询 Portfolio[symbol].Price(惰性填充)
+          只有持仓配对的股票会被读取,无持仓时每bar不产生Portfolio调用
+        - Pairs / PairBook 在快照对当前bar有效时读取快照,否则回退到原有的直接查询
+
+    有效性:
+        - 收盘价: 与构建时的data slice为同一对象(is_current(data))
+        - 持仓价格: 构建时间 == algorithm.Time(bar内Security价格不变,成交不改变Price,惰性读取与构建时读取结果一致)
+    """
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+        """
+        self.algorithm = algorithm
+
+        self.symbols = []                       # [Symbol] 列顺序
+        self.index = {}                         # {股票整数ID: 列号}
+        self._symbols_source = None             # 上次构建使用的股票列表对象(身份比较)
+        self.closes = np.empty(0)               # 当前bar收盘价(无效为NaN)
+        self.holding_prices = np.empty(0)       # Portfolio[symbol].Price(NaN=本bar尚未读取)
+        self.version = 0                        # 列集合变化计数(PairBook据此刷新列映射)
+
+        self.time = None                        # 构建时的algorithm.Time
+        self._slice = None                      # 构建时的data slice(身份比较)
+
+
+    def build(self, data, symbols: List[Symbol]):
+        """
+        构建本bar快照
+
+        Args:
+            data: 当前Slice
+            symbols: 需要快照的股票(可交易配对涉及的全部股票; PairsManager缓存的列表,对象不变即列不变)
+        """
+        if symbols is not self._symbols_source:
+            registry = self.algorithm.symbol_registry
+            self._symbols_source = symbols
+            self.symbols = list(symbols)
+            self.index = {registry.intern(symbol): col for col, symbol in enumerate(self.symbols)}
+            self.closes = np.full(len(self.symbols), np.nan)
+            self.holding_prices = np.full(len(self.symbols), np.nan)
+            self.version += 1
+
+        closes = self.closes
+        for col, symbol in enumerate(self.symbols):
+            # 收盘价: 有效性与 Pairs.get_price 一致(存在、bar不为None、Close>0)
+            close = np.nan
+            if symbol in data:
+                bar = data[symbol]
+                if bar is not None:
+                    bar_close = bar.Close
+                    if bar_close > 0:
+                        close = bar_close
+            closes[col] = close
+
+        # 持仓价格在读取时填充
+        self.holding_prices.fill(np.nan)
+
+        self.time = self.algorithm.Time
+        self._slice = data
+
+
+    # ===== 读取 =====
+
+    def is_current(self, data=None) -> bool:
+        """
+        快照是否对应当前bar
+
+        Args:
+            data: 需要收盘价时传入当前slice(身份比较); 只读持仓价格时可省略
+        """
+        if self.time != self.algorithm.Time:
+            return False
+        return data is None or data is self._slice
+
+
+    def __contains__(self, sid: int) -> bool:
+        return sid in self.index
+
+
+    def get_close_pair(self, sid1: int, sid2: int) -> Optional[tuple]:
+        """
+        两腿收盘价(调用方需先确认两只股票都在快照中)
+
+        Returns:
+            (price1, price2); 任一价格无效返回None
+        """
+        price1 = self.closes[self.index[sid1]]
+        price2 = self.closes[self.index[sid2]]
+        if np.isnan(price1) or np.isnan(price2):
+            return None
+        return (float(price1), float(price2))
+
+
+    def get_holding_price(self, sid: int) -> Optional[float]:
+        """持仓价格(Portfolio[symbol].Price,本bar首次读取时查询); 不在快照中返回None"""
+        col = self.index.get(sid)
+        if col is None:
+            return None
+        price = self.holding_prices[col]
+        if np.isnan(price):
+            price = self._load_holding_price(col)
+        return float(price)
+
+
+    def get_holding_prices(self, cols: np.ndarray) -> np.ndarray:
+        """按列号批量读取持仓价格(PairRiskBatch用; 本bar尚未读取的列逐个查询一次)"""
+        holding_prices = self.holding_prices
+        for col in np.unique(cols[np.isnan(holding_prices[cols])]):
+            self._load_holding_price(col)
+        return holding_prices[cols]
+
+
+    def _load_holding_price(self, col: int) -> float:
+        price = self.algorithm.Portfolio[self.symbols[col]].Price
+        self.holding_prices[col] = price
+        return price
+
+
+    def get_columns(self, sids: List[int]) -> Optional[np.ndarray]:
+        """股票ID列表对应的快照列号数组(PairBook映射用); 有股票不在快照中时返回None"""
+        try:
+            return np.array([self.index[sid] for sid in sids], dtype=np.int64)
+        except KeyError:
+            return None
@@ -0,0 +1,192 @@
+# region imports
+from AlgorithmImports import *
+import bisect
+import json
+from typing import Dict, List, Optional
+# endregion
+
+
+class LatencyHistogram:
+    """
+    固定分桶延迟直方图(秒)
+
+    分桶上界覆盖 秒级(实盘) → 分钟/小时级(分钟/日线回测的下一bar成交)
+    """
+
+    BOUNDS = [0, 1, 5, 30, 60, 300, 900, 3600, 23400, 86400, 259200]
+    LABELS = ['0', '<=1s', '<=5s', '<=30s', '<=1m', '<=5m', '<=15m', '<=1h', '<=6.5h', '<=1d', '<=3d', '>3d']
+
+    def __init__(self):
+        self.counts = [0] * len(self.LABELS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+    def add(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+    def percentile_bucket(self, q: float) -> str:
+        """q分位数落在的分桶标签"""
+        target = q * self.count
+        cumulative = 0
+        for label, n in zip(self.LABELS, self.counts):
+            cumulative += n
+            if cumulative >= target and n > 0:
+                return label
+        return self.LABELS[-1]
+
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_s': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_s': round(self.max, 3),
+            'p50': self.percentile_bucket(0.50),
+            'p95': self.percentile_bucket(0.95),
+            'buckets': {label: n for label, n in zip(self.LABELS, self.counts) if n}
+        }
+
+
+class OrderLatencyTracker:
+    """
+    订单往返延迟统计 - 记录每个注册批次的提交时间、每条腿成交时间和完成时间
+
+    指标(秒):
+        - submit_to_first_fill: 注册(提交) → 第一条腿成交
+        - leg_skew: 第一条腿成交 → 最后一条腿成交(单腿风险暴露时长)
+        - submit_to_complete: 注册(提交) → 双腿全部成交(配对处于PENDING的时长)
+
+    分组:
+        - 按动作: "OPEN" / "CLOSE"
+        - 按动作+原因: "CLOSE:STOP_LOSS" 等(有reason时)
+
+    输出:
+        - log_summary(): OnEndOfAlgorithm时每个 分组×指标 一行JSON(type=order_latency)
+        - csv_key非空时: 逐订单明细保存到ObjectStore(CSV)
+
+    时间: 提交取 algorithm.UtcTime,成交取 OrderEvent.UtcTime
+    """
+
+    METRICS = ('submit_to_first_fill', 'leg_skew', 'submit_to_complete')
+    CSV_HEADER = 'pair_id,action,reason,order_id,symbol,submit_time,fill_time,complete_time,submit_to_fill_s'
+
+    def __init__(self, algorithm, csv_key: Optional[str] = None):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            csv_key: ObjectStore键; None则不保存逐订单明细
+        """
+        self.algorithm = algorithm
+        self.csv_key = csv_key
+
+        # 在途批次: pair_id → {'action', 'reason', 'submit', 'fills': {OrderId: fill_time}, 'symbols': {OrderId: Symbol}}
+        self._batches: Dict[str, Dict] = {}
+
+        # {分组: {指标: LatencyHistogram}}
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+        self.csv_rows: List[str] = []
+        self.dropped_batches = 0        # 未完成即被覆盖或异常的批次
+
+
+    def on_register(self, pair_id: str, tickets: List, action: str, reason: str = None):
+        """注册订单批次时记录提交时间(覆盖该配对未完成的旧批次)"""
+        if pair_id in self._batches:
+            self.dropped_batches += 1
+
+        valid = [t for t in tickets if t is not None]
+        self._batches[pair_id] = {
+            'action': action,
+            'reason': reason,
+            'submit': self.algorithm.UtcTime,
+            'fills': {t.OrderId: None for t in valid},
+            'symbols': {t.OrderId: t.Symbol for t in valid}
+        }
+
+
+    def on_fill(self, pair_id: str, order_id: int, fill_time):
+        """订单全部成交(Filled)时记录该腿成交时间(只记录首次)"""
+        batch = self._batches.get(pair_id)
+        if batch is not None and batch['fills'].get(order_id, 0) is None:
+            batch['fills'][order_id] = fill_time
+
+
+    def on_complete(self, pair_id: str):
+        """双腿全部成交: 计算三项指标并计入直方图"""
+        batch = self._batches.pop(pair_id, None)
+        if batch is None:
+            return
+
+        fill_times = [t for t in batch['fills'].values() if t is not None]
+        if not fill_times:
+            return
+
+        submit = batch['submit']
+        first_fill = min(fill_times)
+        complete = max(fill_times)
+        values = {
+            'submit_to_first_fill': (first_fill - submit).total_seconds(),
+            'leg_skew': (complete - first_fill).total_seconds(),
+            'submit_to_complete': (complete - submit).total_seconds()
+        }
+
+        groups = [batch['action']]
+        if batch['reason']:
+            groups.append(f"{batch['action']}:{batch['reason']}")
+        for group in groups:
+            histograms = self.histograms.setdefault(
+                group, {metric: LatencyHistogram() for metric in self.METRICS}
+            )
+            for metric, seconds in values.items():
+                histograms[metric].add(max(seconds, 0.0))
+
+        if self.csv_key:
+            for order_id, fill_time in batch['fills'].items():
+                self.csv_rows.append(
+                    f"\"{pair_id}\",{batch['action']},{batch['reason'] or ''},{order_id},"
+                    f"{batch['symbols'][order_id]},{submit},{fill_time},{complete},"
+                    f"{(fill_time - submit).total_seconds():.3f}"
+                )
+
+
+    def on_anomaly(self, pair_id: str):
+        """批次异常(Canceled/Invalid): 不计入延迟统计"""
+        if self._batches.pop(pair_id, None) is not None:
+            self.dropped_batches += 1
+
+
+    def merged_histogram(self, metric: str) -> LatencyHistogram:
+        """按动作分组("OPEN" / "CLOSE")合并的指标直方图(不重复计入 动作:原因 分组)"""
+        merged = LatencyHistogram()
+        for group, histograms in self.histograms.items():
+            if ':' in group:
+                continue
+            histogram = histograms[metric]
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+            merged.count += histogram.count
+            merged.total += histogram.total
+            merged.max = max(merged.max, histogram.max)
+        return merged
+
+
+    def log_summary(self):
+        """输出延迟汇总(JSON Lines),并按需保存逐订单CSV"""
+        for group, histograms in self.histograms.items():
+            for metric, histogram in histograms.items():
+                log_data = {'type': 'order_latency', 'group': group, 'metric': metric}
+                log_data.update(histogram.to_dict())
+                self.algorithm.Debug(json.dumps(log_data, ensure_ascii=False, separators=(',', ':')))
+
+        if self.dropped_batches or self._batches:
+            self.algorithm.Debug(
+                f"[订单延迟] 未完成批次: 丢弃{self.dropped_batches} 在途{len(self._batches)}"
+            )
+
+        if self.csv_key and self.csv_rows:
+            self.algorithm.ObjectStore.Save(self.csv_key, '\n'.join([self.CSV_HEADER] + self.csv_rows))
+            self.algorithm.Debug(f"[订单延迟] 逐订单明细{len(self.csv_rows)}行 → ObjectStore['{self.csv_key}']")
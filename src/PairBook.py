@@ -0,0 +1,243 @@
+# region imports
+from AlgorithmImports import *
+import numpy as np
+from typing import Dict, Optional
+from src.constants import TradingSignal
+# endregion
+
+
+class PairBook:
+    """
+    可交易配对的列式参数表(struct-of-arrays) - 每个bar一次向量化计算所有配对的Z-score和信号
+
+    布局:
+        - 列(symbol): 所有可交易配对涉及的股票去重后编号,每个bar每只股票只读取一次价格
+        - 行(pair): leg1_col / leg2_col 指向价格列; alpha/beta/残差均值/残差标准差/阈值/持仓方向为连续数组
+
+    与Pairs的关系:
+        - Pairs 保持原有接口(get_price/get_zscore/get_signal),挂载 _book/_book_row 后优先读取本表结果
+        - 本表未对当前bar求值(或已标记dirty)时,Pairs 自动回退到逐配对标量计算
+
+    一致性维护:
+        - mark_dirty(): 配对集合或模型参数变化(PairsManager.reclassify_pairs / Pairs.update_params),下次evaluate前重建
+        - set_position(): 成交回调同步持仓方向,并将该行本bar的信号标记为过期(回退标量逻辑)
+    """
+
+    # 信号编码(数组中存储int8,解码为TradingSignal常量)
+    NO_DATA, WAIT, LONG_SPREAD, SHORT_SPREAD, HOLD, CLOSE, STOP_LOSS = range(7)
+    SIGNALS = (
+        TradingSignal.NO_DATA, TradingSignal.WAIT, TradingSignal.LONG_SPREAD, TradingSignal.SHORT_SPREAD,
+        TradingSignal.HOLD, TradingSignal.CLOSE, TradingSignal.STOP_LOSS
+    )
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+        """
+        self.algorithm = algorithm
+        self.dirty = True
+
+        # 列: 股票
+        self.symbols = []               # [Symbol] 列顺序
+        self.sids = []                  # [股票整数ID] 列顺序(与symbols对应)
+        self.prices = np.empty(0)       # 当前bar价格(无效价格为NaN)
+
+        # 行: 配对
+        self.pairs = []                 # [Pairs] 行顺序
+        self.leg1_col = np.empty(0, dtype=np.int64)
+        self.leg2_col = np.empty(0, dtype=np.int64)
+        self.alpha = np.empty(0)
+        self.beta = np.empty(0)
+        self.residual_mean = np.empty(0)
+        self.residual_std = np.empty(0)
+        self.entry_min = np.empty(0)
+        self.entry_max = np.empty(0)
+        self.exit_threshold = np.empty(0)
+        self.stop_threshold = np.empty(0)
+        self.direction = np.empty(0, dtype=np.int8)    # +1=LONG_SPREAD, -1=SHORT_SPREAD, 0=无正常持仓
+
+        # 当前bar求值结果
+        self.zscores = np.empty(0)
+        self.signal_codes = np.empty(0, dtype=np.int8)
+        self.stale_rows = np.empty(0, dtype=bool)       # 求值后持仓变化的行(信号需重新判断)
+        self._slice = None                              # 求值对应的data slice(身份比较)
+
+        # bar快照列映射(本表列 → BarSnapshot列)
+        self._snapshot_cols = None
+        self._snapshot_version = None
+
+
+    # ===== 构建 =====
+
+    def mark_dirty(self):
+        """配对集合或参数变化,下次evaluate前重建"""
+        self.dirty = True
+        self._slice = None
+
+
+    def rebuild(self, pairs):
+        """
+        由可交易配对重建列式表
+
+        Args:
+            pairs: 可迭代的Pairs对象
+        """
+        # 解除旧配对挂载
+        for pair in self.pairs:
+            pair._book = None
+            pair._book_row = None
+
+        self.pairs = list(pairs)
+        columns = {}        # {股票整数ID: 列号}
+        symbols = []
+        leg1, leg2 = [], []
+        for row, pair in enumerate(self.pairs):
+            for sid, symbol, legs in ((pair.sid1, pair.symbol1, leg1), (pair.sid2, pair.symbol2, leg2)):
+                col = columns.get(sid)
+                if col is None:
+                    col = columns[sid] = len(symbols)
+                    symbols.append(symbol)
+                legs.append(col)
+            pair._book = self
+            pair._book_row = row
+
+        self.symbols = symbols
+        self.sids = list(columns.keys())
+        self.prices = np.full(len(self.symbols), np.nan)
+        self.leg1_col = np.array(leg1, dtype=np.int64)
+        self.leg2_col = np.array(leg2, dtype=np.int64)
+
+        self.alpha = np.array([p.alpha_mean for p in self.pairs], dtype=float)
+        self.beta = np.array([p.beta_mean for p in self.pairs], dtype=float)
+        self.residual_mean = np.array([p.residual_mean for p in self.pairs], dtype=float)
+        self.residual_std = np.array([p.residual_std for p in self.pairs], dtype=float)
+        self.entry_min = np.array([p.entry_threshold_min for p in self.pairs], dtype=float)
+        self.entry_max = np.array([p.entry_threshold_max for p in self.pairs], dtype=float)
+        self.exit_threshold = np.array([p.exit_threshold for p in self.pairs], dtype=float)
+        self.stop_threshold = np.array([p.stop_threshold for p in self.pairs], dtype=float)
+        self.direction = np.array(
+            [self._direction_of(p.tracked_qty1, p.tracked_qty2) for p in self.pairs], dtype=np.int8
+        )
+
+        self.zscores = np.zeros(len(self.pairs))
+        self.signal_codes = np.full(len(self.pairs), self.NO_DATA, dtype=np.int8)
+        self.stale_rows = np.zeros(len(self.pairs), dtype=bool)
+        self._snapshot_cols = None
+        self._snapshot_version = None
+        self.dirty = False
+        self._slice = None
+
+
+    @staticmethod
+    def _direction_of(qty1: float, qty2: float) -> int:
+        """持仓方向编码(与Pairs.has_normal_position一致: 只有反向双腿才算正常持仓)"""
+        if qty1 > 0 and qty2 < 0:
+            return 1
+        if qty1 < 0 and qty2 > 0:
+            return -1
+        return 0
+
+
+    def set_position(self, row: int, qty1: float, qty2: float):
+        """成交回调: 同步持仓方向,本bar该行信号失效"""
+        self.direction[row] = self._direction_of(qty1, qty2)
+        self.stale_rows[row] = True
+
+
+    # ===== 求值 =====
+
+    def evaluate(self, data, snapshot=None):
+        """
+        对当前bar一次性计算所有配对的Z-score和信号编码
+
+        价格有效性与 Pairs.get_price 一致: symbol在data中、bar不为None、Close>0,否则为NaN(NO_DATA)
+
+        Args:
+            data: 当前Slice
+            snapshot: 本bar已构建的BarSnapshot(可选); 覆盖全部列时直接取快照价格,不再读取data
+        """
+        snapshot_cols = self._get_snapshot_columns(data, snapshot)
+        if snapshot_cols is not None:
+            self.prices = prices = snapshot.closes[snapshot_cols]
+        else:
+            prices = self.prices
+            for col, symbol in enumerate(self.symbols):
+                price = np.nan
+                if symbol in data:
+                    bar = data[symbol]
+                    if bar is not None and bar.Close > 0:
+                        price = bar.Close
+                prices[col] = price
+
+        price1 = prices[self.leg1_col]
+        price2 = prices[self.leg2_col]
+        valid = ~(np.isnan(price1) | np.isnan(price2))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_residual = np.log(price1) - (self.alpha + self.beta * np.log(price2))
+            zscores = np.where(
+                self.residual_std > 0, (log_residual - self.residual_mean) / self.residual_std, 0.0
+            )
+        abs_z = np.abs(zscores)
+
+        # 无正常持仓: 区间约束入场 [entry_min, entry_max]
+        in_entry_band = (abs_z >= self.entry_min) & (abs_z <= self.entry_max)
+        flat_codes = np.where(in_entry_band, np.where(zscores > 0, self.SHORT_SPREAD, self.LONG_SPREAD), self.WAIT)
+
+        # 有正常持仓: 止损优先于平仓
+        held_codes = np.where(abs_z > self.stop_threshold, self.STOP_LOSS,
+                              np.where(abs_z < self.exit_threshold, self.CLOSE, self.HOLD))
+
+        codes = np.where(self.direction != 0, held_codes, flat_codes)
+        codes[~valid] = self.NO_DATA
+
+        self.zscores = zscores
+        self.signal_codes = codes.astype(np.int8)
+        self.stale_rows[:] = False
+        self._slice = data
+
+
+    def _get_snapshot_columns(self, data, snapshot) -> Optional[np.ndarray]:
+        """本表列在bar快照中的列号(快照列集合变化时重新映射); 快照不可用返回None"""
+        if snapshot is None or not snapshot.is_current(data):
+            return None
+        if self._snapshot_version != snapshot.version:
+            self._snapshot_cols = snapshot.get_columns(self.sids)
+            self._snapshot_version = snapshot.version
+        return self._snapshot_cols
+
+
+    # ===== 读取(Pairs调用) =====
+
+    def is_current(self, data) -> bool:
+        """本表是否已对该data slice求值"""
+        return not self.dirty and data is not None and data is self._slice
+
+
+    def get_price(self, row: int) -> Optional[tuple]:
+        """当前bar该行两腿价格,无效时返回None"""
+        price1 = self.prices[self.leg1_col[row]]
+        price2 = self.prices[self.leg2_col[row]]
+        if np.isnan(price1) or np.isnan(price2):
+            return None
+        return (float(price1), float(price2))
+
+
+    def get_zscore(self, row: int) -> Optional[float]:
+        """当前bar该行Z-score,无数据时返回None"""
+        if self.signal_codes[row] == self.NO_DATA:
+            return None
+        return float(self.zscores[row])
+
+
+    def get_signal(self, row: int) -> Optional[str]:
+        """当前bar该行信号; 求值后持仓已变化时返回None(由调用方重新判断)"""
+        if self.stale_rows[row]:
+            return None
+        return self.SIGNALS[self.signal_codes[row]]
+
+
+    def get_statistics(self) -> Dict:
+        """列式表规模统计"""
+        return {'pairs': len(self.pairs), 'symbols': len(self.symbols)}
@@ -1,6 +1,7 @@
 # region imports
 from AlgorithmImports import *
 import numpy as np
+from datetime import timedelta
 from typing import Dict, Optional, Tuple
 from src.execution import OpenIntent, CloseIntent
 from src.constants import TradingSignal, PositionMode, OrderAction
@@ -10,6 +11,25 @@ from src.constants import TradingSignal, PositionMode, OrderAction
 class Pairs:
     """配对交易的核心数据对象"""
 
+    # 固定属性集合(无实例__dict__): all_pairs 在整个回测期间长期持有全部配对,减少每个配对的内存占用
+    __slots__ = (
+        # 算法引用与基础信息
+        'algorithm', 'config', 'symbol1', 'symbol2', 'pair_id', 'sid1', 'sid2', 'industry_group',
+        # 统计参数
+        'alpha_mean', 'beta_mean', 'residual_mean', 'residual_std', 'quality_score',
+        # 交易阈值与控制设置
+        'entry_threshold_min', 'entry_threshold_max', 'exit_threshold', 'stop_threshold',
+        'cooldown_days_for_exit', 'cooldown_days_for_stop', 'margin_long', 'margin_short',
+        # 历史与时间追踪
+        'creation_time', 'reactivation_count', 'pair_opened_time', 'pair_closed_time', 'last_close_reason',
+        'entry_zscore',
+        # 持仓与成本追踪
+        'tracked_qty1', 'tracked_qty2', '_position_mode',
+        'entry_price1', 'entry_price2', 'exit_price1', 'exit_price2',
+        # 列式参数表挂载
+        '_book', '_book_row',
+    )
+
     # ===== 1. 初始化与参数管理 =====
 
     def __init__(self, algorithm, model_data, config):
@@ -25,6 +45,8 @@ class Pairs:
         self.symbol1 = model_data['symbol1']
         self.symbol2 = model_data['symbol2']
         self.pair_id = (self.symbol1.Value, self.symbol2.Value)
+        self.sid1 = algorithm.symbol_registry.intern(self.symbol1)            # 股票整数ID(内部表键,见SymbolRegistry)
+        self.sid2 = algorithm.symbol_registry.intern(self.symbol2)
         self.industry_group = model_data['industry_group']
 
         # === 统计参数(从贝叶斯建模获得) ===
@@ -63,6 +85,7 @@ class Pairs:
         # === 持仓追踪(OrderTicket-based,避免Portfolio全局查询混淆) ===
         self.tracked_qty1 = 0                                                  # 配对专属持仓追踪(symbol1)
         self.tracked_qty2 = 0                                                  # 配对专属持仓追踪(symbol2)
+        self._position_mode = PositionMode.NONE                                # 持仓模式(只在成交回调中更新)
 
         # === 成本追踪(配对专属PnL计算基础) ===
         self.entry_price1 = None                                               # symbol1开仓均价
@@ -70,6 +93,10 @@ class Pairs:
         self.exit_price1 = None                                                # symbol1平仓价(None=持仓中, 有值=已平仓)
         self.exit_price2 = None                                                # symbol2平仓价(None=持仓中, 有值=已平仓)
 
+        # === 列式参数表挂载(PairBook.rebuild设置,未挂载时逐配对标量计算) ===
+        self._book = None                                                      # PairBook实例
+        self._book_row = None                                                  # 在PairBook中的行号
+
 
     def update_params(self, new_pair) -> bool:
         """
@@ -88,25 +115,63 @@ class Pairs:
             bool: True=更新成功, False=有持仓未更新
         """
         # 持仓检查:有持仓时不更新
-        if self.has_position():
-            self.algorithm.Debug(
-                f"[Pairs] {self.pair_id} 有持仓,参数保持冻结 "
-                f"(beta={self.beta_mean:.3f}, 开仓时间={self.pair_opened_time})"
-            )
+        if self._params_frozen():
             return False
 
         # 无持仓时:更新所有贝叶斯模型参数
-        self.alpha_mean = new_pair.alpha_mean
-        self.beta_mean = new_pair.beta_mean
-        self.residual_mean = new_pair.residual_mean
-        self.residual_std = new_pair.residual_std
-        self.quality_score = new_pair.quality_score
+        self._apply_params(new_pair.alpha_mean, new_pair.beta_mean, new_pair.residual_mean,
+                           new_pair.residual_std, new_pair.quality_score)
 
         # 记录重新激活
         self.reactivation_count += 1
         return True
 
 
+    def update_model_params(self, model_result: Dict) -> bool:
+        """
+        从建模结果字典直接更新模型参数(StaggeredRemodelScheduler的定期重新建模)
+
+        与update_params的区别:
+            - 不创建新的Pairs对象(无需驻留Symbol、复制配置)
+            - 不计为重新激活(reactivation_count不变)
+            - 持仓冻结规则相同
+
+        Returns:
+            bool: True=更新成功, False=有持仓未更新
+        """
+        if self._params_frozen():
+            return False
+
+        self._apply_params(model_result['alpha_mean'], model_result['beta_mean'], model_result['residual_mean'],
+                           model_result['residual_std'], model_result['quality_score'])
+        return True
+
+
+    def _params_frozen(self) -> bool:
+        """有持仓时参数冻结(维持开仓时的决策基础)"""
+        if self.has_position():
+            self.algorithm.Debug(
+                f"[Pairs] {self.pair_id} 有持仓,参数保持冻结 "
+                f"(beta={self.beta_mean:.3f}, 开仓时间={self.pair_opened_time})"
+            )
+            return True
+        return False
+
+
+    def _apply_params(self, alpha_mean: float, beta_mean: float, residual_mean: float,
+                      residual_std: float, quality_score: float):
+        """写入模型参数,列式表需重建"""
+        self.alpha_mean = alpha_mean
+        self.beta_mean = beta_mean
+        self.residual_mean = residual_mean
+        self.residual_std = residual_std
+        self.quality_score = quality_score
+
+        # 参数变化,列式表需重建
+        if self._book is not None:
+            self._book.mark_dirty()
+
+
     @classmethod
     def from_model_result(cls, algorithm, model_result: Dict, config: Dict) -> 'Pairs':
         """
@@ -194,6 +259,11 @@ class Pairs:
             self.pair_closed_time = fill_time
             self.last_close_reason = reason  # v7.2.21: 存储平仓原因(用于动态冷却期)
 
+            # 普通交易冷却登记(启用CooldownRegistry时)
+            registry = self.algorithm.cooldown_registry
+            if registry is not None:
+                registry.activate(self.pair_id, registry.NORMAL, fill_time + timedelta(days=self.get_cooldown_days()))
+
             # 记录平仓价格（用于后续PnL计算）
             for ticket in tickets:
                 if ticket is not None and ticket.Status == OrderStatus.Filled:
@@ -213,6 +283,47 @@ class Pairs:
             self.exit_price1 = None
             self.exit_price2 = None 
 
+        # 持仓模式随成交更新(异常模式只在进入时记录一次)
+        self._refresh_position_mode()
+
+        # 同步列式表持仓方向(本bar该配对信号回退标量判断)
+        if self._book is not None:
+            self._book.set_position(self._book_row, self.tracked_qty1, self.tracked_qty2)
+
+
+    def _refresh_position_mode(self):
+        """由tracked_qty重新计算持仓模式; 模式变化且进入异常时记录一次日志"""
+        qty1 = self.tracked_qty1
+        qty2 = self.tracked_qty2
+        position_mode = self._classify_position(qty1, qty2)
+        if position_mode == self._position_mode:
+            return
+        self._position_mode = position_mode
+
+        if position_mode == PositionMode.PARTIAL_LEG1:
+            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 单边持仓LEG1: qty1={qty1:+.0f}")
+        elif position_mode == PositionMode.PARTIAL_LEG2:
+            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 单边持仓LEG2: qty2={qty2:+.0f}")
+        elif position_mode == PositionMode.ANOMALY_SAME:
+            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 同向持仓: qty1={qty1:+.0f}, qty2={qty2:+.0f}")
+
+
+    @staticmethod
+    def _classify_position(qty1: float, qty2: float) -> str:
+        """统一判断持仓模式(整合状态+方向)"""
+        if qty1 == 0 and qty2 == 0:
+            return PositionMode.NONE
+        elif qty1 > 0 and qty2 < 0:
+            return PositionMode.LONG_SPREAD
+        elif qty1 < 0 and qty2 > 0:
+            return PositionMode.SHORT_SPREAD
+        elif qty1 != 0 and qty2 == 0:
+            return PositionMode.PARTIAL_LEG1
+        elif qty1 == 0 and qty2 != 0:
+            return PositionMode.PARTIAL_LEG2
+        else:  # 同向持仓
+            return PositionMode.ANOMALY_SAME
+
 
     # ===== 2. 基础数据访问(无依赖) =====
 
@@ -225,7 +336,18 @@ class Pairs:
         - symbol在data中存在
         - data[symbol]不为None (防止QuantConnect数据缺失)
         - data[symbol].Close有效且>0
+
+        列式表已对当前bar求值或bar快照覆盖两腿时直接读取(每只股票每bar只读一次data)
         """
+        if self._book is not None and self._book.is_current(data):
+            return self._book.get_price(self._book_row)
+
+        # bar快照已覆盖两腿时直接读取(OnData开头一次性构建)
+        snapshot = self.algorithm.bar_snapshot
+        if (snapshot is not None and self.sid1 in snapshot and self.sid2 in snapshot
+                and snapshot.is_current(data)):
+            return snapshot.get_close_pair(self.sid1, self.sid2)
+
         # 增强检查: symbol存在且data不为None
         if (self.symbol1 in data and self.symbol2 in data and
             data[self.symbol1] is not None and data[self.symbol2] is not None):
@@ -241,6 +363,23 @@ class Pairs:
         return None
 
 
+    def _get_holding_prices(self) -> tuple:
+        """
+        两腿当前持仓价格(Portfolio[symbol].Price)
+
+        bar快照对当前时间有效且覆盖两腿时读取快照,否则直接查询Portfolio
+        """
+        snapshot = self.algorithm.bar_snapshot
+        if snapshot is not None and snapshot.is_current():
+            price1 = snapshot.get_holding_price(self.sid1)
+            price2 = snapshot.get_holding_price(self.sid2)
+            if price1 is not None and price2 is not None:
+                return (price1, price2)
+
+        portfolio = self.algorithm.Portfolio
+        return (portfolio[self.symbol1].Price, portfolio[self.symbol2].Price)
+
+
     def get_position_info(self) -> Dict:
         """
         获取完整的持仓信息(一次获取,避免重复查询)
@@ -248,40 +387,17 @@ class Pairs:
 
         返回所有持仓相关信息
         """
-        portfolio = self.algorithm.Portfolio
-
         # 使用配对专属的tracked_qty(从OrderTicket提取的实际成交数量)
         qty1 = self.tracked_qty1
         qty2 = self.tracked_qty2
 
-        # 市价仍需从Portfolio获取(需要当前价格)
-        if qty1 != 0:
-            value1 = abs(qty1 * portfolio[self.symbol1].Price)
-        else:
-            value1 = 0
-        if qty2 != 0:
-            value2 = abs(qty2 * portfolio[self.symbol2].Price)
-        else:
-            value2 = 0
+        # 市价仍需从Portfolio获取(需要当前价格,bar快照有效时读取快照)
+        if qty1 != 0 or qty2 != 0:
+            price1, price2 = self._get_holding_prices()
+        value1 = abs(qty1 * price1) if qty1 != 0 else 0
+        value2 = abs(qty2 * price2) if qty2 != 0 else 0
 
-        # 统一判断持仓模式(整合状态+方向)
-        if qty1 == 0 and qty2 == 0:
-            position_mode = PositionMode.NONE
-        elif qty1 > 0 and qty2 < 0:
-            position_mode = PositionMode.LONG_SPREAD
-        elif qty1 < 0 and qty2 > 0:
-            position_mode = PositionMode.SHORT_SPREAD
-        elif qty1 != 0 and qty2 == 0:
-            position_mode = PositionMode.PARTIAL_LEG1
-            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 单边持仓LEG1: qty1={qty1:+.0f}")
-        elif qty1 == 0 and qty2 != 0:
-            position_mode = PositionMode.PARTIAL_LEG2
-            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 单边持仓LEG2: qty2={qty2:+.0f}")
-        else:  # 同向持仓
-            position_mode = PositionMode.ANOMALY_SAME
-            self.algorithm.Debug(f"[持仓异常] {self.pair_id} 同向持仓: qty1={qty1:+.0f}, qty2={qty2:+.0f}")
-
-        return {'position_mode': position_mode, 'qty1': qty1, 'qty2': qty2, 'value1': value1, 'value2': value2}
+        return {'position_mode': self._position_mode, 'qty1': qty1, 'qty2': qty2, 'value1': value1, 'value2': value2}
 
 
     @property
@@ -292,12 +408,10 @@ class Pairs:
         设计目标：
         - 消除 has_position(), has_normal_position(), has_anomaly() 中的重复代码
         - 提供清晰直观的接口：self.position_mode 比 self.get_position_info()['position_mode'] 更简洁
-        - 遵循 DRY 原则：字典键访问封装为属性，避免 4 处重复
 
         实现细节：
-        - 内部调用 get_position_info()['position_mode']
-        - Portfolio.Price 是 O(1) 的字典查询（已被 QuantConnect 缓存）
-        - 无需额外缓存机制（性能成本 ~0.001ms，复杂度不值得）
+        - 持仓模式只随成交变化: on_position_filled() 更新 tracked_qty 后重新计算并缓存
+        - 读取为O(1)属性访问,不再查询Portfolio价格(has_position等每bar被多次调用)
 
         Returns:
             PositionMode 常量之一：
@@ -305,7 +419,7 @@ class Pairs:
             - LONG_SPREAD / SHORT_SPREAD: 正常持仓
             - PARTIAL_LEG1 / PARTIAL_LEG2 / ANOMALY_SAME: 异常持仓
         """
-        return self.get_position_info()['position_mode']
+        return self._position_mode
 
 
     def get_pair_holding_days(self) -> Optional[int]:
@@ -404,9 +518,7 @@ class Pairs:
         # 获取当前市场价格
         if self.exit_price1 is None or self.exit_price2 is None:
             # 持仓中: 使用实时价格(浮动PnL)
-            portfolio = self.algorithm.Portfolio
-            price1 = portfolio[self.symbol1].Price
-            price2 = portfolio[self.symbol2].Price
+            price1, price2 = self._get_holding_prices()
         else:
             # 已平仓: 使用成交价格(最终PnL)
             price1 = self.exit_price1
@@ -493,17 +605,17 @@ class Pairs:
 
     def has_position(self) -> bool:
         """检查是否有持仓（优化后：使用 @property）"""
-        return self.position_mode != PositionMode.NONE
+        return self._position_mode != PositionMode.NONE
 
 
     def has_normal_position(self) -> bool:
         """检查是否有正常持仓（优化后：使用 @property）"""
-        return self.position_mode in [PositionMode.LONG_SPREAD, PositionMode.SHORT_SPREAD]
+        return self._position_mode in (PositionMode.LONG_SPREAD, PositionMode.SHORT_SPREAD)
 
 
     def has_anomaly_position(self) -> bool:
         """检查是否有异常持仓"""
-        return self.position_mode in [PositionMode.PARTIAL_LEG1, PositionMode.PARTIAL_LEG2, PositionMode.ANOMALY_SAME]
+        return self._position_mode in (PositionMode.PARTIAL_LEG1, PositionMode.PARTIAL_LEG2, PositionMode.ANOMALY_SAME)
 
 
     def get_pair_position_value(self) -> float:
@@ -519,7 +631,12 @@ class Pairs:
         计算Z-score,包含spread计算
         需要传入data来获取最新价格,返回Z-score值或None
         使用对数价格计算: log(price1) = alpha + beta * log(price2) + residual
+
+        列式表已对当前bar求值时直接读取向量化结果
         """
+        if self._book is not None and self._book.is_current(data):
+            return self._book.get_zscore(self._book_row)
+
         # 获取价格
         prices = self.get_price(data)
         if prices is None:
@@ -549,6 +666,14 @@ class Pairs:
         if zscore is None:
             return TradingSignal.NO_DATA
 
+        # 列式表信号(求值后持仓未变化时有效)
+        if self._book is not None and self._book.is_current(data):
+            signal = self._book.get_signal(self._book_row)
+            if signal is not None:
+                if signal in (TradingSignal.LONG_SPREAD, TradingSignal.SHORT_SPREAD):
+                    self.entry_zscore = zscore  # 与标量路径一致: 信号触发时记录
+                return signal
+
         # 内部检查持仓
         has_position = self.has_normal_position()
 
@@ -582,7 +707,7 @@ class Pairs:
 
     # ===== 5. 意图生成(依赖第2/3/4层) =====
 
-    def get_open_intent(self, amount_allocated: float, data):
+    def get_open_intent(self, amount_allocated: float, data, signal: str = None, prices: tuple = None):
         """
         生成开仓意图（意图生成与执行分离）
 
@@ -602,6 +727,8 @@ class Pairs:
         Args:
             amount_allocated: 分配的资金金额
             data: 数据切片,用于获取价格和计算信号
+            signal: 本bar已计算的信号(可选,ExecutionManager的SignalMemo传入,避免重复计算)
+            prices: 本bar已读取的两腿价格(可选,同上)
 
         Returns:
             OpenIntent对象 或 None(无开仓信号或数据不足)
@@ -618,22 +745,24 @@ class Pairs:
             优势: Pairs不再依赖algorithm.MarketOrder(),职责更清晰
         """
         # 自动检测信号
-        signal = self.get_signal(data)
+        if signal is None:
+            signal = self.get_signal(data)
 
         if signal not in [TradingSignal.LONG_SPREAD, TradingSignal.SHORT_SPREAD]:
             return None  # 无开仓信号
 
-        # 计算目标市值
-        value1, value2 = self.calculate_leg_values(amount_allocated, signal, data)
-        if value1 is None or value2 is None:
-            return None  # 市值计算失败
-
         # 获取价格
-        prices = self.get_price(data)
+        if prices is None:
+            prices = self.get_price(data)
         if prices is None:
             return None  # 价格获取失败
         price1, price2 = prices
 
+        # 计算目标市值
+        value1, value2 = self.calculate_leg_values(amount_allocated, signal, data, prices)
+        if value1 is None or value2 is None:
+            return None  # 市值计算失败
+
         # 计算数量
         if signal == TradingSignal.LONG_SPREAD:
             # 做多spread = 买入symbol1,卖出symbol2
@@ -716,7 +845,7 @@ class Pairs:
 
     # ===== 6. 资金计算(依赖第2层) =====
 
-    def calculate_leg_values(self, allocated_amount: float, signal: str, data):
+    def calculate_leg_values(self, allocated_amount: float, signal: str, data, prices: tuple = None):
         """
         从分配资金计算两腿购买力,按beta数量配比
 
@@ -738,12 +867,14 @@ class Pairs:
             allocated_amount: 分配的投资资金金额
             signal: 交易信号 (LONG_SPREAD/SHORT_SPREAD)
             data: 数据切片(用于获取当前价格)
+            prices: 已读取的两腿价格(可选,传入时不再从data读取)
 
         返回:
             (value_A, value_B): A和B的目标购买市值, 计算失败返回 (None, None)
         """
         # 获取当前价格
-        prices = self.get_price(data)
+        if prices is None:
+            prices = self.get_price(data)
         if prices is None:
             return None, None
         price_A, price_B = prices
@@ -1,6 +1,10 @@
 # region imports
 from AlgorithmImports import *
-from typing import Dict, Set
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from src.PairBook import PairBook
 # endregion
 
 
@@ -53,6 +57,68 @@ class PairState:
             return PairState.ARCHIVED
 
 
+@dataclass(slots=True)
+class ArchivedPairRecord:
+    """
+    归档配对压缩记录
+
+    ARCHIVED 配对(无持仓、未通过本轮检验)从 all_pairs 移出后只保留:
+        - 标识: pair_id / industry_group
+        - 最后一次模型参数(诊断用; 重新出现时以新建模结果为准,与 update_params 一致)
+        - 生命周期: 创建时间、重新激活次数、最后开/平仓时间和平仓原因(冷却期判断依据)
+    """
+    pair_id: tuple
+    industry_group: str
+    alpha_mean: float
+    beta_mean: float
+    residual_mean: float
+    residual_std: float
+    quality_score: float
+    creation_time: datetime
+    reactivation_count: int
+    pair_opened_time: Optional[datetime]
+    pair_closed_time: Optional[datetime]
+    last_close_reason: Optional[str]
+    cooldown_end: Optional[datetime]    # 普通交易冷却期结束时间(None=从未平仓)
+    archived_time: datetime
+
+    @classmethod
+    def from_pair(cls, pair, archived_time: datetime) -> 'ArchivedPairRecord':
+        """由Pairs对象压缩"""
+        cooldown_end = None
+        if pair.pair_closed_time is not None:
+            cooldown_end = pair.pair_closed_time + timedelta(days=pair.get_cooldown_days())
+        return cls(
+            pair_id=pair.pair_id,
+            industry_group=pair.industry_group,
+            alpha_mean=pair.alpha_mean,
+            beta_mean=pair.beta_mean,
+            residual_mean=pair.residual_mean,
+            residual_std=pair.residual_std,
+            quality_score=pair.quality_score,
+            creation_time=pair.creation_time,
+            reactivation_count=pair.reactivation_count,
+            pair_opened_time=pair.pair_opened_time,
+            pair_closed_time=pair.pair_closed_time,
+            last_close_reason=pair.last_close_reason,
+            cooldown_end=cooldown_end,
+            archived_time=archived_time
+        )
+
+    def restore_into(self, pair):
+        """
+        把生命周期状态恢复到新建的Pairs对象(配对重新出现)
+
+        模型参数使用新建模结果,重新激活次数+1(与 Pairs.update_params 对已存在配对的处理一致);
+        pair_closed_time / last_close_reason 原样恢复,get_pair_frozen_days() 冷却期语义不变。
+        """
+        pair.creation_time = self.creation_time
+        pair.reactivation_count = self.reactivation_count + 1
+        pair.pair_opened_time = self.pair_opened_time
+        pair.pair_closed_time = self.pair_closed_time
+        pair.last_close_reason = self.last_close_reason
+
+
 class PairsManager:
     """管理整个回测周期内所有配对的生命周期"""
 
@@ -74,7 +140,40 @@ class PairsManager:
         # 分类索引(只存储pair_id) - 命名与PairState常量保持一致
         self.cointegrated_ids = set()  # 对应 PairState.COINTEGRATED
         self.legacy_ids = set()         # 对应 PairState.LEGACY
-        self.archived_ids = set()       # 对应 PairState.ARCHIVED
+        self.archived_ids = set()       # 对应 PairState.ARCHIVED(含已压缩的归档记录)
+
+        # 归档压缩(可选): ARCHIVED 配对移出 all_pairs,只保留压缩记录,按年龄/数量淘汰
+        compaction_config = config['archive_compaction']
+        self.compaction_enabled = compaction_config['enabled']
+        self.archive_max_age_days = compaction_config['max_age_days']
+        self.archive_max_records = compaction_config['max_records']
+        self.archived_records = OrderedDict()  # {pair_id: ArchivedPairRecord} 按归档时间排序(最旧在前)
+        self.compacted_count = 0
+        self.evicted_count = 0
+        self.rehydrated_count = 0
+
+        # 可交易配对物化索引(重新分类时重建,成交回调时增量维护)
+        #   - tradeable_ids: 协整配对 + 遗留配对(排除 ARCHIVED)
+        #   - with_position_ids / flat_ids: tradeable_ids 按是否有持仓划分
+        self.tradeable_ids = set()
+        self.with_position_ids = set()
+        self.flat_ids = set()
+        self._views = {}                # 查询结果缓存 {索引名: {pair_id: Pairs}},索引变化时整体丢弃
+        self.verify_indexes_enabled = config['verify_position_indexes']
+
+        # 可交易配对列式参数表(向量化Z-score/信号,None=逐配对计算)
+        self.pair_book = PairBook(algorithm) if config['vectorized_signals'] else None
+
+        # 可交易配对涉及的股票(bar快照列,重新分类时失效)
+        self._tradeable_symbols = None
+        # 反向索引 {股票整数ID: {pair_id}}(可交易配对,重新分类时失效)
+        self._symbol_pairs = None
+
+        # 稀疏更新(可选): 只评估至少一条腿出现在当前Slice中的配对,每 full_sweep_bars 个bar全量评估一次
+        self.sparse_updates = config['sparse_updates']
+        self.full_sweep_bars = config['full_sweep_bars']
+        self._bars_since_sweep = 0
+        self.full_sweep_count = 0
 
         # 统计信息
         self.update_count = 0  # 更新次数(选股轮次)
@@ -83,28 +182,6 @@ class PairsManager:
 
     # ===== 2. 核心管理 =====
 
-    @property
-    def tradeable_ids(self) -> Set:
-        """
-        可交易配对ID集合 (协整配对 + 遗留配对)
-
-        设计说明:
-            - 使用 @property 而非方法: 语义上这是"属性查询"而非"操作"
-            - DRY原则: 消除代码中的重复集合运算
-            - 可读性: self.tradeable_ids 比集合运算更清晰
-            - 可维护性: 将来修改"可交易"定义只需改这一处
-
-        包含范围:
-            - COINTEGRATED: 本轮通过协整检验的配对
-            - LEGACY: 未通过检验但有持仓的配对
-            - 排除 ARCHIVED: 未通过检验且无持仓的配对
-
-        Returns:
-            Set[tuple]: 可交易配对的 pair_id 集合
-        """
-        return self.cointegrated_ids | self.legacy_ids
-
-
     def update_pairs(self, new_pairs_dict: Dict):
         """
         每月选股后更新配对
@@ -118,7 +195,17 @@ class PairsManager:
 
         # 第一步:处理本轮出现的配对
         for pair_id, new_pair in new_pairs_dict.items():
-            if pair_id in self.all_pairs:
+            record = self.archived_records.pop(pair_id, None)
+            if record is not None:
+                # 已压缩的归档配对:以新建模结果重建,恢复生命周期状态
+                record.restore_into(new_pair)
+                self.all_pairs[pair_id] = new_pair
+                self.rehydrated_count += 1
+                self.algorithm.Debug(
+                    f"[PairsManager] 恢复归档配对 {pair_id} "
+                    f"(beta: {new_pair.beta_mean:.3f}, 重新激活{new_pair.reactivation_count}次)"
+                )
+            elif pair_id in self.all_pairs:
                 # 已存在的配对:调用 update_params 并检查返回值
                 old_pair = self.all_pairs[pair_id]
                 if old_pair.update_params(new_pair):
@@ -179,12 +266,140 @@ class PairsManager:
             else:
                 self.archived_ids.add(pair_id)
 
+        if self.compaction_enabled:
+            self._compact_archived()
+            self.archived_ids |= self.archived_records.keys()
+
+        self._rebuild_indexes()
+
+        # 可交易集合变化,列式表需重建
+        if self.pair_book is not None:
+            self.pair_book.mark_dirty()
+        self._tradeable_symbols = None
+        self._symbol_pairs = None
+        # 配对集合变化后的第一个bar全量评估
+        self._bars_since_sweep = self.full_sweep_bars
+
+
+    def _compact_archived(self):
+        """
+        ARCHIVED 配对压缩为 ArchivedPairRecord 并移出 all_pairs,随后按年龄/数量淘汰记录
+
+        跳过: 订单执行中的配对(TicketsManager锁定,成交回调仍需Pairs对象)
+        淘汰: 仍在普通交易冷却期内的记录不淘汰(保证配对重新出现时冷却期判断不变)
+        """
+        now = self.algorithm.Time
+        tickets_manager = self.algorithm.tickets_manager
+
+        for pair_id in list(self.archived_ids):
+            pair = self.all_pairs.get(pair_id)
+            if pair is None or tickets_manager.is_pair_locked(pair_id):
+                continue
+            self.archived_records[pair_id] = ArchivedPairRecord.from_pair(pair, now)
+            del self.all_pairs[pair_id]
+            self.compacted_count += 1
+
+        utc_now = self.algorithm.UtcTime
+        max_age = timedelta(days=self.archive_max_age_days)
+        overflow = len(self.archived_records) - self.archive_max_records
+        for pair_id, record in list(self.archived_records.items()):
+            if record.cooldown_end is not None and utc_now < record.cooldown_end:
+                continue
+            if overflow > 0 or now - record.archived_time > max_age:
+                del self.archived_records[pair_id]
+                self.archived_ids.discard(pair_id)
+                self.evicted_count += 1
+                overflow -= 1
+
+
+    def _rebuild_indexes(self):
+        """由分类结果重建可交易/持仓物化索引"""
+        self.tradeable_ids = self.cointegrated_ids | self.legacy_ids
+        self.with_position_ids = {
+            pair_id for pair_id in self.tradeable_ids if self.all_pairs[pair_id].has_position()
+        }
+        self.flat_ids = self.tradeable_ids - self.with_position_ids
+        self._views = {}
+
+
+    def on_pair_filled(self, pair_id):
+        """
+        配对成交回调后同步持仓索引(由TicketsManager在Pairs.on_position_filled之后调用)
+
+        只移动可交易配对; 分类(COINTEGRATED/LEGACY/ARCHIVED)保持到下次 reclassify_pairs()
+        """
+        if pair_id not in self.tradeable_ids:
+            return
+
+        if self.all_pairs[pair_id].has_position():
+            self.flat_ids.discard(pair_id)
+            self.with_position_ids.add(pair_id)
+        else:
+            self.with_position_ids.discard(pair_id)
+            self.flat_ids.add(pair_id)
+
+        # 丢弃缓存视图(调用方已持有的旧字典保持不变,遍历中成交不会影响)
+        self._views = {}
+
+
+    def verify_indexes(self) -> bool:
+        """
+        一致性检查: 物化索引与全量重扫结果比较,不一致时记录日志并以重扫结果修复
+
+        Returns:
+            bool: 索引是否一致
+        """
+        tradeable_ids = self.cointegrated_ids | self.legacy_ids
+        with_position_ids = {
+            pair_id for pair_id in tradeable_ids if self.all_pairs[pair_id].has_position()
+        }
+        if tradeable_ids == self.tradeable_ids and with_position_ids == self.with_position_ids \
+                and tradeable_ids - with_position_ids == self.flat_ids:
+            return True
+
+        self.algorithm.Debug(
+            f"[PairsManager] 持仓索引不一致: 持仓多余{sorted(self.with_position_ids - with_position_ids)}, "
+            f"持仓缺失{sorted(with_position_ids - self.with_position_ids)}, 已按全量重扫修复"
+        )
+        self._rebuild_indexes()
+        return False
+
+
+    def demote_pairs(self, lost_pair_ids):
+        """
+        日度复查失去协整性的配对降级(两次月度分析之间)
+
+        Args:
+            lost_pair_ids: 复查未通过的pair_id列表
+
+        设计说明:
+            - 复用 reclassify_pairs(): 以"剩余协整配对"作为本轮通过集合重新分类
+            - 有持仓 → LEGACY(继续管理风险), 无持仓 → ARCHIVED(不再开仓)
+        """
+        lost = set(lost_pair_ids) & self.cointegrated_ids
+        if not lost:
+            return
+
+        self.reclassify_pairs(self.cointegrated_ids - lost)
+        self.algorithm.Debug(
+            f"[协整复查] {len(lost)}个配对日度复查失去协整性,已降级: {sorted(lost)}"
+        )
+
 
     # ===== 3. 查询接口 =====
 
     def has_tradeable_pairs(self) -> bool:
         """检查是否有可交易的配对"""
-        return len(self.tradeable_ids) > 0
+        return bool(self.tradeable_ids)
+
+
+    def _get_view(self, name: str, pair_ids: Set) -> Dict:
+        """索引对应的 {pair_id: Pairs} 字典(缓存到下次索引变化,调用方不得修改)"""
+        view = self._views.get(name)
+        if view is None:
+            view = {pair_id: self.all_pairs[pair_id] for pair_id in pair_ids}
+            self._views[name] = view
+        return view
 
 
     def get_tradeable_pairs(self) -> Dict:
@@ -198,7 +413,7 @@ class PairsManager:
             - COINTEGRATED: 本轮通过协整检验的配对
             - LEGACY: 历史配对但仍有持仓的配对
         """
-        return {pair_id: self.all_pairs[pair_id] for pair_id in self.tradeable_ids}
+        return self._get_view('tradeable', self.tradeable_ids)
 
 
     def get_pairs_with_position(self) -> Dict:
@@ -206,14 +421,11 @@ class PairsManager:
         获取所有有持仓的可交易配对
         返回: {pair_id: Pairs对象} 字典
 
-        优化: 直接遍历,避免构建中间字典
+        优化: 读取物化索引 with_position_ids,不再逐配对检查持仓
         """
-        result = {}
-        for pair_id in self.tradeable_ids:
-            pair = self.all_pairs[pair_id]
-            if pair.has_position():
-                result[pair_id] = pair
-        return result
+        if self.verify_indexes_enabled:
+            self.verify_indexes()
+        return self._get_view('with_position', self.with_position_ids)
 
 
     def get_pairs_without_position(self) -> Dict:
@@ -221,14 +433,83 @@ class PairsManager:
         获取所有无持仓的可交易配对(用于开仓逻辑)
         返回: {pair_id: Pairs对象} 字典
 
-        优化: 直接遍历,避免构建中间字典
+        优化: 读取物化索引 flat_ids,不再逐配对检查持仓
+        """
+        if self.verify_indexes_enabled:
+            self.verify_indexes()
+        return self._get_view('flat', self.flat_ids)
+
+
+    def get_tradeable_symbols(self) -> List:
+        """
+        可交易配对涉及的全部股票(去重,顺序稳定)
+
+        结果缓存到下次 reclassify_pairs(),供OnData每bar构建BarSnapshot使用
+        """
+        if self._tradeable_symbols is None:
+            registry = self.algorithm.symbol_registry
+            self._tradeable_symbols = [registry.get_symbol(sid) for sid in self.get_symbol_index()]
+        return self._tradeable_symbols
+
+
+    def get_symbol_index(self) -> Dict:
+        """
+        股票 → 可交易配对 反向索引 {股票整数ID: {pair_id}}
+
+        结果缓存到下次 reclassify_pairs()
+        """
+        if self._symbol_pairs is None:
+            index = {}
+            for pair_id in self.tradeable_ids:
+                pair = self.all_pairs[pair_id]
+                index.setdefault(pair.sid1, set()).add(pair_id)
+                index.setdefault(pair.sid2, set()).add(pair_id)
+            self._symbol_pairs = index
+        return self._symbol_pairs
+
+
+    def get_active_pair_ids(self, data) -> Optional[Set]:
+        """
+        本bar需要评估的配对(稀疏更新)
+
+        - 稀疏更新关闭或到达全量评估周期: 返回None(评估全部可交易配对)
+        - 否则: 返回至少一条腿出现在data中的pair_id集合
+
+        分钟级/混合频率数据中大部分Slice只更新少数股票,两腿都无数据的配对本bar信号必为NO_DATA;
+        持仓配对的时间类风控(持仓超时等)由周期性全量评估兜底。
         """
-        result = {}
-        for pair_id in self.tradeable_ids:
-            pair = self.all_pairs[pair_id]
-            if not pair.has_position():
-                result[pair_id] = pair
-        return result
+        if not self.sparse_updates:
+            return None
+
+        self._bars_since_sweep += 1
+        if self._bars_since_sweep >= self.full_sweep_bars:
+            self._bars_since_sweep = 0
+            self.full_sweep_count += 1
+            return None
+
+        index = self.get_symbol_index()
+        registry = self.algorithm.symbol_registry
+        active_ids = set()
+        for symbol in data.Keys:
+            pair_ids = index.get(registry.get_id(symbol))
+            if pair_ids:
+                active_ids |= pair_ids
+        return active_ids
+
+
+    def evaluate_pair_book(self, data):
+        """
+        对当前bar向量化计算所有可交易配对的Z-score和信号(OnData开头调用一次)
+
+        列式表标记dirty时先按当前可交易配对重建; 本bar已构建BarSnapshot时直接取快照价格。
+        """
+        if self.pair_book is None:
+            return
+
+        if self.pair_book.dirty:
+            self.pair_book.rebuild(self.get_tradeable_pairs().values())
+
+        self.pair_book.evaluate(data, self.algorithm.bar_snapshot)
 
 
     def get_pair_by_id(self, pair_id):
@@ -265,6 +546,7 @@ class PairsManager:
             'legacy_count': len(self.legacy_ids),
             'archived_count': len(self.archived_ids),
             'total_count': len(self.all_pairs),
+            'compacted_records': len(self.archived_records),
             'last_update_time': self.last_update_time
         }
 
@@ -277,4 +559,5 @@ class PairsManager:
             f"遗留={stats['legacy_count']}, "
             f"归档={stats['archived_count']}, "
             f"总计={stats['total_count']}"
+            + (f", 压缩记录={stats['compacted_records']}" if self.compaction_enabled else "")
         )
\ No newline at end of file
@@ -0,0 +1,58 @@
+# region imports
+from AlgorithmImports import *
+import threading
+from typing import Optional
+# endregion
+
+
+class SymbolRegistry:
+    """
+    股票整数ID表 - 把LEAN Symbol驻留(intern)为从0开始的稠密整数ID
+
+    问题:
+        Symbol作为dict键时,哈希和相等比较都要跨越Python.NET边界;
+        每bar多次查询的内部表(BarSnapshot列索引、PairBook列映射、股票→配对反向索引)反复付出这部分开销。
+
+    方案:
+        - Symbol在进入系统时(Pairs创建、快照列变化)驻留一次,之后内部表以整数ID为键
+        - 稠密ID可直接作为NumPy数组下标
+        - 只在LEAN边界(下单、History、读取Slice/Portfolio)通过 get_symbol() 转回Symbol
+
+    线程:
+        后台分析线程也可能驻留新Symbol,新ID分配在锁内完成;已驻留Symbol的查询无锁
+    """
+
+    def __init__(self):
+        self._ids = {}          # {Symbol: int}
+        self._symbols = []      # [Symbol] 下标即ID
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+
+    def intern(self, symbol: Symbol) -> int:
+        """返回Symbol的整数ID,首次出现时分配新ID"""
+        sid = self._ids.get(symbol)
+        if sid is not None:
+            return sid
+
+        with self._lock:
+            sid = self._ids.get(symbol)
+            if sid is None:
+                sid = len(self._symbols)
+                self._symbols.append(symbol)
+                self._ids[symbol] = sid
+        return sid
+
+
+    def get_id(self, symbol: Symbol) -> Optional[int]:
+        """查询Symbol的整数ID,未驻留返回None(不分配)"""
+        return self._ids.get(symbol)
+
+
+    def get_symbol(self, sid: int) -> Symbol:
+        """整数ID转回Symbol(LEAN边界使用)"""
+        return self._symbols[sid]
+
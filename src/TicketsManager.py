@@ -1,10 +1,42 @@
 # region imports
 from AlgorithmImports import *
-from typing import Dict, List, Set
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set
 from src.constants import OrderAction  # v7.2.21: 修复导入遗漏
 # endregion
 
 
+@dataclass(frozen=True, slots=True)
+class FillRecord:
+    """
+    已完成订单的紧凑记录 (不可变Value Object)
+
+    双腿COMPLETED后由OrderTicket提取一次,存入TicketsManager.fill_history(有界),
+    OrderTicket本身不再被持有
+    """
+    pair_id: str
+    action: str
+    order_id: int
+    symbol: Symbol
+    quantity: float         # QuantityFilled
+    average_price: float    # AverageFillPrice
+    time: datetime          # ticket.Time
+
+    @classmethod
+    def from_ticket(cls, pair_id: str, action: str, ticket) -> 'FillRecord':
+        return cls(
+            pair_id=pair_id,
+            action=action,
+            order_id=ticket.OrderId,
+            symbol=ticket.Symbol,
+            quantity=ticket.QuantityFilled,
+            average_price=ticket.AverageFillPrice,
+            time=ticket.Time
+        )
+
+
 class TicketsManager:
     """
     订单生命周期管理器(Order Lifecycle Tracker)
@@ -14,17 +46,18 @@ class TicketsManager:
 
     核心机制:
     1. 订单注册: 建立OrderId→pair_id映射
-    2. 状态推导: 从OrderTicket.Status实时计算配对状态
+    2. 状态机: 配对状态(NONE/PENDING/COMPLETED/ANOMALY)只在注册和OnOrderEvent时推进并存储
     3. 订单锁定: PENDING状态时阻止新订单提交
-    4. 异常检测: 识别Canceled/Invalid订单
+    4. 异常检测: 识别Canceled/Invalid订单(异常配对集合)
+    5. 有界保留: 双腿成交后批次移出活动表,只保留最近N条FillRecord
 
     职责边界:
     ✅ 负责: 订单状态追踪、重复下单防护、异常检测
     ❌ 不负责: 配对的时间记录、收益计算、持仓分析
 
     设计原则:
-    - 单一数据源: 状态完全由OrderTicket.Status推导
-    - 实时计算: 不存储状态,每次查询都重新计算
+    - 事件驱动: 注册时读取一次OrderTicket.Status,之后由OrderEvent.Status更新,查询不再跨越.NET边界
+    - 状态规则与逐票据推导一致(_derive_pair_status),调试时可逐事件交叉校验(verify_states)
     - 最小职责: 只做订单追踪,不做业务分析
 
     使用示例:
@@ -43,16 +76,22 @@ class TicketsManager:
 
     # ========== 初始化 ==========
 
-    def __init__(self, algorithm, pairs_manager):
+    def __init__(self, algorithm, pairs_manager, verify_states: bool = False,
+                 fill_history_depth: int = 200, latency_tracker=None):
         """
         初始化订单管理器
 
         Args:
             algorithm: QCAlgorithm实例,用于Debug日志
             pairs_manager: PairsManager引用,用于获取Pairs对象进行回调
+            verify_states: 调试用,每个订单事件后用OrderTicket.Status交叉校验存储的状态
+            fill_history_depth: 已完成订单记录(FillRecord)保留条数
+            latency_tracker: OrderLatencyTracker实例(可选),记录提交/成交/完成时间
         """
         self.algorithm = algorithm
         self.pairs_manager = pairs_manager
+        self.verify_states_enabled = verify_states
+        self.latency_tracker = latency_tracker
 
         # === 核心数据结构 ===
         # OrderId → pair_id 映射(O(1)查找,供OnOrderEvent使用)
@@ -71,6 +110,24 @@ class TicketsManager:
         # 例: {"(AAPL, MSFT)": "STOP_LOSS", ("GOOGL", "AMZN")": "CLOSE"}
         self._pair_close_reasons: Dict[str, str] = {}
 
+        # === 状态机 ===
+        # OrderId → 最近一次订单状态(注册时取自ticket.Status,之后由OrderEvent.Status更新)
+        self._order_status: Dict[int, int] = {}
+
+        # pair_id → "PENDING" | "COMPLETED" | "ANOMALY"(无记录即 "NONE")
+        self.pair_status: Dict[str, str] = {}
+
+        # 当前处于ANOMALY状态的配对
+        self.anomaly_ids: Set[str] = set()
+
+        # IntentQueue中排队的配对(尚未提交订单,同样视为锁定)
+        self.reserved_ids: Set[str] = set()
+
+        # === 已完成订单(有界) ===
+        # 双腿成交后订单批次移出上面的活动表,只保留最近 fill_history_depth 条 FillRecord
+        self.fill_history: deque = deque(maxlen=fill_history_depth)
+        self.completed_batches = 0
+
 
     # ========== 公共接口 ==========
 
@@ -103,6 +160,11 @@ class TicketsManager:
         if not tickets:
             return
 
+        # 上一批订单的状态记录不再参与状态机
+        for ticket in self.pair_tickets.get(pair_id, ()):
+            if ticket is not None:
+                self._order_status.pop(ticket.OrderId, None)
+
         # 存储订单引用和动作类型
         self.pair_tickets[pair_id] = tickets
         self.pair_actions[pair_id] = action
@@ -111,10 +173,16 @@ class TicketsManager:
         if action == OrderAction.CLOSE and reason:
             self._pair_close_reasons[pair_id] = reason
 
-        # 建立OrderId→pair_id映射
+        # 建立OrderId→pair_id映射,并记录注册时的订单状态
         for ticket in tickets:
             if ticket is not None:
                 self.order_to_pair[ticket.OrderId] = pair_id
+                self._order_status[ticket.OrderId] = ticket.Status
+
+        self._advance_state(pair_id)
+
+        if self.latency_tracker is not None:
+            self.latency_tracker.on_register(pair_id, tickets, action, reason)
 
         # 简化日志
         self.algorithm.Debug(
@@ -133,6 +201,8 @@ class TicketsManager:
             True - 有PENDING订单,不能提交新订单
             False - 无订单或订单已完成,可以提交新订单
 
+        复杂度: O(1) 读取存储状态
+
         使用场景:
             # 在每次交易前检查
             if self.tickets_manager.is_pair_locked(pair.pair_id):
@@ -143,7 +213,27 @@ class TicketsManager:
             if tickets:
                 self.tickets_manager.register_tickets(pair.pair_id, tickets)
         """
-        return self.get_pair_status(pair_id) == "PENDING"
+        return self.pair_status.get(pair_id) == "PENDING" or pair_id in self.reserved_ids
+
+
+    def has_pending_orders(self, pair_id: str) -> bool:
+        """
+        配对是否有已提交未完成的订单(PENDING)
+
+        与is_pair_locked的区别: 不包含意图队列中排队的配对(reserved_ids)。
+        风控平仓路径使用本方法,排队中的配对可提交更高优先级的风控意图(IntentQueue替换排队意图)。
+        """
+        return self.pair_status.get(pair_id) == "PENDING"
+
+
+    def reserve_pair(self, pair_id: str):
+        """意图入队时锁定配对(提交前不接受该配对的新意图)"""
+        self.reserved_ids.add(pair_id)
+
+
+    def release_pair(self, pair_id: str):
+        """意图出队/丢弃时释放锁定"""
+        self.reserved_ids.discard(pair_id)
 
 
     def on_order_event(self, event: OrderEvent):
@@ -152,9 +242,8 @@ class TicketsManager:
 
         目的:
         1. 通过OrderId找到pair_id
-        2. 记录关键状态变化
-        3. 驱动状态更新(通过get_pair_status实时计算)
-        4. COMPLETED时回调Pairs记录双腿成交时间
+        2. 记录订单状态(event.Status),推进配对状态机
+        3. COMPLETED时回调Pairs记录双腿成交时间
 
         状态转换:
             注册订单 → PENDING → OnOrderEvent触发 → COMPLETED/ANOMALY
@@ -172,8 +261,20 @@ class TicketsManager:
             # 不是配对订单,忽略
             return
 
-        # 获取实时状态
-        current_status = self.get_pair_status(pair_id)
+        # 推进状态机
+        self._order_status[order_id] = event.Status
+        current_status = self._advance_state(pair_id)
+
+        if self.latency_tracker is not None:
+            if event.Status == OrderStatus.Filled:
+                self.latency_tracker.on_fill(pair_id, order_id, event.UtcTime)
+            if current_status == "ANOMALY":
+                self.latency_tracker.on_anomaly(pair_id)
+            elif current_status == "COMPLETED":
+                self.latency_tracker.on_complete(pair_id)
+
+        if self.verify_states_enabled:
+            self.verify_states(pair_id)
 
         # 只在异常时打印日志（减少噪音）
         if current_status == "ANOMALY":
@@ -202,6 +303,9 @@ class TicketsManager:
                 # 回调Pairs记录时间和数量(v7.2.21: 新增reason参数)
                 pairs_obj.on_position_filled(action, fill_time, tickets, reason)
 
+                # 同步PairsManager持仓索引
+                self.pairs_manager.on_pair_filled(pair_id)
+
                 # 平仓完成后清理 HWM（委托给 RiskManager）
                 if action == "CLOSE" and hasattr(self.algorithm, 'risk_manager'):
                     self.algorithm.risk_manager.cleanup_pair_hwm(pair_id)
@@ -210,8 +314,8 @@ class TicketsManager:
                 if action == OrderAction.CLOSE:
                     self._pair_close_reasons.pop(pair_id, None)
 
-            # 清理已完成订单的映射（防止内存泄漏）
-            self._cleanup_order_to_pair(pair_id)
+            # 已完成批次移出活动表,转为FillRecord（防止内存泄漏）
+            self._retire_completed(pair_id)
 
 
     def get_anomaly_pairs(self) -> Set[str]:
@@ -232,23 +336,92 @@ class TicketsManager:
             for pair_id in anomaly_pairs:
                 self.Debug(f"[订单异常] {pair_id} 检测到单腿失败")
                 # 风控模块会通过check_pair_anomaly()处理
+
+        复杂度: O(异常配对数),返回副本
         """
-        return {
-            pair_id for pair_id in self.pair_tickets.keys()
-            if self.get_pair_status(pair_id) == "ANOMALY"
-        }
+        return set(self.anomaly_ids)
 
 
-    # ========== 内部实现 ==========
+    def get_fill_history(self, pair_id: Optional[str] = None) -> List[FillRecord]:
+        """
+        最近完成的订单记录(按完成顺序,最多 fill_history_depth 条)
+
+        Args:
+            pair_id: 只返回该配对的记录; None返回全部
+        """
+        if pair_id is None:
+            return list(self.fill_history)
+        return [record for record in self.fill_history if record.pair_id == pair_id]
+
 
     def get_pair_status(self, pair_id: str) -> str:
         """
-        实时计算配对的订单状态
+        配对的订单状态(状态机存储值)
 
-        设计原则: 单一数据源
-        - 状态完全由OrderTicket.Status推导
-        - 不存储状态(避免状态过期)
-        - 每次查询都实时计算
+        Returns:
+            "NONE" | "PENDING" | "COMPLETED" | "ANOMALY"
+        """
+        return self.pair_status.get(pair_id, "NONE")
+
+
+    def verify_states(self, pair_id: str = None) -> bool:
+        """
+        调试: 用OrderTicket.Status逐票据推导的状态交叉校验存储状态
+
+        Args:
+            pair_id: 只校验该配对; None时校验全部已注册配对
+
+        Returns:
+            bool: 是否全部一致(不一致时记录日志,不修改存储状态)
+        """
+        pair_ids = [pair_id] if pair_id is not None else list(self.pair_tickets.keys())
+        consistent = True
+        for pid in pair_ids:
+            stored = self.get_pair_status(pid)
+            derived = self._derive_pair_status(pid)
+            if stored != derived:
+                consistent = False
+                self.algorithm.Debug(f"[TM校验] {pid} 存储状态{stored} != 票据推导{derived}")
+        return consistent
+
+
+    # ========== 内部实现 ==========
+
+    def _advance_state(self, pair_id: str) -> str:
+        """由已记录的订单状态重新计算配对状态并存储(规则同_derive_pair_status)"""
+        statuses = [
+            self._order_status[t.OrderId] for t in self.pair_tickets.get(pair_id, ())
+            if t is not None
+        ]
+        state = self._classify_statuses(statuses)
+
+        if state == "NONE":
+            self.pair_status.pop(pair_id, None)
+        else:
+            self.pair_status[pair_id] = state
+
+        if state == "ANOMALY":
+            self.anomaly_ids.add(pair_id)
+        else:
+            self.anomaly_ids.discard(pair_id)
+        return state
+
+
+    @staticmethod
+    def _classify_statuses(statuses: List) -> str:
+        """订单状态列表 → 配对状态"""
+        if not statuses:
+            return "NONE"
+        if all(status == OrderStatus.Filled for status in statuses):
+            return "COMPLETED"
+        if any(status in (OrderStatus.Canceled, OrderStatus.Invalid) for status in statuses):
+            return "ANOMALY"
+        return "PENDING"
+
+
+    def _derive_pair_status(self, pair_id: str) -> str:
+        """
+        从OrderTicket.Status实时推导配对的订单状态(校验用,每张票据一次.NET读取)
 
         状态映射规则:
         - 无订单记录 → "NONE"
@@ -262,29 +435,29 @@ class TicketsManager:
         Returns:
             "NONE" | "PENDING" | "COMPLETED" | "ANOMALY"
         """
-        # 检查是否有订单记录
-        tickets = self.pair_tickets.get(pair_id)
-        if not tickets:
-            return "NONE"
+        tickets = self.pair_tickets.get(pair_id) or []
+        return self._classify_statuses([t.Status for t in tickets if t is not None])
 
-        # 过滤有效订单
-        valid_tickets = [t for t in tickets if t is not None]
-        if not valid_tickets:
-            return "NONE"
 
-        # 状态推导逻辑
-        all_filled = all(t.Status == OrderStatus.Filled for t in valid_tickets)
-        has_canceled = any(
-            t.Status in [OrderStatus.Canceled, OrderStatus.Invalid]
-            for t in valid_tickets
-        )
+    def _retire_completed(self, pair_id: str):
+        """
+        COMPLETED批次移出活动表: 票据转为FillRecord存入有界历史,
+        pair_tickets / pair_actions / 状态机中只保留在途和异常的配对
+        """
+        self._cleanup_order_to_pair(pair_id)
 
-        if all_filled:
-            return "COMPLETED"
-        elif has_canceled:
-            return "ANOMALY"
-        else:
-            return "PENDING"
+        tickets = self.pair_tickets.pop(pair_id, None) or []
+        action = self.pair_actions.pop(pair_id, None)
+        self._pair_close_reasons.pop(pair_id, None)
+
+        for ticket in tickets:
+            if ticket is not None:
+                self._order_status.pop(ticket.OrderId, None)
+                self.fill_history.append(FillRecord.from_ticket(pair_id, action, ticket))
+
+        # 无活动订单即 "NONE"(与COMPLETED一样不锁定、非异常)
+        self.pair_status.pop(pair_id, None)
+        self.completed_batches += 1
 
 
     def _cleanup_order_to_pair(self, pair_id: str):
@@ -293,16 +466,13 @@ class TicketsManager:
 
         目的: 防止内存泄漏
         - 当订单状态变为COMPLETED/ANOMALY后,清理order_to_pair映射
-        - 保留pair_tickets和pair_actions,供后续查询使用
 
         清理时机:
-        - COMPLETED: 订单全部成交,不再需要OnOrderEvent追踪
-        - ANOMALY: 订单异常,已标记需要风控处理,不再需要追踪
+        - COMPLETED: 订单全部成交,不再需要OnOrderEvent追踪(随后_retire_completed移出pair_tickets/pair_actions)
+        - ANOMALY: 订单异常,已标记需要风控处理,不再需要追踪(保留pair_tickets,直到风控重新注册平仓订单)
 
         设计原则:
         - 只清理order_to_pair映射(用于OnOrderEvent查找)
-        - 不清理pair_tickets(可能需要查询订单详情)
-        - 不清理pair_actions(可能需要查询动作类型)
 
         Args:
             pair_id: 配对ID,格式如 "(AAPL, MSFT)"
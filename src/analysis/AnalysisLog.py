@@ -0,0 +1,49 @@
+# region imports
+from AlgorithmImports import *
+import threading
+from typing import List
+# endregion
+
+
+class AnalysisLog:
+    """
+    分析日志 - 分析模块(协整检验/质量评估/贝叶斯建模/流水线)的Debug出口
+
+    问题:
+        algorithm.Debug 是QC API,后台分析(BackgroundAnalysisWorker)的工作线程不能调用。
+
+    方案:
+        - 默认直接转发 algorithm.Debug(同步分析 / 主线程调用)
+        - capture(): 当前线程的日志改为写入缓冲,release() 取回缓冲,
+          由主线程在 poll() 时按原顺序输出
+        - 缓冲按线程隔离,工作线程捕获期间主线程的日志照常直接输出
+    """
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+        """
+        self.algorithm = algorithm
+        self._local = threading.local()
+
+
+    def Debug(self, message: str):
+        """输出或缓冲一条日志"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            self.algorithm.Debug(message)
+        else:
+            buffer.append(message)
+
+
+    def capture(self):
+        """当前线程开始缓冲日志"""
+        self._local.buffer = []
+
+
+    def release(self) -> List[str]:
+        """结束当前线程的缓冲,返回缓冲的日志行"""
+        buffer = getattr(self._local, 'buffer', None)
+        self._local.buffer = None
+        return buffer if buffer is not None else []
@@ -0,0 +1,203 @@
+# region imports
+from AlgorithmImports import *
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.analysis.PairData import PairData
+# endregion
+
+
+class AnalysisPipeline:
+    """
+    配对分析流水线 - 串联 数据处理 → 协整检验 → 质量评估 → 贝叶斯建模
+
+    两种模式(analysis_shared['pipeline_mode']):
+        - staged: 逐阶段全量执行(全部协整检验完成后才评分,全部评分完成后才建模)
+        - streaming: 协整检验逐子行业产出,PairSelector维护有界的最优集合,
+          一旦候选确定进入最终结果立即开始MCMC建模
+
+    两种模式选出的配对集合一致(见StreamingSelection的等价性说明);
+    streaming模式中间结果只保留当前子行业 + 最优集合(<=max_pairs),
+    PairData在建模完成或被挤出最优集合后立即释放。
+    """
+
+    def __init__(self, algorithm, shared_config: dict, data_processor, cointegration_analyzer,
+                 pair_selector, bayesian_modeler):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            shared_config: 共享配置(analysis_shared)
+            data_processor / cointegration_analyzer / pair_selector / bayesian_modeler: 各阶段分析模块
+        """
+        self.algorithm = algorithm
+        self.log = algorithm.analysis_log
+        self.pipeline_mode = shared_config['pipeline_mode']
+
+        self.data_processor = data_processor
+        self.cointegration_analyzer = cointegration_analyzer
+        self.pair_selector = pair_selector
+        self.bayesian_modeler = bayesian_modeler
+
+
+    def run(self, symbols: List[Symbol]) -> List[Dict]:
+        """
+        执行配对分析流程(步骤1-5,同步)
+
+        Returns:
+            List[Dict]: 贝叶斯建模结果列表(供Pairs.from_model_result创建配对)
+        """
+        snapshot = self.prepare(symbols)
+        if snapshot is None:
+            return []
+
+        return self.execute(snapshot)
+
+
+    def prepare(self, symbols: List[Symbol]) -> Optional[Dict]:
+        """
+        准备分析快照(必须在主线程调用)
+
+        History下载和子行业分组需要访问QC API(History/Securities),只能在主线程执行;
+        快照内的数据此后只读,可安全交给后台线程。
+
+        Returns:
+            {'clean_data', 'valid_symbols', 'industry_groups', 'snapshot_time'},有效股票不足时返回None
+        """
+        # === 步骤1: 数据处理 ===
+        data_result = self.data_processor.process(symbols)
+        clean_data = data_result['clean_data']
+        valid_symbols = data_result['valid_symbols']
+
+        if len(valid_symbols) < 2:
+            return None
+
+        # 子行业分组(读取Securities基本面)
+        industry_groups = self.cointegration_analyzer.group_symbols(valid_symbols)
+
+        return {
+            'clean_data': clean_data,
+            'valid_symbols': valid_symbols,
+            'industry_groups': industry_groups,
+            'snapshot_time': self.algorithm.Time
+        }
+
+
+    def execute(self, snapshot: Dict) -> List[Dict]:
+        """
+        在快照上执行步骤2-5(可在后台线程调用)
+
+        不访问QC API: 时间戳统一使用快照的snapshot_time,日志经AnalysisLog输出
+
+        Returns:
+            List[Dict]: 贝叶斯建模结果列表
+        """
+        if self.pipeline_mode == 'streaming':
+            return self._run_streaming(snapshot)
+
+        return self._run_staged(snapshot)
+
+
+    def _run_staged(self, snapshot: Dict) -> List[Dict]:
+        """逐阶段全量执行(步骤2-5)"""
+        clean_data = snapshot['clean_data']
+
+        # === 步骤2: 协整检验 ===
+        cointegration_result = self.cointegration_analyzer.cointegration_procedure(
+            snapshot['valid_symbols'], clean_data, snapshot['industry_groups'], snapshot['snapshot_time']
+        )
+        raw_pairs = cointegration_result['raw_pairs']
+
+        if not raw_pairs:
+            return []
+
+        # === 步骤3: 构建PairData字典 ===
+        pair_data_dict = {}
+        for pair_info in raw_pairs:
+            pair_key = (pair_info['symbol1'], pair_info['symbol2'])
+            pair_data_dict[pair_key] = PairData.from_clean_data(pair_info, clean_data)
+
+        # === 步骤4: 质量评估和配对筛选 ===
+        selected_pairs = self.pair_selector.selection_procedure(raw_pairs, pair_data_dict, clean_data)
+
+        if not selected_pairs:
+            return []
+
+        # === 步骤5: 贝叶斯建模（复用PairData字典） ===
+        return self.bayesian_modeler.modeling_procedure(selected_pairs, pair_data_dict, snapshot['snapshot_time'])
+
+
+    def _run_streaming(self, snapshot: Dict) -> List[Dict]:
+        """流式执行(步骤2-5交错进行)"""
+        pair_data_dict = {}
+        certain_pairs = self._stream_certain_pairs(
+            snapshot['industry_groups'], snapshot['clean_data'], snapshot['snapshot_time'], pair_data_dict
+        )
+
+        # 建模器逐个消费确定入选的配对(生成器驱动上游协整检验和评分)
+        return self.bayesian_modeler.modeling_procedure(certain_pairs, pair_data_dict, snapshot['snapshot_time'])
+
+
+    def _stream_certain_pairs(self, industry_groups: Dict, clean_data: Dict, analysis_time: datetime,
+                              pair_data_dict: Dict):
+        """
+        逐子行业检验+评分,产出确定进入最终结果的配对(生成器)
+
+        pair_data_dict 只保留最优集合中尚未建模的配对 + 当前正在建模的配对:
+        - 组内未入选 / 被挤出最优集合 → 立即释放
+        - 产出的配对在建模器处理下一个配对前(生成器恢复时)释放
+        """
+        analyzer = self.cointegration_analyzer
+        selector = self.pair_selector
+
+        # 每个子行业的最大贡献配对数(确定入选判断的上界)
+        capacities = {ig_name: selector.group_capacity(len(symbols)) for ig_name, symbols in industry_groups.items()}
+        selection = selector.start_streaming(sum(capacities.values()))
+
+        statistics = analyzer.new_statistics()
+        emitted_count = 0
+        last_emitted_key = None
+
+        for ig_name, ig_pairs in analyzer.iter_group_pairs(industry_groups, clean_data, analysis_time, statistics):
+            group_selected = []
+            if ig_pairs:
+                # 组内评分+筛选(单股重复限制只在组内生效)
+                group_data = {
+                    (pair_info['symbol1'], pair_info['symbol2']): PairData.from_clean_data(pair_info, clean_data)
+                    for pair_info in ig_pairs
+                }
+                scored_pairs = selector.evaluate_quality(ig_pairs, group_data)
+                group_selected = selector.select_best(scored_pairs)
+
+                for pair in group_selected:
+                    pair_key = (pair['symbol1'], pair['symbol2'])
+                    pair_data_dict[pair_key] = group_data[pair_key]
+
+            certain, dropped = selection.add_group(group_selected, capacities[ig_name])
+
+            # 释放被挤出最优集合的配对数据
+            for pair in dropped:
+                pair_data_dict.pop((pair['symbol1'], pair['symbol2']), None)
+
+            for pair in certain:
+                if last_emitted_key is not None:
+                    pair_data_dict.pop(last_emitted_key, None)
+                last_emitted_key = (pair['symbol1'], pair['symbol2'])
+                emitted_count += 1
+                yield pair
+
+        analyzer.log_statistics(statistics, len(industry_groups))
+
+        # 全部子行业处理完毕,最优集合剩余配对全部确定入选
+        early_count = emitted_count
+        for pair in selection.finish():
+            if last_emitted_key is not None:
+                pair_data_dict.pop(last_emitted_key, None)
+            last_emitted_key = (pair['symbol1'], pair['symbol2'])
+            emitted_count += 1
+            yield pair
+
+        if last_emitted_key is not None:
+            pair_data_dict.pop(last_emitted_key, None)
+
+        self.log.Debug(
+            f"[配对分析] 流式筛选: 入选{emitted_count}对, 其中{early_count}对在协整检验完成前开始建模"
+        )
@@ -0,0 +1,94 @@
+# region imports
+from AlgorithmImports import *
+from datetime import timedelta
+from typing import List
+# endregion
+
+
+class AnalysisTriggerCoalescer:
+    """
+    分析触发合并器 - 合并OnSecuritiesChanged的多次触发
+
+    问题:
+        一次月度选股刷新可能产生多个SecurityChanges事件(新增/移除分开到达),
+        每个事件都会完整执行一次 下载 → 协整 → MCMC。
+
+    合并规则:
+        - OnSecuritiesChanged 只记录触发(record),不立即分析
+        - 首次触发后等待 window_minutes 分钟,之后的第一个bar统一执行一次(window_minutes=0 即下一个bar)
+        - 执行前比较净股票集合: 与上次分析时相同(新增/移除相互抵消)则跳过
+
+    统计:
+        - triggers: 收到的触发次数
+        - suppressed: 被合并掉的触发次数(triggers - 实际分析次数)
+        - skipped_unchanged: 因净集合未变化而跳过的合并轮次
+    """
+
+    def __init__(self, algorithm, config: dict):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            config: 共享配置(analysis_shared)
+        """
+        self.algorithm = algorithm
+        self.window = timedelta(minutes=config['trigger_window_minutes'])
+
+        self.first_trigger_time = None      # 当前合并窗口的首次触发时间(None=无待处理触发)
+        self.last_analyzed_symbols = set()  # 上次分析时的股票集合
+
+        # 统计
+        self.triggers = 0
+        self.analyses = 0
+        self.skipped_unchanged = 0
+
+
+    @property
+    def suppressed(self) -> int:
+        """被合并掉的触发次数"""
+        return self.triggers - self.analyses
+
+
+    def record(self):
+        """记录一次触发(OnSecuritiesChanged调用)"""
+        self.triggers += 1
+        if self.first_trigger_time is None:
+            self.first_trigger_time = self.algorithm.Time
+
+
+    def is_due(self) -> bool:
+        """是否有待处理的触发且合并窗口已结束"""
+        return (self.first_trigger_time is not None
+                and self.algorithm.Time >= self.first_trigger_time + self.window)
+
+
+    def flush(self, symbols: List[Symbol]) -> bool:
+        """
+        结束当前合并窗口
+
+        Args:
+            symbols: 当前(净)股票池
+
+        Returns:
+            bool: True=需要执行分析, False=净集合未变化或股票不足,跳过
+        """
+        self.first_trigger_time = None
+
+        current_symbols = set(symbols)
+        if current_symbols == self.last_analyzed_symbols:
+            self.skipped_unchanged += 1
+            self.algorithm.Debug(
+                f"[触发合并] 净股票集合未变化({len(current_symbols)}只),跳过分析 "
+                f"(累计触发{self.triggers}次, 合并{self.suppressed}次)"
+            )
+            return False
+
+        if len(current_symbols) < 2:
+            return False
+
+        self.last_analyzed_symbols = current_symbols
+        self.analyses += 1
+        self.algorithm.Debug(
+            f"[触发合并] 执行第{self.analyses}次分析: {len(current_symbols)}只股票 "
+            f"(累计触发{self.triggers}次, 合并{self.suppressed}次)"
+        )
+        return True
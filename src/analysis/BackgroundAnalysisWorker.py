@@ -0,0 +1,142 @@
+# region imports
+from AlgorithmImports import *
+import threading
+from typing import Dict, List, Optional
+# endregion
+
+
+class BackgroundAnalysisWorker:
+    """
+    后台配对分析 - 在工作线程上执行协整检验/质量评估/MCMC建模
+
+    线程分工:
+        - 主线程: prepare()(History下载 + 子行业分组,需要QC API)
+                  poll()取回结果,由调用方在OnData开头通过PairsManager.update_pairs()一次性替换
+        - 工作线程: execute()(只读快照数据,不访问QC API)
+                    时间戳使用快照的snapshot_time(不读取algorithm.Time/UtcTime);
+                    日志由AnalysisLog缓冲,poll()时在主线程按原顺序输出
+
+    共享状态约束:
+        - CointegrationAnalyzer.rolling_stats / BayesianModeler.historical_posteriors 由工作线程写入,
+          分析进行中主线程不得访问(日度协整复查在 is_busy 时跳过)
+        - 同一时刻最多一个分析任务; 分析进行中的新触发只保留最新一次,完成后再提交
+
+    注意:
+        回测中主线程不会等待工作线程,结果生效的bar取决于MCMC实际耗时(非确定性),
+        因此默认关闭(analysis_shared['background_analysis'])。
+    """
+
+    def __init__(self, algorithm, pipeline):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            pipeline: AnalysisPipeline实例
+        """
+        self.algorithm = algorithm
+        self.pipeline = pipeline
+        self.log = algorithm.analysis_log
+
+        self._thread = None
+        self._lock = threading.Lock()
+        self._completed = None          # (snapshot_time, results, error, log_lines) 工作线程写入,主线程取走
+        self._pending_symbols = None    # 分析进行中收到的最新触发
+
+        # 统计
+        self.submitted_count = 0
+        self.superseded_count = 0       # 被更新触发覆盖的排队请求数
+
+
+    @property
+    def is_busy(self) -> bool:
+        """是否有分析任务在运行或结果尚未取走"""
+        with self._lock:
+            has_completed = self._completed is not None
+        return has_completed or (self._thread is not None and self._thread.is_alive())
+
+
+    def submit(self, symbols: List[Symbol]) -> bool:
+        """
+        提交分析任务(主线程调用)
+
+        Args:
+            symbols: 当前股票池
+
+        Returns:
+            bool: 是否已启动后台分析(排队或有效股票不足时返回False)
+        """
+        if self.is_busy:
+            if self._pending_symbols is not None:
+                self.superseded_count += 1
+            self._pending_symbols = list(symbols)
+            self.algorithm.Debug("[后台分析] 上一轮分析进行中,新触发已排队")
+            return False
+
+        snapshot = self.pipeline.prepare(symbols)
+        if snapshot is None:
+            return False
+
+        self._thread = threading.Thread(
+            target=self._run, args=(snapshot,), name="pair-analysis", daemon=True
+        )
+        self._thread.start()
+        self.submitted_count += 1
+        self.algorithm.Debug(
+            f"[后台分析] 开始第{self.submitted_count}轮分析: {len(snapshot['valid_symbols'])}只股票"
+        )
+        return True
+
+
+    def _run(self, snapshot: Dict):
+        """工作线程入口"""
+        results, error = [], None
+        self.log.capture()
+        try:
+            results = self.pipeline.execute(snapshot)
+        except Exception as e:
+            error = str(e)
+        finally:
+            log_lines = self.log.release()
+
+        with self._lock:
+            self._completed = (snapshot['snapshot_time'], results, error, log_lines)
+
+
+    def poll(self) -> Optional[List[Dict]]:
+        """
+        取回已完成的分析结果(主线程,在bar边界调用)
+
+        Returns:
+            建模结果列表; 无已完成任务时返回None
+        """
+        with self._lock:
+            completed = self._completed
+            self._completed = None
+
+        if completed is None:
+            return None
+
+        self._thread.join()
+        self._thread = None
+
+        snapshot_time, results, error, log_lines = completed
+        for line in log_lines:
+            self.algorithm.Debug(line)
+        if error is not None:
+            self.algorithm.Debug(f"[后台分析] 分析失败(快照时间{snapshot_time}): {error}")
+            results = []
+
+        # 提交排队的最新触发
+        if self._pending_symbols is not None:
+            symbols = self._pending_symbols
+            self._pending_symbols = None
+            self.submit(symbols)
+
+        return results
+
+
+    def shutdown(self, timeout: float = None):
+        """回测/实盘结束时等待工作线程退出,未取走的结果丢弃"""
+        self._pending_symbols = None
+        if self._thread is not None and self._thread.is_alive():
+            self.algorithm.Debug("[后台分析] 等待进行中的分析结束")
+            self._thread.join(timeout)
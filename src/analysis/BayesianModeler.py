@@ -2,7 +2,8 @@
 from AlgorithmImports import *
 import numpy as np
 import pymc as pm
-from typing import Dict, List, Tuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
 from collections import defaultdict
 from src.analysis.PairData import PairData
 # endregion
@@ -21,6 +22,7 @@ class BayesianModeler:
             module_config: 模块配置(bayesian_modeler)
         """
         self.algorithm = algorithm
+        self.log = algorithm.analysis_log
         self.lookback_days = shared_config['lookback_days']
         self.mcmc_warmup_samples = module_config['mcmc_warmup_samples']
         self.mcmc_posterior_samples = module_config['mcmc_posterior_samples']
@@ -28,8 +30,16 @@ class BayesianModeler:
         self.bayesian_priors = module_config['bayesian_priors']  # 贝叶斯先验配置(无信息/信息先验)
         self.historical_posteriors = {}  # 内部管理历史后验,实现动态更新
 
+        # 子行业结果缓存(协整结果被复用的子行业,直接沿用上轮建模结果)
+        self.group_cache_max_age_days = shared_config['group_cache_max_age_days']
+        self.group_results = defaultdict(dict)  # {industry_group: {pair_key: 建模结果}}
 
-    def _cleanup_historical_posteriors(self):
+        # 分摊建模(有有效历史后验的配对先沿用历史后验,之后由StaggeredRemodelScheduler逐日重新建模)
+        self.staggered_enabled = module_config['staggered_remodel']['enabled']
+        self.deferred_pairs = {}  # {pair_key: pair_info} 待重新建模的配对
+
+
+    def _cleanup_historical_posteriors(self, current_time: datetime):
         """
         清理过期的历史后验记录，避免内存无限增长
         清理规则：删除超过 2 * lookback_days 天的记录
@@ -37,7 +47,6 @@ class BayesianModeler:
         if not self.historical_posteriors:
             return
 
-        current_time = self.algorithm.UtcTime
         expired_threshold = 2 * self.lookback_days  # 双倍lookback作为过期阈值
 
         # 找出需要清理的配对
@@ -52,18 +61,23 @@ class BayesianModeler:
 
         # 记录清理情况
         if pairs_to_remove:
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[BayesianModeler] 清理了{len(pairs_to_remove)}个过期的历史后验记录"
             )
 
 
-    def modeling_procedure(self, cointegrated_pairs: List[Dict], pair_data_dict: Dict) -> List[Dict]:
+    def modeling_procedure(self, cointegrated_pairs: Iterable[Dict], pair_data_dict: Dict,
+                           analysis_time: datetime) -> List[Dict]:
         """
         执行贝叶斯建模流程 - 对所有协整对进行参数估计（重构版）
 
         Args:
-            cointegrated_pairs: 配对列表
+            cointegrated_pairs: 配对列表或生成器(流式流水线逐个产出确定入选的配对)
             pair_data_dict: {pair_key: PairData} 预构建的PairData对象字典（从PairSelector传入）
+                           流式模式下由生成器在产出配对前写入
+            analysis_time: 分析快照时间(AnalysisPipeline.prepare()的snapshot_time),
+                           后验update_time / 结果modeling_time / 有效期判断均以此为准
+                           (后台分析完成时algorithm.Time已前进,不可使用)
 
         Returns:
             List[Dict]: 建模结果列表，每个元素包含配对的完整模型参数
@@ -71,29 +85,144 @@ class BayesianModeler:
         性能优化:
         - 复用PairSelector构建的PairData对象，避免重复对数转换
         """
-        # 清理过期的历史后验
-        self._cleanup_historical_posteriors()
+        # 清理过期的历史后验和子行业缓存
+        self._cleanup_historical_posteriors(analysis_time)
+        self._cleanup_group_results(analysis_time)
 
         # 里面的元素是字典结构，每一个元素都是一个协整对的信息信息，包括 pair_id, 后验，行业分类等
         modeling_results = []
 
-        statistics = defaultdict(int, total_pairs=len(cointegrated_pairs))
+        # 逐个计数(输入可能是生成器,无法预先len())
+        statistics = defaultdict(int)
+
+        group_counts = defaultdict(lambda: {'recomputed': 0, 'reused': 0})
+
+        # 上轮未完成的分摊建模队列作废(本轮配对要么重新延后,要么已完整建模)
+        self.deferred_pairs.clear()
 
         for pair in cointegrated_pairs:
-            result = self._model_single_pair(pair, pair_data_dict)
+            statistics['total_pairs'] += 1
+
+            # 子行业协整结果被复用 → 沿用上轮建模结果(跳过MCMC)
+            result = self._get_cached_result(pair, analysis_time)
+            if result is not None:
+                modeling_results.append(result)
+                statistics['successful'] += 1
+                statistics['reused'] += 1
+                group_counts[pair['industry_group']]['reused'] += 1
+                continue
+
+            # 分摊建模: 沿用有效历史后验,MCMC延后到之后的交易日
+            result = self._get_deferred_result(pair, analysis_time)
+            if result is not None:
+                modeling_results.append(result)
+                statistics['successful'] += 1
+                statistics['deferred'] += 1
+                continue
+
+            result = self._model_single_pair(pair, pair_data_dict, analysis_time)
             if result:
                 modeling_results.append(result)
                 statistics['successful'] += 1
                 statistics[f"{result['modeling_type']}_modeling"] += 1
+                group_counts[pair['industry_group']]['recomputed'] += 1
+                if self.group_cache_max_age_days > 0:
+                    self.group_results[pair['industry_group']][(pair['symbol1'], pair['symbol2'])] = result.copy()
             else:
                 statistics['failed'] += 1
 
         self._log_statistics(dict(statistics))
+        if self.group_cache_max_age_days > 0 and group_counts:
+            group_info = [
+                f"{ig_name}(计算{counts['recomputed']}/复用{counts['reused']})"
+                for ig_name, counts in group_counts.items()
+            ]
+            self.log.Debug(f"[BayesianModeler] 子行业缓存: {', '.join(group_info)}")
 
         return modeling_results
 
 
-    def _model_single_pair(self, pair: Dict, pair_data_dict: Dict) -> Dict:
+    def _get_cached_result(self, pair: Dict, analysis_time: datetime) -> Dict:
+        """
+        查询子行业缓存中的建模结果
+
+        仅当CointegrationAnalyzer复用了该子行业的协整结果(pair['group_reused'])时才复用,
+        质量分数使用本轮评估值。
+
+        Returns:
+            建模结果副本; 不可复用时返回None
+        """
+        if not pair.get('group_reused'):
+            return None
+
+        cached = self.group_results[pair['industry_group']].get((pair['symbol1'], pair['symbol2']))
+        if cached is None:
+            return None
+
+        if (analysis_time - cached['modeling_time']).days > self.group_cache_max_age_days:
+            return None
+
+        return dict(cached, quality_score=pair['quality_score'])
+
+
+    def _cleanup_group_results(self, current_time: datetime):
+        """清理超过 group_cache_max_age_days 的子行业缓存结果(按分析快照时间计龄)"""
+        if not self.group_results:
+            return
+
+        for ig_name in list(self.group_results.keys()):
+            results = self.group_results[ig_name]
+            for pair_key in [k for k, r in results.items()
+                             if (current_time - r['modeling_time']).days > self.group_cache_max_age_days]:
+                del results[pair_key]
+            if not results:
+                del self.group_results[ig_name]
+
+
+    def _get_deferred_result(self, pair: Dict, analysis_time: datetime) -> Dict:
+        """
+        分摊建模: 有效历史后验直接作为本轮参数,配对加入待建模队列
+
+        Returns:
+            以历史后验构建的结果(modeling_type='deferred'); 未启用或无有效历史后验时返回None
+        """
+        if not self.staggered_enabled:
+            return None
+
+        pair_key = (pair['symbol1'], pair['symbol2'])
+        if not self._has_valid_historical_posterior(pair_key, analysis_time):
+            return None
+
+        self.deferred_pairs[pair_key] = dict(pair)
+
+        posterior_stats = {k: v for k, v in self.historical_posteriors[pair_key].items() if k != 'update_time'}
+        return {
+            'symbol1': pair['symbol1'],
+            'symbol2': pair['symbol2'],
+            'industry_group': pair['industry_group'],
+            'quality_score': pair['quality_score'],
+            'modeling_type': 'deferred',
+            'modeling_time': analysis_time,
+            **posterior_stats
+        }
+
+
+    def remodel_pair(self, pair: Dict, pair_data: PairData, analysis_time: datetime) -> Dict:
+        """
+        单个配对重新建模(StaggeredRemodelScheduler调用)
+
+        Args:
+            pair: 配对信息(来自deferred_pairs)
+            pair_data: 最新窗口的PairData
+            analysis_time: 建模时间(调度器在主线程传入algorithm.Time)
+
+        Returns:
+            建模结果,失败时返回None
+        """
+        return self._model_single_pair(pair, {pair_data.pair_key: pair_data}, analysis_time)
+
+
+    def _model_single_pair(self, pair: Dict, pair_data_dict: Dict, analysis_time: datetime) -> Dict:
         """单个配对的建模流程（重构版）"""
         try:
             # Step 1: 数据层（从pair_data_dict获取预构建的PairData对象）
@@ -101,30 +230,30 @@ class BayesianModeler:
             pair_data = pair_data_dict[pair_key]
 
             # Step 2: 先验层（三级策略）
-            prior_params, prior_type = self._select_prior(pair, pair_data.pair_key)
+            prior_params, prior_type = self._select_prior(pair, pair_data.pair_key, analysis_time)
 
             # Step 3: 建模层
             trace = self._sample_posterior(pair_data, prior_params)
 
             # Step 4: 后验层
-            posterior_stats = self._extract_posterior_stats(trace, pair_data)
+            posterior_stats = self._extract_posterior_stats(trace, pair_data, analysis_time)
 
             # Step 5: 结果构建
-            result = self._build_result(pair, pair_data, prior_type, posterior_stats)
+            result = self._build_result(pair, pair_data, prior_type, posterior_stats, analysis_time)
 
             return result
 
         except Exception as e:
-            self.algorithm.Debug(f"[BayesianModeler] 建模失败: {str(e)}")
+            self.log.Debug(f"[BayesianModeler] 建模失败: {str(e)}")
             return None
 
 
     # ===== 先验选择系统 (三级策略) =====
 
-    def _select_prior(self, pair_info: Dict, pair_key: tuple) -> tuple:
+    def _select_prior(self, pair_info: Dict, pair_key: tuple, analysis_time: datetime) -> tuple:
         """先验选择策略（三级体系）"""
         # Level 1: 历史后验先验（强信息）
-        if self._has_valid_historical_posterior(pair_key):
+        if self._has_valid_historical_posterior(pair_key, analysis_time):
             return self._create_historical_prior(pair_key), 'historical_posterior'
 
         # Level 2: OLS弱信息先验（使用PairSelector的OLS结果）
@@ -132,17 +261,17 @@ class BayesianModeler:
             return self._create_ols_prior(pair_info), 'ols_informed'
 
         # Level 3: 完全无信息先验（降级方案）
-        self.algorithm.Debug(f"[BayesianModeler] {pair_key} 使用完全无信息先验 (原因: 无历史后验且OLS失败)")
+        self.log.Debug(f"[BayesianModeler] {pair_key} 使用完全无信息先验 (原因: 无历史后验且OLS失败)")
         return self._create_uninformed_prior(), 'uninformed'
 
 
-    def _has_valid_historical_posterior(self, pair_key: tuple) -> bool:
+    def _has_valid_historical_posterior(self, pair_key: tuple, analysis_time: datetime) -> bool:
         """检查是否存在有效的历史后验"""
         if pair_key not in self.historical_posteriors:
             return False
 
         validity_days = self.bayesian_priors['informed'].get('validity_days', 60)
-        days_old = (self.algorithm.UtcTime - self.historical_posteriors[pair_key]['update_time']).days
+        days_old = (analysis_time - self.historical_posteriors[pair_key]['update_time']).days
 
         return days_old <= validity_days
 
@@ -226,7 +355,7 @@ class BayesianModeler:
         return trace
 
 
-    def _extract_posterior_stats(self, trace, pair_data: PairData) -> Dict:
+    def _extract_posterior_stats(self, trace, pair_data: PairData, analysis_time: datetime) -> Dict:
         """提取后验统计量并保存到历史记录"""
         stats = {
             'alpha_mean': float(np.mean(trace['alpha'])),
@@ -237,7 +366,7 @@ class BayesianModeler:
             'sigma_std': float(np.std(trace['sigma'])),
             'residual_mean': float(np.mean(trace['residuals'])),
             'residual_std': float(np.std(trace['residuals'])),
-            'update_time': self.algorithm.UtcTime
+            'update_time': analysis_time
         }
 
         self.historical_posteriors[pair_data.pair_key] = stats.copy()
@@ -246,7 +375,7 @@ class BayesianModeler:
 
 
     def _build_result(self, pair_info: Dict, pair_data: PairData,
-                     prior_type: str, posterior_stats: Dict) -> Dict:
+                     prior_type: str, posterior_stats: Dict, analysis_time: datetime) -> Dict:
         """构建建模结果字典"""
         return {
             'symbol1': pair_data.symbol1,
@@ -254,7 +383,7 @@ class BayesianModeler:
             'industry_group': pair_info['industry_group'],
             'quality_score': pair_info['quality_score'],
             'modeling_type': prior_type,
-            'modeling_time': self.algorithm.Time,
+            'modeling_time': analysis_time,
             **posterior_stats
         }
 
@@ -266,8 +395,12 @@ class BayesianModeler:
         ols_informed = statistics.get('ols_informed_modeling', 0)
         historical_posterior = statistics.get('historical_posterior_modeling', 0)
         uninformed = statistics.get('uninformed_modeling', 0)
+        reused = statistics.get('reused', 0)
+        deferred = statistics.get('deferred', 0)
 
-        self.algorithm.Debug(
+        self.log.Debug(
             f"[BayesianModeler] 建模完成: 成功{successful}对, 失败{failed}对 "
-            f"(OLS弱信息{ols_informed}对, 历史后验{historical_posterior}对, 完全无信息{uninformed}对)"
+            f"(OLS弱信息{ols_informed}对, 历史后验{historical_posterior}对, 完全无信息{uninformed}对"
+            + (f", 缓存复用{reused}对" if reused else "")
+            + (f", 延后建模{deferred}对" if deferred else "") + ")"
         )
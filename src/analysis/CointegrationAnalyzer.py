@@ -2,11 +2,13 @@
 from AlgorithmImports import *
 import numpy as np
 import pandas as pd
+from datetime import datetime
 from typing import Dict, List
 from collections import defaultdict
 import itertools
 from statsmodels.tsa.stattools import coint
 from src.industry_mapping import get_industry_display
+from src.analysis.RollingCointegration import RollingPairStatistics
 # endregion
 
 
@@ -15,29 +17,53 @@ class CointegrationAnalyzer:
     协整分析器 - 识别具有长期均衡关系的股票配对
     """
 
-    def __init__(self, algorithm, module_config: dict):
+    def __init__(self, algorithm, shared_config: dict, module_config: dict):
         """
         初始化协整分析器
 
         Args:
             algorithm: QCAlgorithm实例
+            shared_config: 共享配置(analysis_shared)
             module_config: 模块配置字典
         """
         self.algorithm = algorithm
+        self.log = algorithm.analysis_log  # 工作线程上的日志由AnalysisLog缓冲
+        self.debug_mode = algorithm.debug_mode  # 初始化时读取,检验过程(可能在工作线程)不再访问algorithm
+        self.lookback_days = shared_config['lookback_days']
         self.pvalue_threshold = module_config['pvalue_threshold']
 
         # 子行业分组配置
         self.min_stocks_per_group = module_config['min_stocks_per_group']
         self.max_stocks_per_group = module_config['max_stocks_per_group']
 
+        # 滚动刷新配置(增量协整检验)
+        self.refresh_mode = module_config['refresh_mode']
+        self.daily_retest = module_config['daily_retest']
+        # 日度复查使用DF检验(滞后0),与选择配对的检验必须一致,否则配对可能在无新信息时被次日降级
+        if self.daily_retest and self.refresh_mode != 'incremental':
+            raise ValueError("daily_retest需要refresh_mode='incremental'(选择与复查使用同一DF检验)")
+        self.rebuild_interval = module_config['rolling_rebuild_interval']
+        self.stats_expiry_days = module_config['rolling_stats_expiry_days']
 
-    def cointegration_procedure(self, valid_symbols: List[Symbol], clean_data: Dict[Symbol, pd.DataFrame]) -> Dict:
+        # 配对滚动充分统计量 {(symbol1, symbol2): RollingPairStatistics}
+        self.rolling_stats = {}
+
+        # 子行业结果缓存(成分未变化的子行业复用上轮协整结果)
+        self.group_cache_max_age_days = shared_config['group_cache_max_age_days']
+        self.group_cache = {}  # {ig_name: {'members', 'fingerprint', 'pairs', 'time'}}
+
+
+    def cointegration_procedure(self, valid_symbols: List[Symbol], clean_data: Dict[Symbol, pd.DataFrame],
+                                industry_groups: Dict[str, List[Symbol]] = None,
+                                analysis_time: datetime = None) -> Dict:
         """
         执行协整分析流程（按26个子行业分组）
 
         Args:
             valid_symbols: UniverseSelection输出的所有通过筛选的股票
             clean_data: 清洗后的价格数据
+            industry_groups: 可选,预先分组结果(后台分析在主线程完成分组,避免工作线程访问Securities)
+            analysis_time: 分析快照时间(子行业缓存的写入/年龄判断),None时取algorithm.Time(仅限主线程调用)
 
         Returns:
             {
@@ -45,39 +71,21 @@ class CointegrationAnalyzer:
                 'statistics': {...}           # 统计信息
             }
         """
-        statistics = {
-            'total_pairs_tested': 0,
-            'cointegrated_pairs_found': 0,
-            'industry_group_breakdown': {}
-        }
+        statistics = self.new_statistics()
 
         # 步骤1: 按26个子行业分组（包含过滤+排序+数量限制）
-        industry_groups = self._group_by_industry_group(valid_symbols)
+        if industry_groups is None:
+            industry_groups = self.group_symbols(valid_symbols)
+        if analysis_time is None:
+            analysis_time = self.algorithm.Time
 
         # 步骤2: 每个子行业内部进行协整配对
         all_cointegrated_pairs = []
-        for ig_name, symbols in industry_groups.items():
-            # 分析该子行业内的配对
-            ig_pairs = self._analyze_industry_group(ig_name, symbols, clean_data)
+        for _, ig_pairs in self.iter_group_pairs(industry_groups, clean_data, analysis_time, statistics):
             all_cointegrated_pairs.extend(ig_pairs)
 
-            # 统计
-            pairs_count = len(symbols) * (len(symbols) - 1) // 2
-            statistics['industry_group_breakdown'][ig_name] = {
-                'symbols': len(symbols),
-                'pairs_tested': pairs_count,
-                'pairs_found': len(ig_pairs)
-            }
-            statistics['total_pairs_tested'] += pairs_count
-
-        statistics['cointegrated_pairs_found'] = len(all_cointegrated_pairs)
-
         # 输出统计
-        if all_cointegrated_pairs:
-            self.algorithm.Debug(
-                f"[协整分析] 发现{len(all_cointegrated_pairs)}个协整对 "
-                f"(测试{statistics['total_pairs_tested']}对，来自{len(industry_groups)}个子行业)"
-            )
+        self.log_statistics(statistics, len(industry_groups))
 
         return {
             'raw_pairs': all_cointegrated_pairs,
@@ -85,6 +93,158 @@ class CointegrationAnalyzer:
         }
 
 
+    def group_symbols(self, valid_symbols: List[Symbol]) -> Dict[str, List[Symbol]]:
+        """
+        分组入口(含过期滚动统计量清理)
+
+        流式流水线需要先拿到全部分组规模(估算剩余子行业最多能贡献的配对数),
+        再逐组调用 iter_group_pairs(),因此与检验步骤分开暴露。
+        """
+        # 清理长期未刷新的滚动统计量
+        self._cleanup_rolling_stats()
+
+        return self._group_by_industry_group(valid_symbols)
+
+
+    def iter_group_pairs(self, industry_groups: Dict[str, List[Symbol]], clean_data: Dict,
+                         analysis_time: datetime, statistics: Dict = None):
+        """
+        逐个子行业执行协整检验(生成器)
+
+        每完成一个子行业即产出该组结果,下游(质量评估/贝叶斯建模)无需等待全部子行业检验完成。
+
+        Args:
+            industry_groups: group_symbols()的输出
+            clean_data: 清洗后的价格数据
+            analysis_time: 分析快照时间(子行业缓存以此计年龄,不读取algorithm.Time)
+            statistics: 可选,new_statistics()创建的统计字典(原地累加)
+
+        Yields:
+            (ig_name, ig_pairs): 子行业名称和该组通过协整检验的配对列表
+        """
+        for ig_name, symbols in industry_groups.items():
+            # 成分未变化且缓存未过期的子行业复用上轮结果,否则重新检验
+            ig_pairs = self._get_cached_group_pairs(ig_name, symbols, clean_data, analysis_time)
+            reused = ig_pairs is not None
+            if not reused:
+                ig_pairs = self._analyze_industry_group(ig_name, symbols, clean_data)
+                self._store_group_cache(ig_name, symbols, clean_data, ig_pairs, analysis_time)
+
+            # 统计
+            if statistics is not None:
+                pairs_count = len(symbols) * (len(symbols) - 1) // 2
+                statistics['industry_group_breakdown'][ig_name] = {
+                    'symbols': len(symbols),
+                    'pairs_tested': 0 if reused else pairs_count,
+                    'pairs_found': len(ig_pairs),
+                    'reused': reused
+                }
+                if reused:
+                    statistics['groups_reused'] += 1
+                else:
+                    statistics['groups_recomputed'] += 1
+                    statistics['total_pairs_tested'] += pairs_count
+                statistics['cointegrated_pairs_found'] += len(ig_pairs)
+
+            yield ig_name, ig_pairs
+
+
+    def new_statistics(self) -> Dict:
+        """创建协整分析统计字典"""
+        return {
+            'total_pairs_tested': 0,
+            'cointegrated_pairs_found': 0,
+            'groups_recomputed': 0,
+            'groups_reused': 0,
+            'industry_group_breakdown': {}
+        }
+
+
+    def log_statistics(self, statistics: Dict, group_count: int):
+        """输出协整分析统计"""
+        if statistics['cointegrated_pairs_found'] > 0:
+            self.log.Debug(
+                f"[协整分析] 发现{statistics['cointegrated_pairs_found']}个协整对 "
+                f"(测试{statistics['total_pairs_tested']}对，来自{group_count}个子行业)"
+            )
+
+        if self.group_cache_max_age_days > 0:
+            reused_groups = [
+                ig_name for ig_name, breakdown in statistics['industry_group_breakdown'].items()
+                if breakdown['reused']
+            ]
+            self.log.Debug(
+                f"[协整分析] 子行业缓存: 重新计算{statistics['groups_recomputed']}个, "
+                f"复用{statistics['groups_reused']}个"
+                + (f" ({', '.join(reused_groups)})" if reused_groups else "")
+            )
+
+
+    # ===== 子行业结果缓存 =====
+
+    def _window_fingerprint(self, symbols: List[Symbol], clean_data: Dict) -> tuple:
+        """
+        子行业数据窗口指纹
+
+        由每只股票的窗口终点、末日收盘价和收盘价和组成:
+        同一窗口(如同日重复触发)指纹完全一致; 窗口滑动或数据修订都会改变指纹。
+        """
+        fingerprint = []
+        for symbol in symbols:
+            closes = clean_data[symbol]['close']
+            fingerprint.append((closes.index[-1], float(closes.iloc[-1]), float(closes.sum())))
+        return tuple(fingerprint)
+
+
+    def _get_cached_group_pairs(self, ig_name: str, symbols: List[Symbol], clean_data: Dict, analysis_time: datetime):
+        """
+        查询子行业缓存
+
+        复用条件:
+            - 成分股完全一致(成员变化必须重新检验)
+            - 窗口指纹一致(同一数据窗口,结果精确),或缓存年龄 <= group_cache_max_age_days
+
+        Returns:
+            配对列表副本(下游会原地写入评分字段); 不可复用时返回None
+        """
+        if self.group_cache_max_age_days <= 0:
+            return None
+
+        cached = self.group_cache.get(ig_name)
+        if cached is None or cached['members'] != tuple(symbols):
+            return None
+
+        try:
+            same_window = cached['fingerprint'] == self._window_fingerprint(symbols, clean_data)
+        except KeyError:
+            return None
+
+        age_days = (analysis_time - cached['time']).days
+        if not same_window and age_days > self.group_cache_max_age_days:
+            return None
+
+        return [dict(pair_info, group_reused=True) for pair_info in cached['pairs']]
+
+
+    def _store_group_cache(self, ig_name: str, symbols: List[Symbol], clean_data: Dict, ig_pairs: List[Dict],
+                           analysis_time: datetime):
+        """重新检验后写入子行业缓存"""
+        if self.group_cache_max_age_days <= 0:
+            return
+
+        try:
+            fingerprint = self._window_fingerprint(symbols, clean_data)
+        except KeyError:
+            return
+
+        self.group_cache[ig_name] = {
+            'members': tuple(symbols),
+            'fingerprint': fingerprint,
+            'pairs': [dict(pair_info) for pair_info in ig_pairs],
+            'time': analysis_time
+        }
+
+
     def _analyze_industry_group(self, ig_name: str, symbols: List[Symbol], clean_data: Dict) -> List[Dict]:
         """
         分析单个子行业内的协整关系
@@ -113,8 +273,11 @@ class CointegrationAnalyzer:
                     failed_tests.append((symbol1, symbol2, 'length_mismatch'))
                     continue
 
-                # Engle-Granger协整检验
-                score, pvalue, _ = coint(prices1, prices2)
+                # Engle-Granger协整检验(full: statsmodels全量, incremental: 滚动统计量)
+                pvalue = self._test_pair(symbol1, symbol2, prices1, prices2)
+                if pvalue is None:
+                    failed_tests.append((symbol1, symbol2, 'degenerate_data'))
+                    continue
 
                 # 检查p值阈值
                 if pvalue < self.pvalue_threshold:
@@ -135,9 +298,9 @@ class CointegrationAnalyzer:
                 failed_tests.append((symbol1, symbol2, 'unknown_error'))
 
         # 日志记录失败情况
-        if failed_tests and self.algorithm.debug_mode:
+        if failed_tests and self.debug_mode:
             sample_failures = [f'{s1.Value}&{s2.Value}({r})' for s1, s2, r in failed_tests[:3]]
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[协整分析] 子行业{ig_name}测试失败{len(failed_tests)}对: {', '.join(sample_failures)}"
                 + (f" 等" if len(failed_tests) > 3 else "")
             )
@@ -145,6 +308,88 @@ class CointegrationAnalyzer:
         return cointegrated_pairs
 
 
+    def _test_pair(self, symbol1: Symbol, symbol2: Symbol, prices1: pd.Series, prices2: pd.Series):
+        """
+        单个配对的协整检验
+
+        模式:
+            - full: statsmodels.coint(ADF自动滞后),每次全量计算O(252)
+            - incremental: 滚动充分统计量(DF检验,滞后0),只处理新增bar O(新增bar数)
+
+        滚动统计量在incremental模式下维护,日度复查(retest_pairs)直接在其上追加新bar
+        (daily_retest要求incremental模式,选择与复查为同一检验)。
+
+        Returns:
+            p值,数据退化时返回None
+        """
+        if self.refresh_mode == 'incremental':
+            pair_key = (symbol1, symbol2)
+            stats = self.rolling_stats.get(pair_key)
+            if stats is None:
+                stats = RollingPairStatistics(self.lookback_days, self.rebuild_interval)
+                self.rolling_stats[pair_key] = stats
+            # coint(prices1, prices2): symbol1为因变量y, symbol2为自变量x
+            stats.sync(prices1.index, prices2.values, prices1.values)
+            return stats.engle_granger_pvalue()
+
+        _, pvalue, _ = coint(prices1, prices2)
+        return pvalue
+
+
+    def retest_pairs(self, pair_bars: Dict[tuple, tuple]) -> Dict[tuple, float]:
+        """
+        日度复查: 在滚动统计量上追加当日bar并重新计算p值(O(1)/配对)
+
+        用于在两次月度分析之间及时发现失去协整性的配对。
+        只复查已有滚动统计量的配对(由月度分析建立),其余配对跳过。
+
+        Args:
+            pair_bars: {(symbol1, symbol2): (time, price1, price2)}
+
+        Returns:
+            {(symbol1, symbol2): pvalue} 成功复查的配对p值
+        """
+        pvalues = {}
+        for pair_key, (time, price1, price2) in pair_bars.items():
+            stats = self.rolling_stats.get(pair_key)
+            if stats is None:
+                continue
+
+            # 同一bar不重复追加(如同日多次调用)
+            if stats.last_time is not None and time <= stats.last_time:
+                continue
+
+            stats.push(time, float(price2), float(price1))
+            pvalue = stats.engle_granger_pvalue()
+            if pvalue is not None:
+                pvalues[pair_key] = pvalue
+
+        return pvalues
+
+
+    def _cleanup_rolling_stats(self):
+        """
+        清理长期未刷新的滚动统计量，避免内存无限增长
+        清理规则：最后一个bar早于 rolling_stats_expiry_days 天(已无法与新窗口衔接,保留无意义)
+        """
+        if not self.rolling_stats:
+            return
+
+        current_time = self.algorithm.Time
+        expired_keys = [
+            pair_key for pair_key, stats in self.rolling_stats.items()
+            if stats.last_time is None or (current_time - stats.last_time).days > self.stats_expiry_days
+        ]
+
+        for pair_key in expired_keys:
+            del self.rolling_stats[pair_key]
+
+        if expired_keys:
+            self.log.Debug(
+                f"[协整分析] 清理了{len(expired_keys)}个过期的滚动统计量"
+            )
+
+
     def _group_by_industry_group(self, symbols: List[Symbol]) -> Dict[str, List[Symbol]]:
         """
         按26个子行业分组，每个子行业选TOP stocks
@@ -194,9 +439,9 @@ class CointegrationAnalyzer:
                 failed_symbols.append((symbol, 'unknown_error'))
 
         # 日志记录失败情况
-        if failed_symbols and self.algorithm.debug_mode:
+        if failed_symbols and self.debug_mode:
             sample_failures = [f'{s.Value}({r})' for s, r in failed_symbols[:5]]
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[协整分析] 分组失败{len(failed_symbols)}只: {', '.join(sample_failures)}"
                 + (f" 等" if len(failed_symbols) > 5 else "")
             )
@@ -226,14 +471,14 @@ class CointegrationAnalyzer:
 
             # 日志（使用可读行业名称）
             industry_display = get_industry_display(int(ig_code), show_code=True)
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[协整分析] {industry_display}: 候选{len(stocks_list)}只 → 选中{len(top_stocks)}只"
             )
 
         # 日志：跳过的子行业（使用可读行业名称）
         if skipped_groups:
             skipped_info = [f"{get_industry_display(int(ig), show_code=False)}({count}只)" for ig, count in skipped_groups]
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[协整分析] 跳过{len(skipped_groups)}个子行业(股票数<{self.min_stocks_per_group}): {', '.join(skipped_info)}"
             )
 
@@ -22,6 +22,13 @@ class DataProcessor:
         self.lookback_days = shared_config['lookback_days']
         self.data_completeness_ratio = module_config['data_completeness_ratio']
 
+        # 预取缓存(提前下载下一轮分析的历史数据,触发时只读缓存)
+        self.prefetch_enabled = module_config['prefetch']['enabled']
+        self.price_cache = {}           # {Symbol: 清洗后的DataFrame}
+        self.cache_window_end = None    # 缓存数据窗口终点(最后一个bar时间)
+        self.cache_hits = 0             # 累计命中
+        self.cache_misses = 0           # 累计未命中
+
 
     def process(self, symbols: List[Symbol]) -> Dict:
         """
@@ -31,27 +38,123 @@ class DataProcessor:
         # 使用defaultdict简化统计
         statistics = defaultdict(int, total=len(symbols))
 
+        # 预取缓存命中的股票直接使用,其余股票下载
+        cached_data = self._get_cached_data(symbols)
+        missing_symbols = [symbol for symbol in symbols if symbol not in cached_data]
+
         # 下载历史OHLCV数据
-        historical_ohlcv_data = self._download_historical_data(symbols)
-        if historical_ohlcv_data is None:
-            return {'clean_data': {}, 'valid_symbols': [], 'statistics': dict(statistics)}
+        historical_ohlcv_data = None
+        if missing_symbols:
+            historical_ohlcv_data = self._download_historical_data(missing_symbols)
+            if historical_ohlcv_data is None and not cached_data:
+                return {'clean_data': {}, 'valid_symbols': [], 'statistics': dict(statistics)}
 
         cleaned_data_dict = {}
         validated_symbols = []
 
         # 验证并清洗每个股票的OHLCV数据
         for symbol in symbols:
-            processed_ohlcv = self._process_symbol(symbol, historical_ohlcv_data, statistics)
+            if symbol in cached_data:
+                processed_ohlcv = cached_data[symbol]
+            elif historical_ohlcv_data is not None:
+                processed_ohlcv = self._process_symbol(symbol, historical_ohlcv_data, statistics)
+            else:
+                statistics['data_missing'] += 1
+                continue
+
             if processed_ohlcv is not None:
                 cleaned_data_dict[symbol] = processed_ohlcv
                 validated_symbols.append(symbol)
 
         statistics['final_valid'] = len(validated_symbols)
+        if self.prefetch_enabled:
+            statistics['cache_hits'] = len(cached_data)
+            statistics['cache_misses'] = len(missing_symbols)
+            self._log_cache_statistics(len(cached_data), len(missing_symbols))
         self._log_statistics(dict(statistics))
 
         return {'clean_data': cleaned_data_dict, 'valid_symbols': validated_symbols, 'statistics': dict(statistics)}
 
 
+    # ===== 预取缓存 =====
+
+    def prefetch(self, symbols: List[Symbol]):
+        """
+        预取下一轮分析的历史数据(调度在选股触发之前执行)
+
+        下载并验证预期股票池的历史数据,写入price_cache(整体替换旧缓存)。
+        只缓存通过验证的股票; 未通过验证的股票在正式分析时按未命中处理。
+        """
+        if not symbols:
+            return
+
+        historical_ohlcv_data = self._download_historical_data(symbols)
+        if historical_ohlcv_data is None:
+            return
+
+        statistics = defaultdict(int)
+        price_cache = {}
+        for symbol in symbols:
+            processed_ohlcv = self._process_symbol(symbol, historical_ohlcv_data, statistics)
+            if processed_ohlcv is not None:
+                price_cache[symbol] = processed_ohlcv
+
+        self.price_cache = price_cache
+        self.cache_window_end = max((df.index[-1] for df in price_cache.values()), default=None)
+
+        self.algorithm.Debug(
+            f"[DataProcessor] 预取完成: {len(price_cache)}/{len(symbols)}只股票 (窗口终点{self.cache_window_end})"
+        )
+
+
+    def _get_cached_data(self, symbols: List[Symbol]) -> Dict:
+        """
+        查询预取缓存
+
+        有效性: 缓存窗口终点 == 当前最新日线bar时间(预取之后没有新bar完成);
+        否则整个缓存作废(窗口已滑动,与直接下载的数据不一致)。
+
+        Returns:
+            {Symbol: DataFrame} 命中的股票
+        """
+        if not self.price_cache:
+            return {}
+
+        current_window_end = self._get_current_window_end()
+        if current_window_end is None or current_window_end != self.cache_window_end:
+            self.algorithm.Debug(
+                f"[DataProcessor] 预取缓存过期(缓存窗口终点{self.cache_window_end}, 当前{current_window_end}),已清空"
+            )
+            self.price_cache = {}
+            self.cache_window_end = None
+            return {}
+
+        return {symbol: self.price_cache[symbol] for symbol in symbols if symbol in self.price_cache}
+
+
+    def _get_current_window_end(self):
+        """当前最新日线bar时间(以市场基准SPY为准,单只股票1根bar,开销可忽略)"""
+        try:
+            history = self.algorithm.History(self.algorithm.market_benchmark, 1, Resolution.Daily)
+            if history.empty:
+                return None
+            return history.index.get_level_values(-1)[-1]
+        except Exception:
+            return None
+
+
+    def _log_cache_statistics(self, hits: int, misses: int):
+        """输出预取命中统计(本轮 + 累计),用于调整预取提前量"""
+        self.cache_hits += hits
+        self.cache_misses += misses
+        total = self.cache_hits + self.cache_misses
+        hit_rate = self.cache_hits / total if total > 0 else 0.0
+        self.algorithm.Debug(
+            f"[DataProcessor] 预取缓存: 本轮命中{hits}只, 未命中{misses}只 "
+            f"(累计命中率{hit_rate:.1%})"
+        )
+
+
     def _process_symbol(self, symbol: Symbol, historical_ohlcv_data, statistics: dict):
         """
         处理单个股票的OHLCV数据
@@ -6,7 +6,7 @@ from typing import Dict
 # endregion
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PairData:
     """
     配对价格数据值对象
@@ -38,6 +38,7 @@ class PairData:
 
     设计理念:
         - 不可变性: frozen=True 防止意外修改
+        - 紧凑存储: slots=True 无实例__dict__(每轮分析为所有候选配对创建)
         - 类型安全: 明确区分 prices 和 log_prices
         - 单一职责: 仅负责数据存储，不包含业务逻辑
     """
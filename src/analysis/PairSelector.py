@@ -21,6 +21,7 @@ class PairSelector:
             module_config: 模块配置(pair_selector)
         """
         self.algorithm = algorithm
+        self.log = algorithm.analysis_log
 
         # 从shared_config读取
         self.lookback_days = shared_config['lookback_days']  # 252天,与BayesianModeler统一
@@ -129,7 +130,7 @@ class PairSelector:
             status = "PASS" if quality_score > self.min_quality_threshold else "FAIL"
             half_life_str = f"{half_life_days:.1f}" if half_life_days is not None else "N/A"
             vol_ratio_str = f"{raw_vol_ratio:.3f}" if raw_vol_ratio is not None else "N/A"
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[PairScore] ({symbol1.Value:4s}, {symbol2.Value:4s}): "  # 使用.Value提取ticker字符串
                 f"Q={quality_score:.3f} [{status}] | "
                 f"Stat={pvalue_score:.3f}(p={pair_info['pvalue']:.4f}) | "
@@ -169,7 +170,7 @@ class PairSelector:
         # 诊断日志：记录淘汰的配对数量
         rejected_count = len(scored_pairs) - len(qualified_pairs)
         if rejected_count > 0:
-            self.algorithm.Debug(
+            self.log.Debug(
                 f"[PairSelector] 质量阈值过滤: {rejected_count}个配对 <= {min_threshold:.2f}分"
             )
 
@@ -199,6 +200,32 @@ class PairSelector:
         return selected
 
 
+    def group_capacity(self, symbol_count: int) -> int:
+        """
+        单个子行业最多能贡献的入选配对数(流式筛选的上界估计)
+
+        子行业互不相交,单股重复限制只在组内生效:
+        - 组合数上限: C(n, 2)
+        - 单股重复上限: 每只股票最多max_symbol_repeats个配对,每个配对占用2个名额 → n*max_symbol_repeats/2
+        - 总数上限: max_pairs
+        """
+        return min(
+            symbol_count * (symbol_count - 1) // 2,
+            symbol_count * self.max_symbol_repeats // 2,
+            self.max_pairs
+        )
+
+
+    def start_streaming(self, remaining_capacity: int) -> 'StreamingSelection':
+        """
+        创建流式筛选状态(pipeline_mode='streaming'使用)
+
+        Args:
+            remaining_capacity: 全部子行业group_capacity()之和
+        """
+        return StreamingSelection(self.max_pairs, remaining_capacity)
+
+
     def _linear_interpolate(self, value, min_val, max_val, min_score=0.0, max_score=1.0):
         """
         线性插值计算分数
@@ -278,7 +305,7 @@ class PairSelector:
                 return (0, None)
 
         except Exception as e:
-            self.algorithm.Debug(f"[PairSelector] 半衰期计算失败: {e}")
+            self.log.Debug(f"[PairSelector] 半衰期计算失败: {e}")
             return (0, None)  # 异常返回0分
 
 
@@ -335,5 +362,73 @@ class PairSelector:
             return (volatility_score, variance_ratio)
 
         except Exception as e:
-            self.algorithm.Debug(f"[PairSelector] Variance ratio计算失败: {e}")
-            return (0, None)
\ No newline at end of file
+            self.log.Debug(f"[PairSelector] Variance ratio计算失败: {e}")
+            return (0, None)
+
+
+class StreamingSelection:
+    """
+    流式配对筛选状态 - 逐子行业合并,维护有界的"当前最优"集合
+
+    等价性:
+        子行业互不相交,select_best()的单股重复限制只受同组更高分配对影响,
+        因此全局结果 = 各组组内筛选结果按质量合并后取前max_pairs个。
+
+    确定入选:
+        候选排名(已见配对中) + 剩余子行业最多贡献的配对数 < max_pairs
+        → 无论后续子行业结果如何,该候选必然进入最终结果,可立即建模。
+    """
+
+    def __init__(self, max_pairs: int, remaining_capacity: int):
+        """
+        Args:
+            max_pairs: 最大配对数
+            remaining_capacity: 尚未处理的子行业最多能贡献的配对数
+        """
+        self.max_pairs = max_pairs
+        self.remaining_capacity = remaining_capacity
+
+        self.best = []          # 当前最优集合(按质量降序,长度<=max_pairs)
+        self.emitted = set()    # 已确定入选(已交给建模)的pair_key
+        self._sequence = 0      # 同分时保持到达顺序(与select_best的稳定排序一致)
+
+
+    def add_group(self, group_selected: list, group_capacity: int):
+        """
+        合并一个子行业的组内筛选结果
+
+        Args:
+            group_selected: PairSelector.select_best()对该组的输出
+            group_capacity: 该组的group_capacity()(从剩余上界中扣除)
+
+        Returns:
+            (certain, dropped): 新确定入选的配对列表, 被挤出最优集合的配对列表
+        """
+        self.remaining_capacity -= group_capacity
+
+        for pair in group_selected:
+            self.best.append((-pair['quality_score'], self._sequence, pair))
+            self._sequence += 1
+        self.best.sort(key=lambda item: (item[0], item[1]))
+
+        dropped = [item[2] for item in self.best[self.max_pairs:]]
+        del self.best[self.max_pairs:]
+
+        certain_count = max(0, self.max_pairs - self.remaining_capacity)
+        return self._emit(self.best[:certain_count]), dropped
+
+
+    def finish(self) -> list:
+        """全部子行业处理完毕: 最优集合中尚未建模的配对全部确定入选"""
+        return self._emit(self.best)
+
+
+    def _emit(self, items: list) -> list:
+        """返回尚未交给建模的配对并标记为已确定"""
+        certain = []
+        for _, _, pair in items:
+            pair_key = (pair['symbol1'], pair['symbol2'])
+            if pair_key not in self.emitted:
+                self.emitted.add(pair_key)
+                certain.append(pair)
+        return certain
@@ -0,0 +1,225 @@
+# region imports
+from AlgorithmImports import *
+import numpy as np
+from collections import deque
+from typing import Optional
+from statsmodels.tsa.adfvalues import mackinnonp
+# endregion
+
+
+class RollingPairStatistics:
+    """
+    单个配对的滚动充分统计量(Engle-Granger两步法的增量版本)
+
+    维护两组交叉乘积和,窗口滑动时只对新增/过期的bar做加减:
+        - 水平回归 y = a + b*x:     [n, Σx, Σy, Σx², Σxy, Σy²]
+        - ADF回归 Δe_t = γ*e_{t-1}: 以(x_{t-1}, y_{t-1}, Δx_t, Δy_t)的交叉乘积表示,
+          残差 e = y - a - b*x 随(a, b)变化,但其平方和/交叉和可由这些乘积和展开得到
+
+    与statsmodels.coint的关系:
+        - coint(y, x)对残差做ADF检验(regression='n', autolag='AIC')
+        - 本类使用固定滞后0(即DF检验),p值同样来自MacKinnon近似(regression='c', N=2)
+        - 滞后0时与 coint(y, x, maxlag=0, autolag=None) 结果一致
+
+    复杂度:
+        - 首次建立: O(window)
+        - 后续刷新: O(新增bar数),与窗口长度无关
+
+    数值稳定性:
+        - 加减法累积会产生浮点漂移,每 rebuild_interval 次增量更新后全量重建一次
+    """
+
+    def __init__(self, window_size: int, rebuild_interval: int):
+        """
+        Args:
+            window_size: 滚动窗口长度(bar数,与lookback_days一致)
+            rebuild_interval: 增量更新多少次后全量重建(抑制浮点漂移)
+        """
+        self.window_size = window_size
+        self.rebuild_interval = rebuild_interval
+
+        # 窗口原始数据(过期bar出队时需要其数值来扣减统计量)
+        self.times = deque()
+        self.xs = deque()
+        self.ys = deque()
+
+        # 充分统计量
+        self.level_sums = np.zeros(6)      # [n, Σx, Σy, Σxx, Σxy, Σyy]
+        self.adf_sums = np.zeros(15)       # 见 _adf_terms()
+
+        # 维护信息
+        self.updates_since_rebuild = 0
+        self.last_time = None
+
+
+    # ===== 统计量维护 =====
+
+    @staticmethod
+    def _level_terms(x: float, y: float) -> np.ndarray:
+        """单个bar对水平回归的贡献"""
+        return np.array([1.0, x, y, x * x, x * y, y * y])
+
+
+    @staticmethod
+    def _adf_terms(x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """相邻两个bar(t-1, t)对ADF回归的贡献"""
+        dx = x1 - x0
+        dy = y1 - y0
+        return np.array([
+            1.0, x0, y0, x0 * x0, x0 * y0, y0 * y0,     # 滞后项
+            dx, dy, dx * dx, dx * dy, dy * dy,          # 差分项
+            x0 * dx, x0 * dy, y0 * dx, y0 * dy          # 滞后×差分
+        ])
+
+
+    def rebuild(self, times, xs, ys):
+        """
+        全量重建(向量化,O(window))
+
+        Args:
+            times: 时间序列(与xs/ys等长)
+            xs: 自变量价格序列(symbol2)
+            ys: 因变量价格序列(symbol1)
+        """
+        x = np.asarray(xs, dtype=float)[-self.window_size:]
+        y = np.asarray(ys, dtype=float)[-self.window_size:]
+        t = list(times)[-self.window_size:]
+
+        self.times = deque(t)
+        self.xs = deque(x.tolist())
+        self.ys = deque(y.tolist())
+
+        self.level_sums = np.array([
+            len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), (y * y).sum()
+        ], dtype=float)
+
+        x0, y0 = x[:-1], y[:-1]
+        dx, dy = np.diff(x), np.diff(y)
+        self.adf_sums = np.array([
+            len(dx), x0.sum(), y0.sum(), (x0 * x0).sum(), (x0 * y0).sum(), (y0 * y0).sum(),
+            dx.sum(), dy.sum(), (dx * dx).sum(), (dx * dy).sum(), (dy * dy).sum(),
+            (x0 * dx).sum(), (x0 * dy).sum(), (y0 * dx).sum(), (y0 * dy).sum()
+        ], dtype=float)
+
+        self.updates_since_rebuild = 0
+        self.last_time = t[-1] if t else None
+
+
+    def push(self, time, x: float, y: float):
+        """
+        追加一个新bar,窗口已满时移除最旧的bar(O(1))
+
+        Args:
+            time: bar时间
+            x: symbol2价格
+            y: symbol1价格
+        """
+        if self.xs:
+            self.adf_sums += self._adf_terms(self.xs[-1], self.ys[-1], x, y)
+        self.level_sums += self._level_terms(x, y)
+        self.times.append(time)
+        self.xs.append(x)
+        self.ys.append(y)
+
+        if len(self.xs) > self.window_size:
+            old_x = self.xs.popleft()
+            old_y = self.ys.popleft()
+            self.times.popleft()
+            self.level_sums -= self._level_terms(old_x, old_y)
+            self.adf_sums -= self._adf_terms(old_x, old_y, self.xs[0], self.ys[0])
+
+        self.updates_since_rebuild += 1
+        self.last_time = time
+
+        # 定期全量重建,消除累积的浮点误差
+        if self.updates_since_rebuild >= self.rebuild_interval:
+            self.rebuild(self.times, self.xs, self.ys)
+
+
+    def sync(self, times, xs, ys) -> int:
+        """
+        与最新窗口数据对齐(月度刷新使用)
+
+        只追加 last_time 之后的新bar;如果状态与新窗口无法衔接
+        (首次出现、间隔过久、数据修订导致起点不一致),则全量重建。
+
+        Args:
+            times: 最新窗口的时间索引(pandas.DatetimeIndex,升序)
+            xs: symbol2价格序列
+            ys: symbol1价格序列
+
+        Returns:
+            int: 增量处理的bar数; 全量重建时返回-1
+        """
+        if self.last_time is None:
+            self.rebuild(times, xs, ys)
+            return -1
+
+        # 定位上次处理到的位置
+        position = times.searchsorted(self.last_time, side='right')
+        if position == 0 or times[position - 1] != self.last_time:
+            self.rebuild(times, xs, ys)
+            return -1
+
+        new_count = len(times) - position
+        for i in range(position, len(times)):
+            self.push(times[i], float(xs[i]), float(ys[i]))
+
+        # 衔接校验: 窗口起点必须与新数据一致
+        if len(self.xs) != min(len(times), self.window_size) or self.times[0] != times[-len(self.xs)]:
+            self.rebuild(times, xs, ys)
+            return -1
+
+        return new_count
+
+
+    # ===== 检验 =====
+
+    def engle_granger_pvalue(self) -> Optional[float]:
+        """
+        由充分统计量计算Engle-Granger检验p值
+
+        计算步骤:
+            1. 水平回归OLS: b = Sxy_c / Sxx_c, a = ȳ - b*x̄
+            2. 展开残差交叉和: S_ee = Σe²_{t-1}, S_ed = Σe_{t-1}Δe_t, S_dd = ΣΔe²_t
+            3. DF回归: γ = S_ed / S_ee, t = γ / se(γ)
+            4. MacKinnon近似p值(常数项, 2个变量)
+
+        Returns:
+            p值,数据退化(方差为0、样本不足)时返回None
+        """
+        n, sx, sy, sxx, sxy, syy = self.level_sums
+        if n < 3:
+            return None
+
+        # 1. 水平回归
+        var_x = n * sxx - sx * sx
+        if var_x <= 0:
+            return None
+        b = (n * sxy - sx * sy) / var_x
+        a = (sy - b * sx) / n
+
+        # 2. 残差交叉和(滞后残差 e_{t-1} = y0 - a - b*x0, 差分残差 Δe = dy - b*dx)
+        (m, lx, ly, lxx, lxy, lyy,
+         dx, dy, dxdx, dxdy, dydy,
+         lx_dx, lx_dy, ly_dx, ly_dy) = self.adf_sums
+
+        s_ee = (lyy + m * a * a + b * b * lxx
+                - 2 * a * ly - 2 * b * lxy + 2 * a * b * lx)
+        s_ed = (ly_dy - b * ly_dx - a * dy + a * b * dx
+                - b * lx_dy + b * b * lx_dx)
+        s_dd = dydy - 2 * b * dxdy + b * b * dxdx
+
+        if s_ee <= 0 or m < 2:
+            return None
+
+        # 3. DF回归(无常数项)
+        gamma = s_ed / s_ee
+        ssr = s_dd - gamma * s_ed
+        if ssr <= 0:
+            return None
+        se = np.sqrt(ssr / (m - 1) / s_ee)
+        t_stat = gamma / se
+
+        # 4. MacKinnon p值
+        return float(mackinnonp(t_stat, regression='c', N=2))
@@ -0,0 +1,134 @@
+# region imports
+from AlgorithmImports import *
+import time
+from datetime import datetime
+from src.analysis.PairData import PairData
+# endregion
+
+
+class StaggeredRemodelScheduler:
+    """
+    分摊建模调度器 - 把月初集中的MCMC建模分散到之后的交易日
+
+    月初分析时,有有效历史后验的配对先沿用历史后验(BayesianModeler.deferred_pairs),
+    之后每个交易日在CPU预算内重新建模一部分:
+        - 排序: 后验年龄(最旧优先) → 质量分数(高分优先)
+        - 数据: 当日候选配对的股票一次 data_processor.process() 下载
+          (候选数按前几日单配对平均建模耗时估计预算内可处理的数量)
+        - 预算: 单个配对开始前检查已用时间,超出 daily_budget_seconds 则顺延到下一交易日
+
+    持仓冻结不变式:
+        - 有持仓的配对不重新建模(保留在队列中,平仓后再处理)
+        - 新参数通过 Pairs.update_model_params() 应用,有持仓时该方法本身也会拒绝更新
+          (定期重新建模不计为重新激活,reactivation_count不变)
+    """
+
+    def __init__(self, algorithm, bayesian_modeler, data_processor, pairs_manager, module_config: dict):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            bayesian_modeler: BayesianModeler实例(持有待建模队列和历史后验)
+            data_processor: DataProcessor实例(下载配对最新窗口数据)
+            pairs_manager: PairsManager实例
+            module_config: 分摊建模配置(bayesian_modeler['staggered_remodel'])
+        """
+        self.algorithm = algorithm
+        self.bayesian_modeler = bayesian_modeler
+        self.data_processor = data_processor
+        self.pairs_manager = pairs_manager
+        self.daily_budget_seconds = module_config['daily_budget_seconds']
+
+        # 单配对平均建模耗时(秒),用于估计每日候选数; None=尚无测量,取全部候选
+        self._seconds_per_pair = None
+
+
+    def run_daily(self):
+        """每日调度入口: 在预算内重新建模待处理配对"""
+        deferred_pairs = self.bayesian_modeler.deferred_pairs
+        if not deferred_pairs:
+            return
+
+        start = time.perf_counter()
+        remodeled, frozen, dropped = 0, 0, 0
+
+        # 1. 筛选候选(按队列顺序)
+        candidates = []
+        for pair_key, pair_info in self._ordered_queue():
+            symbol1, symbol2 = pair_key
+            pair_id = (symbol1.Value, symbol2.Value)
+            pair = self.pairs_manager.get_pair_by_id(pair_id)
+
+            # 已不再可交易(如日度复查降级) → 无需重新建模
+            if pair is None or pair_id not in self.pairs_manager.tradeable_ids:
+                deferred_pairs.pop(pair_key, None)
+                dropped += 1
+                continue
+
+            # 有持仓: 参数冻结,保留在队列中
+            if pair.has_position():
+                frozen += 1
+                continue
+
+            candidates.append((pair_key, pair_info, pair))
+
+        candidates = candidates[:self._daily_capacity(len(candidates))]
+
+        # 2. 一次下载当日候选的全部股票
+        clean_data = {}
+        if candidates:
+            symbols = list(dict.fromkeys(symbol for pair_key, _, _ in candidates for symbol in pair_key))
+            clean_data = self.data_processor.process(symbols)['clean_data']
+
+        # 3. 预算内逐个建模
+        model_start = time.perf_counter()
+        attempted = 0
+        for pair_key, pair_info, pair in candidates:
+            if time.perf_counter() - start >= self.daily_budget_seconds:
+                break
+
+            deferred_pairs.pop(pair_key, None)
+
+            symbol1, symbol2 = pair_key
+            if symbol1 not in clean_data or symbol2 not in clean_data:
+                dropped += 1
+                continue
+
+            attempted += 1
+            result = self.bayesian_modeler.remodel_pair(
+                pair_info, PairData.from_clean_data(pair_info, clean_data), self.algorithm.Time
+            )
+            if result is None:
+                dropped += 1
+                continue
+
+            pair.update_model_params(result)
+            remodeled += 1
+
+        if attempted:
+            self._seconds_per_pair = (time.perf_counter() - model_start) / attempted
+
+        elapsed = time.perf_counter() - start
+        self.algorithm.Debug(
+            f"[分摊建模] 重新建模{remodeled}对, 持仓冻结{frozen}对, 放弃{dropped}对, "
+            f"剩余{len(deferred_pairs)}对 (耗时{elapsed:.1f}s/预算{self.daily_budget_seconds}s)"
+        )
+
+
+    def _daily_capacity(self, candidate_count: int) -> int:
+        """预算内预计可处理的配对数(预算检查在配对开始前,故+1)"""
+        if not self._seconds_per_pair:
+            return candidate_count
+        return min(candidate_count, int(self.daily_budget_seconds / self._seconds_per_pair) + 1)
+
+
+    def _ordered_queue(self) -> list:
+        """待建模队列排序: 后验年龄最旧优先,同龄质量分数高优先"""
+        posteriors = self.bayesian_modeler.historical_posteriors
+
+        def sort_key(item):
+            pair_key, pair_info = item
+            posterior = posteriors.get(pair_key)
+            update_time = posterior['update_time'] if posterior else datetime.min
+            return (update_time, -pair_info['quality_score'])
+
+        return sorted(self.bayesian_modeler.deferred_pairs.items(), key=sort_key)
@@ -78,11 +78,22 @@ class StrategyConfig:
         # 共享参数(所有分析模块使用)
         self.analysis_shared = {
             'lookback_days': 252,                       # 历史数据回看天数(统一)
+            'pipeline_mode': 'staged',                  # 'staged'=逐阶段全量执行, 'streaming'=逐子行业流式执行(确定入选即开始建模)
+            'background_analysis': False,               # True=后台线程分析(分析期间照常交易,结果在下一bar生效; 回测中生效时点非确定)
+            'trigger_coalesce': False,                  # True=合并OnSecuritiesChanged触发,窗口结束后按净股票集合分析一次
+            'trigger_window_minutes': 0,                # 合并窗口(分钟),0=下一个bar
+            'group_cache_max_age_days': 0,              # 子行业结果缓存有效期(天): 成分未变且未过期则复用协整/建模结果; 0=禁用
         }
 
         # 1. 数据处理模块
         self.data_processor = {
             'data_completeness_ratio': 1.0,             # 数据完整性要求(1.0=100%,恰好252天,无NaN)
+
+            # 历史数据预取(选股触发前下载当前股票池数据,分析时命中则只读缓存)
+            'prefetch': {
+                'enabled': False,
+                'schedule_time': (16, 30),              # 预取时间(与选股同一日期规则,收盘后、选股执行前)
+            },
         }
 
         # 2. 协整分析模块
@@ -93,6 +104,12 @@ class StrategyConfig:
             # 子行业分组
             'min_stocks_per_group': 3,                  # 子行业最少股票数(不足则跳过)
             'max_stocks_per_group': 20,                 # 子行业最多股票数(按市值选TOP)
+
+            # 滚动刷新(窗口重叠>90%,复用上轮交叉乘积和)
+            'refresh_mode': 'full',                     # 'full'=statsmodels全量(ADF自动滞后), 'incremental'=滚动充分统计量(DF检验,滞后0)
+            'daily_retest': False,                      # 每日复查协整配对,失去协整性则降级(LEGACY/ARCHIVED); 需要refresh_mode='incremental'
+            'rolling_rebuild_interval': 63,             # 增量更新多少次后全量重建(抑制浮点漂移)
+            'rolling_stats_expiry_days': 365,           # 滚动统计量过期天数(超过则无法与新窗口衔接)
         }
 
         # 3. 配对质量评估模块
@@ -127,6 +144,13 @@ class StrategyConfig:
             'mcmc_posterior_samples': 500,              # 后验样本数
             'mcmc_chains': 2,                           # MCMC链数
 
+            # 分摊建模(月初只对无有效历史后验的配对做MCMC,其余配对沿用历史后验并逐日重新建模)
+            'staggered_remodel': {
+                'enabled': False,
+                'schedule_time': (9, 20),               # 每日重新建模时间
+                'daily_budget_seconds': 60,             # 每日CPU预算(秒),超出后剩余配对顺延到下一交易日
+            },
+
             # 先验配置
             'bayesian_priors': {
                 'uninformed': {                         # 完全无信息先验(降级方案,OLS失败时使用)
@@ -159,7 +183,45 @@ class StrategyConfig:
             # 保证金管理 (美股规则)
             'margin_requirement_long': 0.5,         # 多头保证金率: 50%
             'margin_requirement_short': 1.5,        # 空头保证金率: 150% (100%借券+50%保证金)
-            'margin_usage_ratio': 0.98              # 保证金使用率: 98% (保留2%动态缓冲)
+            'margin_usage_ratio': 0.98,             # 保证金使用率: 98% (保留2%动态缓冲)
+
+            # 信号计算
+            'vectorized_signals': True,             # True=PairBook每bar向量化计算全部配对Z-score/信号, False=逐配对标量计算
+            'bar_snapshot': True,                   # True=OnData开头一次性读取可交易股票收盘价,持仓价格按需读取(BarSnapshot), False=逐次查询Slice/Portfolio
+
+            # 稀疏更新(分钟级/混合频率数据)
+            'sparse_updates': False,                # True=只评估至少一条腿出现在当前Slice中的配对(股票→配对反向索引)
+            'full_sweep_bars': 390,                 # 稀疏更新时每N个bar全量评估一次(安全网,390=一个交易日的分钟bar)
+
+            # 归档配对压缩
+            'archive_compaction': {
+                'enabled': False,                   # True=ARCHIVED配对移出all_pairs,只保留压缩记录(重新出现时恢复)
+                'max_age_days': 365,                # 压缩记录保留天数(超过后淘汰,冷却期内的记录除外)
+                'max_records': 5000                 # 压缩记录数量上限(超出时淘汰最早归档的记录)
+            },
+
+            # 订单提交
+            'order_submission': {
+                'mode': 'sequential'                # 'sequential'=逐腿同步提交, 'async'=两腿异步同时提交, 'combo'=组合订单(券商不支持时回退async); 实测成交偏差见order_latency
+            },
+            'intent_queue': {
+                'enabled': False,                   # True=订单意图按优先级入队(Portfolio风控>Pair风控>平仓>开仓),令牌桶限速提交
+                'rate_per_second': 1.0,             # 令牌补充速率(每秒订单数,按algorithm时间)
+                'burst': 20,                        # 令牌桶容量(单次最多连续提交的订单数)
+                'open_ttl_seconds': 86400           # 开仓意图最长排队时间(秒),超过则丢弃
+            },
+            'order_netting': False,                 # True=同一bar内各配对订单按股票净额,每只股票一个订单(成交按腿分摊回配对)
+
+            # 订单追踪
+            'fill_history_depth': 200,              # TicketsManager保留的已完成订单记录条数(双腿成交后票据移出活动表)
+            'order_latency': {
+                'enabled': False,                   # True=统计订单往返延迟(提交→首腿成交、腿间偏差、提交→完成),回测结束输出JSON汇总
+                'csv_key': None                     # ObjectStore键(如 'order_latency.csv'),非None时保存逐订单明细
+            },
+
+            # 调试
+            'verify_position_indexes': False,       # True=每次查询持仓配对时与全量重扫比较(PairsManager物化索引一致性检查)
+            'verify_order_states': False            # True=每个订单事件后用OrderTicket.Status校验TicketsManager存储的配对状态
         }
 
 
@@ -168,6 +230,8 @@ class StrategyConfig:
         self.risk_management = {
             # 全局开关
             'enabled': True,  # False则完全禁用风控系统
+            'vectorized_pair_rules': True,  # True=PairRiskBatch一次计算全部持仓配对的Pair规则(结果与逐配对检查一致)
+            'cooldown_registry': True,      # True=Pair规则冷却与普通交易冷却登记到CooldownRegistry(到期堆+per-pair字典,惰性清理)
 
             # ========== 市场条件检查 ==========
             'market_condition': {
@@ -176,7 +240,8 @@ class StrategyConfig:
                 'vix_resolution': Resolution.Daily,     # VIX数据分辨率
                 'vix_threshold': 30,                    # VIX恐慌阈值（前瞻性指标）
                 'spy_volatility_threshold': 0.25,       # SPY年化波动率阈值（25%）
-                'spy_volatility_window': 20             # 滚动窗口天数（行业标准）
+                'spy_volatility_window': 20,            # 滚动窗口天数（行业标准）
+                'incremental': True                     # True=由OnData的SPY/VIX bar维护滚动指标(仅启动时History预热一次), False=每次检查调用History
             },
 
             # ========== Portfolio层面规则 ==========
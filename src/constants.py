@@ -7,6 +7,7 @@
     - TradingSignal: 交易信号常量
     - PositionMode: 持仓模式常量
     - OrderAction: 订单动作常量
+    - IntentPriority: 订单意图队列优先级
 
 设计原则:
     - 单一职责: 只定义常量,不包含任何业务逻辑
@@ -41,3 +42,11 @@ class OrderAction:
     """订单动作常量"""
     OPEN = 'OPEN'
     CLOSE = 'CLOSE'
+
+
+class IntentPriority:
+    """订单意图队列优先级(数值越小越先提交)"""
+    PORTFOLIO_RISK = 0               # Portfolio风控清仓(含冷却期残留清理)
+    PAIR_RISK = 1                    # Pair风控平仓
+    NORMAL_CLOSE = 2                 # 信号平仓/止损
+    OPEN = 3                         # 开仓
@@ -15,8 +15,9 @@ ExecutionManager - 统一执行器 (Intent模式)
 """
 
 from AlgorithmImports import *
-from src.constants import OrderAction, TradingSignal
+from src.constants import OrderAction, TradingSignal, IntentPriority
 from src.execution.OrderIntent import CloseIntent
+from src.execution.SignalMemo import SignalMemo
 from typing import List
 
 
@@ -60,6 +61,9 @@ class ExecutionManager:
         # 从margin_allocator获取min_investment_amount（避免重复计算）
         self.min_investment_amount = margin_allocator.min_investment_amount
 
+        # bar级信号/价格备忘(平仓/开仓候选/开仓意图共享,每个配对每bar只计算一次)
+        self.signal_memo = SignalMemo(algorithm)
+
 
     # ===== Cooldown检查方法 =====
 
@@ -88,7 +92,12 @@ class ExecutionManager:
         - 依赖注入: 通过self.risk_manager访问规则列表
         - 统一接口: 与is_portfolio_in_risk_cooldown()对称
         - 决策集中: cooldown判断逻辑集中在ExecutionManager
+        - 启用CooldownRegistry时为一次字典查找
         """
+        registry = self.risk_manager.cooldown_registry
+        if registry is not None:
+            return registry.in_risk_cooldown(pair_id)
+
         for rule in self.risk_manager.pair_rules:
             if rule.is_in_cooldown(pair_id=pair_id):
                 return True
@@ -120,7 +129,12 @@ class ExecutionManager:
         - 数据所有权: Pairs拥有数据 (pair_closed_time, last_close_reason)
         - 决策职责: ExecutionManager负责判断逻辑
         - 动态策略: 根据退出原因自动调整冷却期长度
+        - 启用CooldownRegistry时读取平仓时登记的到期时间(Pairs.on_position_filled)
         """
+        registry = self.risk_manager.cooldown_registry
+        if registry is not None:
+            return registry.is_active(pair.pair_id, registry.NORMAL)
+
         frozen_days = pair.get_pair_frozen_days()
         if frozen_days is None:
             return False  # 无冷却期数据,允许开仓
@@ -154,15 +168,15 @@ class ExecutionManager:
         executed_count = 0  # 记录成功执行的配对数量
 
         for intent in intents:
-            # 订单锁定检查（防止重复下单）
-            if self.tickets_manager.is_pair_locked(intent.pair_id):
+            # 订单锁定检查（防止重复下单; 意图队列中排队的配对可被风控意图提升）
+            if self.tickets_manager.has_pending_orders(intent.pair_id):
                 self.algorithm.Debug(
                     f"[Portfolio风控] {intent.pair_id} 订单处理中,跳过"
                 )
                 continue
 
             # 通过order_executor执行平仓Intent (自动注册到TicketsManager)
-            success = self.order_executor.execute_close(intent)
+            success = self.order_executor.execute_close(intent, priority=IntentPriority.PORTFOLIO_RISK)
             if success:
                 executed_count += 1
                 self.algorithm.Debug(
@@ -219,15 +233,15 @@ class ExecutionManager:
         executed_pair_ids = []  # 记录成功执行的pair_id
 
         for intent in intents:
-            # 订单锁定检查（防止重复下单）
-            if self.tickets_manager.is_pair_locked(intent.pair_id):
+            # 订单锁定检查（防止重复下单; 意图队列中排队的配对可被风控意图提升）
+            if self.tickets_manager.has_pending_orders(intent.pair_id):
                 self.algorithm.Debug(
                     f"[Pair风控] {intent.pair_id} 订单处理中,跳过"
                 )
                 continue
 
             # 通过order_executor执行平仓Intent (自动注册到TicketsManager)
-            success = self.order_executor.execute_close(intent)
+            success = self.order_executor.execute_close(intent, priority=IntentPriority.PAIR_RISK)
             if success:
                 executed_pair_ids.append(intent.pair_id)
                 self.algorithm.Debug(
@@ -296,14 +310,14 @@ class ExecutionManager:
 
         cleanup_count = 0
         for pair in pairs_with_position.values():
-            # 订单锁定检查(跳过处理中的订单)
-            if self.tickets_manager.is_pair_locked(pair.pair_id):
+            # 订单锁定检查(跳过已提交未完成的订单; 排队中的配对提升为风控意图)
+            if self.tickets_manager.has_pending_orders(pair.pair_id):
                 continue
 
             # 通过Intent模式平仓(保持追踪,自动注册到TicketsManager)
             intent = pair.get_close_intent(reason='COOLDOWN_CLEANUP')
             if intent:
-                success = self.order_executor.execute_close(intent)
+                success = self.order_executor.execute_close(intent, priority=IntentPriority.PORTFOLIO_RISK)
                 if success:
                     cleanup_count += 1
                     self.algorithm.Debug(
@@ -354,7 +368,7 @@ class ExecutionManager:
                 continue
 
             # 获取交易信号
-            signal = pair.get_signal(data)
+            signal = self.signal_memo.get_signal(pair, data)
 
             # 处理平仓信号
             if signal == TradingSignal.CLOSE:
@@ -401,7 +415,7 @@ class ExecutionManager:
         candidates = []
 
         for pair in pairs_without_position.values():
-            signal = pair.get_signal(data)
+            signal = self.signal_memo.get_signal(pair, data)
             if signal in [TradingSignal.LONG_SPREAD, TradingSignal.SHORT_SPREAD]:
                 planned_pct = pair.get_planned_allocation_pct()
                 candidates.append((pair, signal, pair.quality_score, planned_pct))
@@ -463,8 +477,12 @@ class ExecutionManager:
                 self.algorithm.Debug(f"[开仓跳过] {pair_id} 在交易冷却期")
                 continue
 
-            # 执行开仓并注册订单追踪
-            intent = pair.get_open_intent(amount_allocated, data)
+            # 执行开仓并注册订单追踪(信号/价格读取本bar备忘)
+            intent = pair.get_open_intent(
+                amount_allocated, data,
+                signal=self.signal_memo.get_signal(pair, data),
+                prices=self.signal_memo.get_price(pair, data)
+            )
             if intent:
                 success = self.order_executor.execute_open(intent)  # 自动注册到TicketsManager
                 if success:
@@ -0,0 +1,205 @@
+# region imports
+from AlgorithmImports import *
+import heapq
+from typing import Dict, List
+from src.constants import OrderAction, IntentPriority
+# endregion
+
+
+class IntentQueue:
+    """
+    订单意图优先级队列 + 令牌桶限速
+
+    问题:
+        Portfolio风控触发时 handle_portfolio_risk_intents 一次提交最多 2×N 个市价单,
+        正常开平仓也直接经 OrderExecutor 提交,实盘可能触发券商消息频率限制。
+
+    机制:
+        - 优先级: Portfolio风控 > Pair风控 > 正常平仓 > 开仓(IntentPriority),同优先级先进先出
+        - 去重: 每个配对最多一个排队意图
+          * 更高优先级的新意图替换旧意图(如排队中的正常平仓被Pair/Portfolio风控平仓提升),按新优先级排队
+          * 同优先级的新意图原位刷新数量,保留排队顺序和入队时间(冷却期残留清理每bar重复提交)
+          * 更低优先级的新意图忽略
+        - 锁定: 排队中的配对在TicketsManager中保留(is_pair_locked为True,正常开平仓跳过),
+          风控路径只检查已提交订单(has_pending_orders),可把排队配对提升为风控意图;提交时释放并注册订单
+        - 令牌桶: 每条腿消耗一个令牌,按algorithm时间以 rate_per_second 补充,上限 burst;
+          令牌不足时剩余意图留到后续bar
+        - 过期: 开仓意图排队超过 open_ttl_seconds 丢弃(数量按入队时价格和保证金计算);平仓意图不过期
+        - Portfolio风控意图入队时清空排队中的开仓意图
+
+    统计:
+        队列深度(当前/最大)、按优先级的等待时间(平均/最大,自首次入队起)、提升替换数、过期数(get_statistics / log_statistics)
+    """
+
+    PRIORITY_NAMES = {
+        IntentPriority.PORTFOLIO_RISK: 'portfolio_risk',
+        IntentPriority.PAIR_RISK: 'pair_risk',
+        IntentPriority.NORMAL_CLOSE: 'normal_close',
+        IntentPriority.OPEN: 'open'
+    }
+
+    def __init__(self, algorithm, tickets_manager, order_executor, config: dict):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            tickets_manager: TicketsManager实例(排队配对的锁定)
+            order_executor: OrderExecutor实例(出队后执行)
+            config: pairs_trading['intent_queue']
+        """
+        self.algorithm = algorithm
+        self.tickets_manager = tickets_manager
+        self.order_executor = order_executor
+
+        self.rate_per_second = config['rate_per_second']
+        self.burst = config['burst']
+        self.open_ttl_seconds = config['open_ttl_seconds']
+
+        self.tokens = float(self.burst)
+        self._last_refill = None
+
+        self._heap = []                 # [(priority, seq, pair_id)] 惰性删除
+        self._entries: Dict = {}        # pair_id → {'intent', 'action', 'priority', 'seq', 'time'}
+        self._seq = 0
+
+        # 统计
+        self.max_depth = 0
+        self.replaced_count = 0
+        self.expired_count = 0
+        self.wait_stats = {priority: {'count': 0, 'total': 0.0, 'max': 0.0} for priority in self.PRIORITY_NAMES}
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def submit(self, intent, action: str, priority: int) -> bool:
+        """
+        意图入队(同一配对去重)
+
+        Returns:
+            bool: True=已入队、已替换/刷新排队意图,或已有更高优先级意图
+        """
+        pair_id = intent.pair_id
+        existing = self._entries.get(pair_id)
+        if existing is not None:
+            if priority > existing['priority']:
+                return True     # 已有更高优先级意图
+            if priority == existing['priority']:
+                existing['intent'] = intent
+                existing['action'] = action
+                return True     # 原位刷新,保留排队顺序
+            self.replaced_count += 1
+
+        if priority == IntentPriority.PORTFOLIO_RISK:
+            self._drop_opens()
+
+        self._seq += 1
+        self._entries[pair_id] = {
+            'intent': intent,
+            'action': action,
+            'priority': priority,
+            'seq': self._seq,
+            'time': existing['time'] if existing is not None else self.algorithm.UtcTime
+        }
+        heapq.heappush(self._heap, (priority, self._seq, pair_id))
+        self.tickets_manager.reserve_pair(pair_id)
+        self.max_depth = max(self.max_depth, len(self._entries))
+        return True
+
+
+    def drain(self):
+        """按优先级提交排队意图,直到队列为空或令牌不足"""
+        if not self._entries:
+            return
+
+        now = self.algorithm.UtcTime
+        self._refill(now)
+
+        while self._heap:
+            priority, seq, pair_id = self._heap[0]
+            entry = self._entries.get(pair_id)
+            if entry is None or entry['seq'] != seq:
+                heapq.heappop(self._heap)       # 已被替换或丢弃
+                continue
+
+            waited = (now - entry['time']).total_seconds()
+            if entry['action'] == OrderAction.OPEN and waited > self.open_ttl_seconds:
+                heapq.heappop(self._heap)
+                self._remove(pair_id)
+                self.expired_count += 1
+                continue
+
+            cost = min(self._leg_count(entry['intent']), self.burst)
+            if self.tokens < cost:
+                break
+
+            heapq.heappop(self._heap)
+            self._remove(pair_id)
+            self.tokens -= cost
+            self._record_wait(priority, waited)
+            self.order_executor.dispatch(entry['intent'], entry['action'])
+
+        if self._entries:
+            self.algorithm.Debug(f"[订单队列] 令牌不足,剩余{len(self._entries)}个意图顺延")
+
+
+    def _refill(self, now):
+        """按algorithm时间补充令牌"""
+        if self._last_refill is not None:
+            elapsed = (now - self._last_refill).total_seconds()
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate_per_second)
+        self._last_refill = now
+
+
+    def _remove(self, pair_id):
+        """移出队列并释放TicketsManager中的保留"""
+        del self._entries[pair_id]
+        self.tickets_manager.release_pair(pair_id)
+
+
+    def _drop_opens(self):
+        """丢弃排队中的开仓意图(Portfolio风控清仓时)"""
+        for pair_id in [pid for pid, entry in self._entries.items() if entry['action'] == OrderAction.OPEN]:
+            self._remove(pair_id)
+
+
+    @staticmethod
+    def _leg_count(intent) -> int:
+        return int(intent.qty1 != 0) + int(intent.qty2 != 0)
+
+
+    def _record_wait(self, priority: int, waited: float):
+        stat = self.wait_stats[priority]
+        stat['count'] += 1
+        stat['total'] += waited
+        stat['max'] = max(stat['max'], waited)
+
+
+    def get_statistics(self) -> Dict:
+        return {
+            'depth': len(self._entries),
+            'max_depth': self.max_depth,
+            'replaced': self.replaced_count,
+            'expired': self.expired_count,
+            'wait': {
+                self.PRIORITY_NAMES[priority]: {
+                    'count': stat['count'],
+                    'avg_s': stat['total'] / stat['count'] if stat['count'] else 0.0,
+                    'max_s': stat['max']
+                }
+                for priority, stat in self.wait_stats.items() if stat['count']
+            }
+        }
+
+
+    def log_statistics(self):
+        """输出队列深度和等待时间汇总"""
+        stats = self.get_statistics()
+        waits: List[str] = [
+            f"{name} {wait['count']}次 平均{wait['avg_s']:.0f}s 最大{wait['max_s']:.0f}s"
+            for name, wait in stats['wait'].items()
+        ]
+        self.algorithm.Debug(
+            f"[订单队列] 深度{stats['depth']} 最大{stats['max_depth']} 替换{stats['replaced']} "
+            f"过期{stats['expired']} | 等待: {'; '.join(waits) if waits else '无'}"
+        )
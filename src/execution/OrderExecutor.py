@@ -1,7 +1,9 @@
 # region imports
 from AlgorithmImports import *
+import time
+from typing import List, Tuple
 from .OrderIntent import OpenIntent, CloseIntent
-from src.constants import OrderAction
+from src.constants import OrderAction, IntentPriority
 # endregion
 
 
@@ -11,7 +13,7 @@ class OrderExecutor:
 
     设计理念:
     - 单一职责: 只负责将Intent转换为OrderTicket,不做任何业务判断
-    - 无状态设计: 不存储任何配对或订单信息(状态由TicketsManager管理)
+    - 无状态设计: 不存储任何配对或订单信息(状态由TicketsManager管理,本类只累计提交统计)
     - 依赖注入: 通过构造函数注入algorithm引用
     - 可测试性: 可以轻松mock algorithm进行单元测试
 
@@ -38,21 +40,52 @@ class OrderExecutor:
         intent = pair.get_close_intent(reason='STOP_LOSS')
         if intent:
             order_executor.execute_close(intent)  # 自动注册,无返回值
+
+    提交模式(submission_mode):
+    - 'sequential': 逐腿同步MarketOrder(第二条腿等待第一条腿的提交往返)
+    - 'async': 两条腿均以asynchronous=True提交,不等待往返
+    - 'combo': ComboMarketOrder一次提交两条腿(券商模型不支持时回退到async)
+    三种模式的tickets都作为一个批次注册到TicketsManager
+    组合订单只用于单个配对自身的多条腿;净额订单(各股票互不相关)始终按async提交
+
+    意图队列(intent_queue):
+    - 设置intent_queue(IntentQueue)后,execute_open/close按优先级入队,由队列限速出队后经dispatch()执行
+
+    订单净额(netting):
+    - 设置netting(OrderNettingEngine)后,execute_open/close只登记意图并注册分摊票据,
+      OnData结束时由引擎按股票净额,通过execute_net_orders()提交
     """
 
-    def __init__(self, algorithm, tickets_manager):
+    SUBMISSION_MODES = ('sequential', 'async', 'combo')
+
+    def __init__(self, algorithm, tickets_manager, submission_mode: str = 'sequential'):
         """
         初始化订单执行器
 
         Args:
             algorithm: QCAlgorithm实例,用于调用MarketOrder方法
             tickets_manager: TicketsManager实例,用于自动注册订单
+            submission_mode: 'sequential' | 'async' | 'combo'
         """
+        if submission_mode not in self.SUBMISSION_MODES:
+            raise ValueError(f"未知提交模式: {submission_mode}")
+
         self.algorithm = algorithm
         self.tickets_manager = tickets_manager
+        self.submission_mode = submission_mode
 
+        # 意图队列 / 订单净额引擎(启用时由main.py设置)
+        self.intent_queue = None
+        self.netting = None
 
-    def execute_open(self, intent: OpenIntent) -> bool:
+        # 提交统计(多腿批次)
+        self.batch_count = 0
+        self.combo_fallbacks = 0
+        self.total_submit_ms = 0.0              # 实测: 首腿提交 → 末腿提交返回(本进程耗时)
+        self.max_submit_ms = 0.0
+
+
+    def execute_open(self, intent: OpenIntent, priority: int = IntentPriority.OPEN) -> bool:
         """
         执行开仓意图
 
@@ -60,9 +93,10 @@ class OrderExecutor:
 
         Args:
             intent: OpenIntent对象,包含配对ID、Symbol、数量、信号和标签
+            priority: 意图队列优先级(启用intent_queue时生效)
 
         Returns:
-            bool: True=订单已提交并注册, False=订单提交失败
+            bool: True=订单已提交并注册(或已入队), False=订单提交失败
 
         设计说明:
             - 使用intent.tag统一标记两条腿(便于追踪和分析)
@@ -71,25 +105,15 @@ class OrderExecutor:
             - 返回bool表示是否成功提交订单(最终成交由OnOrderEvent异步确定)
 
         执行流程:
-            1. 提交symbol1订单 → ticket1
-            2. 提交symbol2订单 → ticket2
+            1-2. 按提交模式提交symbol1/symbol2订单 → ticket1, ticket2
             3. 检查两条腿是否都成功 → 自动注册到TicketsManager并返回True
         """
-        # 提交两条腿的市价订单
-        ticket1 = self.algorithm.MarketOrder(intent.symbol1, intent.qty1, tag=intent.tag)
-        ticket2 = self.algorithm.MarketOrder(intent.symbol2, intent.qty2, tag=intent.tag)
+        if self.intent_queue is not None:
+            return self.intent_queue.submit(intent, OrderAction.OPEN, priority)
+        return self._execute_open(intent)
 
-        # 检查订单是否成功提交
-        if ticket1 and ticket2:
-            # 自动注册到TicketsManager
-            tickets = [ticket1, ticket2]
-            self.tickets_manager.register_tickets(intent.pair_id, tickets, OrderAction.OPEN)
-            return True
 
-        return False
-
-
-    def execute_close(self, intent: CloseIntent) -> bool:
+    def execute_close(self, intent: CloseIntent, priority: int = IntentPriority.NORMAL_CLOSE) -> bool:
         """
         执行平仓意图
 
@@ -97,9 +121,10 @@ class OrderExecutor:
 
         Args:
             intent: CloseIntent对象,包含配对ID、Symbol、当前持仓数量、原因和标签
+            priority: 意图队列优先级(启用intent_queue时生效)
 
         Returns:
-            bool: True=订单已提交并注册, False=无订单提交(无持仓)
+            bool: True=订单已提交并注册(或已入队), False=无订单提交(无持仓)
 
         设计说明:
             - 只平掉有持仓的腿(qty != 0)
@@ -117,19 +142,55 @@ class OrderExecutor:
             - 如果两条腿都是0(无持仓),返回False
             - 单边持仓也能正常处理(只平掉有持仓的腿)
         """
-        tickets = []
+        if intent.qty1 == 0 and intent.qty2 == 0:
+            return False
+        if self.intent_queue is not None:
+            return self.intent_queue.submit(intent, OrderAction.CLOSE, priority)
+        return self._execute_close(intent)
+
+
+    def dispatch(self, intent, action: str) -> bool:
+        """执行出队的意图(由IntentQueue调用,不再入队)"""
+        if action == OrderAction.OPEN:
+            return self._execute_open(intent)
+        return self._execute_close(intent)
 
-        # 平掉第一条腿(如果有持仓)
-        if intent.qty1 != 0:
-            ticket1 = self.algorithm.MarketOrder(intent.symbol1, -intent.qty1, tag=intent.tag)
-            if ticket1:
-                tickets.append(ticket1)
 
-        # 平掉第二条腿(如果有持仓)
-        if intent.qty2 != 0:
-            ticket2 = self.algorithm.MarketOrder(intent.symbol2, -intent.qty2, tag=intent.tag)
-            if ticket2:
-                tickets.append(ticket2)
+    def _execute_open(self, intent: OpenIntent) -> bool:
+        """开仓: 净额登记或按提交模式提交两条腿"""
+        if self.netting is not None:
+            return self.netting.enqueue(
+                intent.pair_id, [(intent.symbol1, intent.qty1), (intent.symbol2, intent.qty2)], OrderAction.OPEN
+            )
+
+        # 提交两条腿的市价订单
+        ticket1, ticket2 = self._submit_legs(
+            [(intent.symbol1, intent.qty1), (intent.symbol2, intent.qty2)], intent.tag
+        )
+
+        # 检查订单是否成功提交
+        if ticket1 and ticket2:
+            # 自动注册到TicketsManager
+            tickets = [ticket1, ticket2]
+            self.tickets_manager.register_tickets(intent.pair_id, tickets, OrderAction.OPEN)
+            return True
+
+        return False
+
+
+    def _execute_close(self, intent: CloseIntent) -> bool:
+        """平仓: 净额登记或按提交模式提交有持仓的腿"""
+        # 只平掉有持仓的腿
+        legs = [
+            (symbol, -qty) for symbol, qty in
+            ((intent.symbol1, intent.qty1), (intent.symbol2, intent.qty2))
+            if qty != 0
+        ]
+
+        if self.netting is not None:
+            return self.netting.enqueue(intent.pair_id, legs, OrderAction.CLOSE, reason=intent.reason)
+
+        tickets = [ticket for ticket in self._submit_legs(legs, intent.tag) if ticket]
 
         # 如果有订单提交,自动注册到TicketsManager (v7.2.21: 传递reason)
         if tickets:
@@ -139,3 +200,125 @@ class OrderExecutor:
             return True
 
         return False
+
+
+    def execute_net_orders(self, legs: List[Tuple[Symbol, float]], tag: str) -> List:
+        """
+        提交净额订单(由OrderNettingEngine调用,每只股票一个订单,不注册到TicketsManager)
+
+        各股票的净额订单互不相关,按async提交(不使用组合订单,避免全部股票一起成交或一起被拒)
+
+        Returns:
+            与legs顺序一致的OrderTicket列表
+        """
+        return self._submit_legs(legs, tag, mode='async')
+
+
+    # ========== 提交模式 ==========
+
+    def _submit_legs(self, legs: List[Tuple[Symbol, float]], tag: str, mode: str = None) -> List:
+        """
+        按提交模式提交多条腿的市价订单
+
+        Args:
+            legs: [(symbol, quantity), ...]
+            tag: 订单标签
+            mode: 覆盖submission_mode(净额订单传'async')
+
+        Returns:
+            与legs顺序一致的OrderTicket列表(提交失败的腿为None)
+        """
+        if not legs:
+            return []
+
+        start = time.perf_counter()
+        mode = mode or self.submission_mode
+        tickets = None
+
+        # 组合订单只用于多腿;单腿或券商不支持时按async提交
+        if mode == 'combo':
+            if len(legs) > 1:
+                tickets = self._submit_combo(legs, tag)
+                if tickets is None:
+                    self.combo_fallbacks += 1
+            if tickets is None:
+                mode = 'async'
+
+        if mode == 'sequential':
+            tickets = [self.algorithm.MarketOrder(symbol, qty, tag=tag) for symbol, qty in legs]
+        elif mode == 'async':
+            tickets = [
+                self.algorithm.MarketOrder(symbol, qty, asynchronous=True, tag=tag)
+                for symbol, qty in legs
+            ]
+
+        self._record_submission(len(legs), (time.perf_counter() - start) * 1000)
+        return tickets
+
+
+    def _submit_combo(self, legs: List[Tuple[Symbol, float]], tag: str):
+        """
+        ComboMarketOrder一次提交全部腿(腿比例=各腿数量,组合数量=1)
+
+        券商模型拒绝组合订单时LEAN返回Invalid票据而不抛异常,需检查票据状态
+
+        Returns:
+            与legs顺序一致的OrderTicket列表; 券商模型不支持或拒绝组合订单时返回None
+        """
+        try:
+            combo_legs = [Leg.Create(symbol, int(qty)) for symbol, qty in legs]
+            tickets = list(self.algorithm.ComboMarketOrder(combo_legs, 1, tag=tag))
+        except Exception as e:
+            self.algorithm.Debug(f"[OrderExecutor] 组合订单不可用,回退async: {e}")
+            return None
+
+        if len(tickets) != len(legs):
+            return None
+
+        if any(ticket.Status == OrderStatus.Invalid for ticket in tickets):
+            self.algorithm.Debug(f"[OrderExecutor] 组合订单被拒绝(Invalid),回退async: {tag}")
+            return None
+
+        by_symbol = {ticket.Symbol: ticket for ticket in tickets}
+        return [by_symbol.get(symbol) for symbol, _ in legs]
+
+
+    def _record_submission(self, leg_count: int, elapsed_ms: float):
+        """累计多腿批次的提交统计(本进程内首腿提交到末腿提交返回的实测耗时)"""
+        if leg_count < 2:
+            return
+
+        self.batch_count += 1
+        self.total_submit_ms += elapsed_ms
+        self.max_submit_ms = max(self.max_submit_ms, elapsed_ms)
+
+
+    def log_statistics(self):
+        """
+        输出提交统计
+        - 实测提交耗时
+        - 实测成交腿间偏差(启用OrderLatencyTracker时,按当前提交模式)
+
+        LEAN回测中同一批次各腿在同一模拟时间成交,腿间偏差各模式相同;
+        模式差异只能在实盘(或有真实往返延迟的券商)的实测偏差中体现
+        """
+        if self.batch_count == 0:
+            return
+
+        parts = [
+            f"[OrderExecutor] 模式={self.submission_mode} 批次{self.batch_count} "
+            f"提交耗时(实测) 平均{self.total_submit_ms / self.batch_count:.2f}ms 最大{self.max_submit_ms:.2f}ms "
+            f"组合回退{self.combo_fallbacks}"
+        ]
+
+        tracker = self.tickets_manager.latency_tracker
+        if tracker is not None:
+            leg_skew = tracker.merged_histogram('leg_skew')
+            if leg_skew.count:
+                stats = leg_skew.to_dict()
+                parts.append(
+                    f"成交腿间偏差(实测) {stats['count']}批 平均{stats['mean_s']:.3f}s "
+                    f"最大{stats['max_s']:.3f}s p95{stats['p95']}"
+                )
+
+        self.algorithm.Debug(' | '.join(parts))
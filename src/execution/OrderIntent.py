@@ -5,7 +5,7 @@ from typing import Tuple
 # endregion
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenIntent:
     """
     开仓意图数据类
@@ -42,7 +42,7 @@ class OpenIntent:
     tag: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CloseIntent:
     """
     平仓意图数据类
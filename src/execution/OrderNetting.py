@@ -0,0 +1,202 @@
+# region imports
+from AlgorithmImports import *
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+# endregion
+
+
+class AllocatedLegTicket:
+    """
+    配对单腿的分摊票据(替代OrderTicket注册到TicketsManager)
+
+    提供TicketsManager / Pairs.on_position_filled / FillRecord 读取的OrderTicket字段:
+    OrderId(负数合成ID,与LEAN订单ID不冲突)、Symbol、Status、QuantityFilled、AverageFillPrice、Time
+    """
+
+    __slots__ = ('OrderId', 'Symbol', 'Quantity', 'Status', 'QuantityFilled', 'AverageFillPrice', 'Time', 'pair_id')
+
+    def __init__(self, order_id: int, pair_id: str, symbol: Symbol, quantity: float, time):
+        self.OrderId = order_id
+        self.pair_id = pair_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.Status = OrderStatus.Submitted
+        self.QuantityFilled = 0
+        self.AverageFillPrice = 0
+        self.Time = time
+
+
+@dataclass(frozen=True, slots=True)
+class AllocatedLegEvent:
+    """分摊票据的订单事件(TicketsManager.on_order_event读取的字段)"""
+    OrderId: int
+    Status: int
+    UtcTime: object
+
+
+class OrderNettingEngine:
+    """
+    跨配对订单净额引擎 - 同一bar内所有配对的订单意图按股票净额,每只股票只提交一个市价单
+
+    问题:
+        max_symbol_repeats=3,同一股票可能出现在多个配对中;
+        繁忙bar上一个配对平多、另一个配对开多,会对同一股票发出方向相反的两个市价单,
+        Portfolio风控全部清仓时同一股票也会按配对数重复下单。
+
+    流程:
+        1. enqueue(): OrderExecutor把每个配对的各条腿登记为AllocatedLegTicket,立即注册到TicketsManager(配对随即PENDING锁定)
+        2. flush(): OnData结束时按股票汇总数量
+           - 净额为0: 内部对冲,按当前价格立即成交
+           - 净额非0: 提交一个市价单(OrderExecutor提交模式)
+        3. on_order_event(): 净额订单终态(Filled/Canceled/Invalid)分摊回该股票的全部腿,
+           以合成事件转交TicketsManager → 配对双腿完成时照常回调 Pairs.on_position_filled
+
+    分摊规则:
+        每条腿按自身数量全额成交,价格 = 净额订单平均成交价(内部对冲部分同价);
+        各配对tracked_qty之和的变化 = 净额订单数量,与Portfolio一致
+    """
+
+    FINAL_STATUSES = (OrderStatus.Filled, OrderStatus.Canceled, OrderStatus.Invalid)
+
+    def __init__(self, algorithm, tickets_manager, order_executor):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            tickets_manager: TicketsManager实例(分摊票据注册和合成事件)
+            order_executor: OrderExecutor实例(提交净额订单)
+        """
+        self.algorithm = algorithm
+        self.tickets_manager = tickets_manager
+        self.order_executor = order_executor
+
+        self._pending: List[AllocatedLegTicket] = []                            # 本bar待净额的腿
+        self._net_orders: Dict[int, Tuple[object, List[AllocatedLegTicket]]] = {}  # LEAN OrderId → (ticket, 分摊腿)
+        self._next_id = -1
+
+        # 统计
+        self.leg_count = 0              # 登记的配对腿数(不净额时的订单数)
+        self.order_count = 0            # 实际提交的净额订单数
+        self.crossed_quantity = 0       # 内部对冲的股数(买卖相抵、未进入市场的单边数量)
+
+
+    def enqueue(self, pair_id: str, legs: List[Tuple[Symbol, float]], action: str, reason: str = None) -> bool:
+        """
+        登记配对的订单意图并注册到TicketsManager
+
+        Args:
+            pair_id: 配对ID
+            legs: [(symbol, quantity), ...] 非零数量
+            action: OrderAction.OPEN 或 OrderAction.CLOSE
+            reason: 平仓原因(仅CLOSE)
+
+        Returns:
+            bool: 是否已登记(无腿时False)
+        """
+        if not legs:
+            return False
+
+        now = self.algorithm.UtcTime
+        tickets = []
+        for symbol, quantity in legs:
+            ticket = AllocatedLegTicket(self._next_id, pair_id, symbol, quantity, now)
+            self._next_id -= 1
+            tickets.append(ticket)
+
+        self._pending.extend(tickets)
+        self.leg_count += len(tickets)
+        self.tickets_manager.register_tickets(pair_id, tickets, action, reason=reason)
+        return True
+
+
+    def flush(self):
+        """OnData结束时净额提交本bar登记的全部腿"""
+        if not self._pending:
+            return
+
+        by_symbol: Dict[Symbol, List[AllocatedLegTicket]] = {}
+        for ticket in self._pending:
+            by_symbol.setdefault(ticket.Symbol, []).append(ticket)
+        self._pending = []
+
+        net_legs = []
+        net_allocations = []
+        for symbol, tickets in by_symbol.items():
+            net_quantity = sum(ticket.Quantity for ticket in tickets)
+            self.crossed_quantity += (sum(abs(ticket.Quantity) for ticket in tickets) - abs(net_quantity)) / 2
+
+            if net_quantity == 0:
+                # 完全内部对冲: 不进入市场,按当前价格成交
+                price = self.algorithm.Securities[symbol].Price
+                self._settle(tickets, OrderStatus.Filled, price, self.algorithm.UtcTime)
+            else:
+                net_legs.append((symbol, net_quantity))
+                net_allocations.append(tickets)
+
+        if not net_legs:
+            return
+
+        order_tickets = self.order_executor.execute_net_orders(net_legs, tag=f"NET {len(by_symbol)}")
+        for order_ticket, tickets in zip(order_tickets, net_allocations):
+            if not order_ticket:
+                self._settle(tickets, OrderStatus.Invalid, 0, self.algorithm.UtcTime)
+                continue
+
+            self.order_count += 1
+            self._net_orders[order_ticket.OrderId] = (order_ticket, tickets)
+
+            # 同步模式下事件可能先于映射到达: 已是终态则直接分摊
+            if order_ticket.Status in self.FINAL_STATUSES:
+                self._settle_order(order_ticket.OrderId, order_ticket.Status, self.algorithm.UtcTime)
+
+
+    def on_order_event(self, event) -> bool:
+        """
+        处理LEAN订单事件
+
+        Returns:
+            bool: 是否为净额订单(是则调用方不再转交TicketsManager)
+        """
+        if event.OrderId not in self._net_orders:
+            return False
+
+        if event.Status in self.FINAL_STATUSES:
+            self._settle_order(event.OrderId, event.Status, event.UtcTime)
+        return True
+
+
+    def _settle_order(self, order_id: int, status, time):
+        """净额订单终态: 按平均成交价分摊到全部腿"""
+        order_ticket, tickets = self._net_orders.pop(order_id)
+        price = order_ticket.AverageFillPrice if status == OrderStatus.Filled else 0
+        self._settle(tickets, status, price, time)
+
+
+    def _settle(self, tickets: List[AllocatedLegTicket], status, price: float, time):
+        """更新分摊票据并以合成事件通知TicketsManager"""
+        for ticket in tickets:
+            ticket.Status = status
+            if status == OrderStatus.Filled:
+                ticket.QuantityFilled = ticket.Quantity
+                ticket.AverageFillPrice = price
+
+        for ticket in tickets:
+            self.tickets_manager.on_order_event(AllocatedLegEvent(ticket.OrderId, status, time))
+
+
+    def get_statistics(self) -> Dict:
+        return {
+            'leg_count': self.leg_count,
+            'order_count': self.order_count,
+            'orders_saved': self.leg_count - self.order_count,
+            'crossed_quantity': self.crossed_quantity,
+            'in_flight_orders': len(self._net_orders)
+        }
+
+
+    def log_statistics(self):
+        """输出净额统计"""
+        stats = self.get_statistics()
+        self.algorithm.Debug(
+            f"[订单净额] 配对腿{stats['leg_count']} → 净额订单{stats['order_count']} "
+            f"(节省{stats['orders_saved']}), 内部对冲{stats['crossed_quantity']:.0f}股"
+        )
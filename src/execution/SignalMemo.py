@@ -0,0 +1,99 @@
+# region imports
+from AlgorithmImports import *
+from typing import Dict, Optional
+# endregion
+
+
+class SignalMemo:
+    """
+    bar级信号/价格备忘录 - 同一bar内执行路径共享每个配对的信号和价格
+
+    问题:
+        get_entry_candidates() 调用 pair.get_signal(data),
+        随后 handle_normal_open_intents() → pair.get_open_intent() 又调用 get_signal / calculate_leg_values / get_price,
+        同一配对同一bar内Z-score和价格被重复计算。
+
+    键:
+        - bar: data slice 身份(slice变化时整体清空,等价于按slice时间分桶)
+        - 配对: (pair_id, position_mode) - 成交后持仓模式变化,信号含义随之变化,不复用旧值
+
+    统计:
+        - signal_hits / signal_misses, price_hits / price_misses: 累计命中次数(get_statistics / log_statistics)
+    """
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+        """
+        self.algorithm = algorithm
+
+        self._slice = None
+        self._signals = {}      # {(pair_id, position_mode): signal}
+        self._prices = {}       # {pair_id: (price1, price2) 或 None}
+
+        # 统计
+        self.signal_hits = 0
+        self.signal_misses = 0
+        self.price_hits = 0
+        self.price_misses = 0
+
+
+    def _sync_bar(self, data):
+        """新bar(不同slice)时清空"""
+        if data is not self._slice:
+            self._slice = data
+            self._signals.clear()
+            self._prices.clear()
+
+
+    def get_signal(self, pair, data) -> str:
+        """本bar该配对的交易信号(首次调用 Pairs.get_signal,之后读取备忘)"""
+        self._sync_bar(data)
+        key = (pair.pair_id, pair.position_mode)
+        if key in self._signals:
+            self.signal_hits += 1
+            return self._signals[key]
+
+        self.signal_misses += 1
+        signal = pair.get_signal(data)
+        self._signals[key] = signal
+        return signal
+
+
+    def get_price(self, pair, data) -> Optional[tuple]:
+        """本bar该配对的两腿价格(首次调用 Pairs.get_price,之后读取备忘)"""
+        self._sync_bar(data)
+        pair_id = pair.pair_id
+        if pair_id in self._prices:
+            self.price_hits += 1
+            return self._prices[pair_id]
+
+        self.price_misses += 1
+        prices = pair.get_price(data)
+        self._prices[pair_id] = prices
+        return prices
+
+
+    def get_statistics(self) -> Dict:
+        """累计命中统计"""
+        signal_total = self.signal_hits + self.signal_misses
+        price_total = self.price_hits + self.price_misses
+        return {
+            'signal_hits': self.signal_hits,
+            'signal_misses': self.signal_misses,
+            'signal_hit_rate': self.signal_hits / signal_total if signal_total else 0.0,
+            'price_hits': self.price_hits,
+            'price_misses': self.price_misses,
+            'price_hit_rate': self.price_hits / price_total if price_total else 0.0
+        }
+
+
+    def log_statistics(self):
+        """输出累计命中统计"""
+        stats = self.get_statistics()
+        self.algorithm.Debug(
+            f"[信号备忘] 信号命中{stats['signal_hits']}/{stats['signal_hits'] + stats['signal_misses']} "
+            f"({stats['signal_hit_rate']:.1%}), 价格命中{stats['price_hits']}/{stats['price_hits'] + stats['price_misses']} "
+            f"({stats['price_hit_rate']:.1%})"
+        )
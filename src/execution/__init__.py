@@ -6,6 +6,9 @@ Execution 模块 - 交易执行层
     - OrderExecutor: 订单执行引擎(意图→订单)
     - MarginAllocator: 资金分配器(全局保证金分配)
     - ExecutionManager: 执行协调器(信号聚合→意图生成→订单执行→票据管理)
+    - SignalMemo: bar级信号/价格备忘(执行路径共享)
+    - OrderNettingEngine: 跨配对订单净额(每bar每只股票一个订单)
+    - IntentQueue: 订单意图优先级队列 + 令牌桶限速
 
 架构层次:
     业务逻辑层(Pairs) → OrderIntent → OrderExecutor → QuantConnect API
@@ -18,6 +21,9 @@ Execution 模块 - 交易执行层
 from .OrderIntent import OpenIntent, CloseIntent
 from .OrderExecutor import OrderExecutor
 from .MarginAllocator import MarginAllocator
+from .SignalMemo import SignalMemo
+from .OrderNetting import OrderNettingEngine
+from .IntentQueue import IntentQueue
 from .ExecutionManager import ExecutionManager
 
 __all__ = [
@@ -25,5 +31,8 @@ __all__ = [
     'CloseIntent',
     'OrderExecutor',
     'MarginAllocator',
-    'ExecutionManager'
+    'ExecutionManager',
+    'SignalMemo',
+    'OrderNettingEngine',
+    'IntentQueue'
 ]
@@ -0,0 +1,140 @@
+# region imports
+from AlgorithmImports import *
+import heapq
+from datetime import datetime
+from typing import Dict, List
+# endregion
+
+
+class CooldownRegistry:
+    """
+    配对冷却期登记表 - 风险冷却与普通交易冷却的统一索引
+
+    问题:
+        ExecutionManager.is_pair_in_risk_cooldown 遍历每个Pair规则调用 is_in_cooldown(pair_id),
+        每个规则各自维护 pair_cooldowns 字典且从不清理;
+        普通交易冷却(Pairs.get_cooldown_days)每次由 pair_closed_time 重新计算。
+
+    结构:
+        - _active: {pair_id: {kind: 到期时间}} 当前冷却,检查为一次字典查找
+        - _heaps: 每个时钟一个按到期时间的最小堆 [(到期时间, seq, pair_id, kind)],查询时惰性清理已到期条目
+          (风险冷却为交易所本地时间,普通冷却为UTC,分堆保证各堆按同一时钟有序)
+        - kind: 风险规则类名(PairDrawdownRule等) 或 NORMAL(正常平仓/止损后的交易冷却)
+
+    到期语义(与原实现一致):
+        - 风险冷却: algorithm.Time <= 到期时间 (RiskRule.is_in_cooldown, 到期当天仍冷却)
+        - 普通冷却: algorithm.UtcTime < 平仓时间 + cooldown_days (frozen_days < cooldown_days)
+
+    同一配对同一kind重复激活时覆盖旧到期时间(旧堆条目成为过期副本,出堆时跳过)
+    """
+
+    NORMAL = 'NORMAL'
+
+    def __init__(self, algorithm):
+        """
+        Args:
+            algorithm: QCAlgorithm实例(读取Time / UtcTime)
+        """
+        self.algorithm = algorithm
+
+        self._active: Dict[tuple, Dict[str, datetime]] = {}
+        self._local_heap = []           # 风险冷却: algorithm.Time
+        self._utc_heap = []             # 普通冷却: algorithm.UtcTime
+        self._seq = 0
+        self._kind_counts: Dict[str, int] = {}
+
+        # 统计
+        self.activated_count = 0
+        self.purged_count = 0
+
+
+    def __len__(self) -> int:
+        return sum(self._kind_counts.values())
+
+
+    def activate(self, pair_id: tuple, kind: str, until: datetime):
+        """登记冷却(覆盖该配对同一kind的旧冷却)"""
+        kinds = self._active.setdefault(pair_id, {})
+        if kind not in kinds:
+            self._kind_counts[kind] = self._kind_counts.get(kind, 0) + 1
+        kinds[kind] = until
+
+        self._seq += 1
+        heap = self._utc_heap if kind == self.NORMAL else self._local_heap
+        heapq.heappush(heap, (until, self._seq, pair_id, kind))
+        self.activated_count += 1
+
+
+    def is_active(self, pair_id: tuple, kind: str) -> bool:
+        """配对是否处于指定kind的冷却期"""
+        self._purge()
+        kinds = self._active.get(pair_id)
+        if not kinds or kind not in kinds:
+            return False
+        return self._is_live(kind, kinds[kind])
+
+
+    def in_risk_cooldown(self, pair_id: tuple) -> bool:
+        """配对是否处于任一风险规则的冷却期"""
+        self._purge()
+        kinds = self._active.get(pair_id)
+        if not kinds:
+            return False
+        return any(
+            self._is_live(kind, until) for kind, until in kinds.items() if kind != self.NORMAL
+        )
+
+
+    def has_kind(self, kind: str) -> bool:
+        """是否存在指定kind的冷却条目(批量评估跳过无冷却规则的逐配对查询)"""
+        return self._kind_counts.get(kind, 0) > 0
+
+
+    def _is_live(self, kind: str, until: datetime) -> bool:
+        if kind == self.NORMAL:
+            return self.algorithm.UtcTime < until
+        return self.algorithm.Time <= until
+
+
+    def _purge(self):
+        """两个堆分别按各自时钟弹出堆顶已到期条目(堆顶未到期即停止)"""
+        self._purge_heap(self._local_heap, self.algorithm.Time, inclusive=True)
+        self._purge_heap(self._utc_heap, self.algorithm.UtcTime, inclusive=False)
+
+
+    def _purge_heap(self, heap: List, now: datetime, inclusive: bool):
+        while heap:
+            until, _, pair_id, kind = heap[0]
+            if now < until or (inclusive and now == until):
+                break
+            heapq.heappop(heap)
+
+            kinds = self._active.get(pair_id)
+            if kinds is None or kinds.get(kind) != until:
+                continue        # 已被重新激活覆盖
+            del kinds[kind]
+            if not kinds:
+                del self._active[pair_id]
+            self._kind_counts[kind] -= 1
+            self.purged_count += 1
+
+
+    def export(self) -> List[Dict]:
+        """当前全部冷却条目(按到期时间排序)"""
+        self._purge()
+        entries = [
+            {'pair_id': pair_id, 'kind': kind, 'until': until}
+            for pair_id, kinds in self._active.items()
+            for kind, until in kinds.items()
+        ]
+        return sorted(entries, key=lambda entry: entry['until'])
+
+
+    def log_statistics(self):
+        """输出冷却登记汇总"""
+        self._purge()
+        counts = ', '.join(f"{kind}={n}" for kind, n in sorted(self._kind_counts.items()) if n)
+        self.algorithm.Debug(
+            f"[冷却登记] 激活{self.activated_count} 已清理{self.purged_count} "
+            f"当前{len(self)} ({counts if counts else '无'})"
+        )
@@ -14,6 +14,7 @@ MarketCondition - 市场条件检查器
 - 返回bool而非(triggered, description)
 - 数据不足时默认允许开仓
 - OR逻辑：VIX > 30 或 HistVol > 25% 任一触发即阻止
+- 增量模式：由OnData的SPY/VIX bar维护滚动状态(环形缓冲+累计和),检查O(1),不再每bar调用History
 """
 
 from AlgorithmImports import *
@@ -29,9 +30,13 @@ class MarketCondition:
 
     设计原则:
     - 开仓前置条件：只影响新开仓，不影响平仓
-    - 实时计算：无状态，无冷却期
+    - 无冷却期：每次检查读取最新指标
     - OR逻辑：领先指标(VIX) + 滞后指标(HistVol)
     - 数据容错：数据不足时默认允许开仓
+    - 增量指标(incremental=True)：
+        update(data) 每bar读取SPY/VIX收盘价;首次调用时用History预热一次
+        SPY收益率存入长度为window的环形缓冲,同时维护 Σr 和 Σr²,波动率 = sqrt(Σr²/n - (Σr/n)²) × sqrt(252)
+        (与np.std总体标准差一致);缓冲每写满一轮按缓冲重算累计和,抑制浮点漂移
 
     使用示例:
     ```python
@@ -58,6 +63,19 @@ class MarketCondition:
         self.vix_threshold = mc_config['vix_threshold']
         self.hist_vol_threshold = mc_config['spy_volatility_threshold']
         self.window_size = mc_config['spy_volatility_window']
+        self.incremental = mc_config['incremental']
+
+        # 增量状态(incremental=True时由update维护)
+        self._seeded = False
+        self._vix_last = None               # 最新VIX收盘价
+        self._last_close = None             # SPY最新收盘价
+        self._prev_close = None             # 上一交易日SPY收盘价(同日bar更新时重算最后一个收益率)
+        self._last_date = None              # 最新SPY bar的日期
+        self._returns = np.zeros(self.window_size)  # 日收益率环形缓冲
+        self._ret_count = 0
+        self._ret_pos = 0                   # 下一个写入位置
+        self._ret_sum = 0.0
+        self._ret_sumsq = 0.0
 
         self.algorithm.Debug(
             f"[MarketCondition] 初始化: "
@@ -129,6 +147,99 @@ class MarketCondition:
         return True
 
 
+    # ========== 增量指标 ==========
+
+    def update(self, data):
+        """
+        每bar读取SPY/VIX收盘价更新滚动状态(OnData开头调用)
+
+        Args:
+            data: 当前Slice
+        """
+        if not (self.enabled and self.incremental):
+            return
+
+        if not self._seeded:
+            self._seed()
+
+        spy = self.algorithm.market_benchmark
+        if spy in data and data[spy] is not None:
+            bar = data[spy]
+            self._on_spy_close(float(bar.Close), bar.EndTime.date())
+
+        vix_symbol = getattr(self.algorithm, 'vix_symbol', None)
+        if vix_symbol is not None and vix_symbol in data and data[vix_symbol] is not None:
+            self._vix_last = float(data[vix_symbol].Close)
+
+
+    def _seed(self):
+        """预热: 用History读取一次SPY(window+1天)和VIX(1天),之后只由bar更新"""
+        self._seeded = True
+        try:
+            history = self.algorithm.History(self.algorithm.market_benchmark, self.window_size + 1, Resolution.Daily)
+            if not history.empty:
+                times = history.index.get_level_values('time')
+                for time, close in zip(times, history['close'].values):
+                    self._on_spy_close(float(close), time.date())
+        except Exception as e:
+            if self.config.main.get('debug_mode', False):
+                self.algorithm.Debug(f"[MarketCondition] SPY预热异常: {str(e)}")
+
+        try:
+            if hasattr(self.algorithm, 'vix_symbol'):
+                history = self.algorithm.History(self.algorithm.vix_symbol, 1, Resolution.Daily)
+                if not history.empty:
+                    self._vix_last = float(history['close'].iloc[-1])
+        except Exception as e:
+            if self.config.main.get('debug_mode', False):
+                self.algorithm.Debug(f"[MarketCondition] VIX预热异常: {str(e)}")
+
+
+    def _on_spy_close(self, close: float, date):
+        """追加SPY收盘价(同一日期的后续bar覆盖当日收盘价和最后一个收益率)"""
+        if close <= 0:
+            return
+
+        if date == self._last_date:
+            if self._prev_close is not None:
+                last = (self._ret_pos - 1) % self.window_size
+                old = self._returns[last]
+                new = close / self._prev_close - 1
+                self._returns[last] = new
+                self._ret_sum += new - old
+                self._ret_sumsq += new * new - old * old
+            self._last_close = close
+            return
+
+        if self._last_close is not None:
+            self._push_return(close / self._last_close - 1)
+            self._prev_close = self._last_close
+        self._last_close = close
+        self._last_date = date
+
+
+    def _push_return(self, value: float):
+        """收益率写入环形缓冲,O(1)更新累计和"""
+        if self._ret_count == self.window_size:
+            old = self._returns[self._ret_pos]
+            self._ret_sum -= old
+            self._ret_sumsq -= old * old
+        else:
+            self._ret_count += 1
+
+        self._returns[self._ret_pos] = value
+        self._ret_sum += value
+        self._ret_sumsq += value * value
+        self._ret_pos = (self._ret_pos + 1) % self.window_size
+
+        # 每写满一轮重算累计和
+        if self._ret_pos == 0:
+            self._ret_sum = float(self._returns.sum())
+            self._ret_sumsq = float(np.dot(self._returns, self._returns))
+
+
+    # ========== 指标读取 ==========
+
     def _get_vix_value(self) -> Optional[float]:
         """
         获取最新VIX值
@@ -145,7 +256,11 @@ class MarketCondition:
         - VIX是指数，直接读取close价格
         - 数据不足或异常时返回None
         - 需要main.py在Initialize()中订阅VIX
+        - 增量模式直接返回update()维护的最新值
         """
+        if self.incremental:
+            return self._vix_last
+
         try:
             # 检查algorithm是否有vix_symbol属性
             if not hasattr(self.algorithm, 'vix_symbol'):
@@ -192,7 +307,15 @@ class MarketCondition:
         - 需要window_size+1天数据（计算window_size个收益率）
         - 使用252个交易日年化（美股标准）
         - 数据不足或异常时返回None
+        - 增量模式由环形缓冲累计和计算(缓冲未满时返回None)
         """
+        if self.incremental:
+            if self._ret_count < self.window_size:
+                return None
+            mean = self._ret_sum / self.window_size
+            variance = max(self._ret_sumsq / self.window_size - mean * mean, 0.0)
+            return float(np.sqrt(variance) * np.sqrt(252))
+
         try:
             # 获取SPY历史数据（需要window_size+1天计算window_size个收益率）
             spy = self.algorithm.market_benchmark
@@ -92,11 +92,11 @@ class PairAnomalyRule(RiskRule):
 
         # 4. 获取持仓详情用于生成描述
         info = pair.get_position_info()
-        mode = info['position_mode']
-        qty1 = info['qty1']
-        qty2 = info['qty2']
+        return True, self.describe(pair, info['position_mode'], info['qty1'], info['qty2'])
 
-        # 5. 根据异常类型生成描述
+
+    def describe(self, pair, mode: str, qty1: float, qty2: float) -> str:
+        """根据异常类型生成描述(check()与PairRiskBatch共用)"""
         if mode == PositionMode.PARTIAL_LEG1:
             description = (f"单边持仓LEG1: {pair.symbol1}={qty1:+.0f}, " f"{pair.symbol2}=0")
         elif mode == PositionMode.PARTIAL_LEG2:
@@ -109,4 +109,4 @@ class PairAnomalyRule(RiskRule):
             description = f"未知异常: mode={mode}, qty1={qty1:+.0f}, qty2={qty2:+.0f}"
             self.algorithm.Error(f"[PairAnomalyRule] 检测到未预期的异常模式: {mode}")
 
-        return True, description
+        return description
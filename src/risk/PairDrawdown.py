@@ -136,16 +136,21 @@ class PairDrawdownRule(RiskRule):
         # 7. 判断是否触发
         threshold = self.config['threshold']
         if drawdown >= threshold:
-            description = (
-                f"配对回撤: {drawdown*100:.1f}% >= {threshold*100:.1f}% "
-                f"(当前价值: ${pair_value:,.2f}, HWM: ${hwm:,.2f}, "
-                f"PnL: ${pnl:,.2f}, 成本: ${pair_cost:,.2f})"
-            )
-            return True, description
+            return True, self.describe(drawdown, pair_value, hwm, pnl, pair_cost)
 
         return False, ""
 
 
+    def describe(self, drawdown: float, pair_value: float, hwm: float, pnl: float, pair_cost: float) -> str:
+        """触发描述(check()与PairRiskBatch共用)"""
+        threshold = self.config['threshold']
+        return (
+            f"配对回撤: {drawdown*100:.1f}% >= {threshold*100:.1f}% "
+            f"(当前价值: ${pair_value:,.2f}, HWM: ${hwm:,.2f}, "
+            f"PnL: ${pnl:,.2f}, 成本: ${pair_cost:,.2f})"
+        )
+
+
     def on_pair_closed(self, pair_id: tuple):
         """
         配对平仓后的清理回调 
@@ -95,11 +95,15 @@ class PairHoldingTimeoutRule(RiskRule):
 
         # 4. 判断是否超时
         if holding_days > self.max_days:
-            # 获取开仓时间用于日志 (如果存在)
-            entry_time = getattr(pair, 'pair_opened_time', None)
-            entry_time_str = entry_time.strftime('%Y-%m-%d') if entry_time else "未知"
-
-            description = (f"持仓超时: 已持仓{holding_days}天 > " f"上限{self.max_days}天 " f"(开仓时间: {entry_time_str})")
-            return True, description
+            return True, self.describe(pair, holding_days)
 
         return False, ""
+
+
+    def describe(self, pair, holding_days: int) -> str:
+        """触发描述(check()与PairRiskBatch共用)"""
+        # 获取开仓时间用于日志 (如果存在)
+        entry_time = getattr(pair, 'pair_opened_time', None)
+        entry_time_str = entry_time.strftime('%Y-%m-%d') if entry_time else "未知"
+
+        return (f"持仓超时: 已持仓{holding_days}天 > " f"上限{self.max_days}天 " f"(开仓时间: {entry_time_str})")
@@ -0,0 +1,226 @@
+# region imports
+from AlgorithmImports import *
+import numpy as np
+from typing import List, Tuple
+from .PairAnomaly import PairAnomalyRule
+from .PairDrawdown import PairDrawdownRule
+from .PairHoldingTimeout import PairHoldingTimeoutRule
+# endregion
+
+
+class PairRiskBatch:
+    """
+    Pair层风控批量评估器 - 一次向量化计算全部持仓配对的PnL、HWM、回撤和持仓天数
+
+    问题:
+        main.OnData 对每个持仓配对调用 RiskManager.check_pair_risks(pair),
+        每条规则各自调用 get_pair_pnl / get_pair_cost / get_pair_holding_days / get_position_info,
+        同一配对的价格、数量在规则之间重复读取,HWM逐配对更新。
+
+    方案:
+        - collect(): 每个配对读取一次 tracked_qty / entry_price / exit_price / 持仓价格 / 开仓时间,组成数组
+          (持仓价格在bar快照有效时按列号一次取出)
+        - evaluate(): 按规则优先级依次计算触发掩码,已触发的配对不再参与后续规则(排他性: 最高优先级)
+
+    语义与 check_pair_risks 一致:
+        - 规则顺序、per-pair冷却、数据不完整时不触发
+        - PairDrawdownRule的HWM只为轮到该规则检查的配对更新(更高优先级规则已触发的配对不更新)
+        - 运算顺序与标量实现相同(浮点结果一致)
+        - 未知规则类型逐配对调用 rule.check()
+    """
+
+    def __init__(self, algorithm, pair_rules: List):
+        """
+        Args:
+            algorithm: QCAlgorithm实例
+            pair_rules: RiskManager.pair_rules(已按priority降序排序)
+        """
+        self.algorithm = algorithm
+        self.pair_rules = pair_rules
+
+
+    def collect(self, pairs: List) -> dict:
+        """读取全部配对的持仓数据为数组"""
+        n = len(pairs)
+        qty1 = np.zeros(n)
+        qty2 = np.zeros(n)
+        entry1 = np.full(n, np.nan)
+        entry2 = np.full(n, np.nan)
+        exit1 = np.full(n, np.nan)
+        exit2 = np.full(n, np.nan)
+        margin_long = np.zeros(n)
+        margin_short = np.zeros(n)
+        holding_days = np.full(n, -1, dtype=np.int64)       # -1 = 无法计算
+        normal = np.zeros(n, dtype=bool)
+        anomaly = np.zeros(n, dtype=bool)
+
+        now = self.algorithm.UtcTime
+        for i, pair in enumerate(pairs):
+            qty1[i] = pair.tracked_qty1
+            qty2[i] = pair.tracked_qty2
+            if pair.entry_price1 is not None:
+                entry1[i] = pair.entry_price1
+            if pair.entry_price2 is not None:
+                entry2[i] = pair.entry_price2
+            if pair.exit_price1 is not None:
+                exit1[i] = pair.exit_price1
+            if pair.exit_price2 is not None:
+                exit2[i] = pair.exit_price2
+            margin_long[i] = pair.margin_long
+            margin_short[i] = pair.margin_short
+            normal[i] = pair.has_normal_position()
+            anomaly[i] = pair.has_anomaly_position()
+            if normal[i] and pair.pair_opened_time is not None:
+                holding_days[i] = (now - pair.pair_opened_time).days
+
+        price1, price2 = self._collect_holding_prices(pairs, normal)
+
+        return {
+            'qty1': qty1, 'qty2': qty2,
+            'entry1': entry1, 'entry2': entry2,
+            'exit1': exit1, 'exit2': exit2,
+            'price1': price1, 'price2': price2,
+            'margin_long': margin_long, 'margin_short': margin_short,
+            'holding_days': holding_days,
+            'normal': normal, 'anomaly': anomaly
+        }
+
+
+    def _collect_holding_prices(self, pairs: List, normal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """正常持仓配对的两腿持仓价格(快照覆盖全部股票时按列号取出,否则逐配对读取)"""
+        n = len(pairs)
+        price1 = np.full(n, np.nan)
+        price2 = np.full(n, np.nan)
+
+        snapshot = self.algorithm.bar_snapshot
+        if snapshot is not None and snapshot.is_current():
+            cols1 = snapshot.get_columns([pair.sid1 for pair in pairs])
+            cols2 = snapshot.get_columns([pair.sid2 for pair in pairs])
+            if cols1 is not None and cols2 is not None:
+                # 快照按需读取持仓价格,只取正常持仓配对的列
+                price1[normal] = snapshot.get_holding_prices(cols1[normal])
+                price2[normal] = snapshot.get_holding_prices(cols2[normal])
+                return price1, price2
+
+        for i in np.flatnonzero(normal):
+            price1[i], price2[i] = pairs[i]._get_holding_prices()
+        return price1, price2
+
+
+    def evaluate(self, pairs: List) -> List[Tuple]:
+        """
+        批量评估全部配对
+
+        Args:
+            pairs: 持仓配对列表
+
+        Returns:
+            [(pair, rule, description), ...] 按输入顺序,每个配对最多一条(最高优先级触发规则)
+        """
+        if not pairs:
+            return []
+
+        data = self.collect(pairs)
+        pending = np.ones(len(pairs), dtype=bool)
+        triggered = {}
+
+        for rule in self.pair_rules:
+            if not rule.enabled or not pending.any():
+                continue
+
+            # per-pair冷却中的配对不参与该规则
+            active = pending.copy()
+            if rule.has_pair_cooldowns():
+                for i in np.flatnonzero(active):
+                    if rule.is_in_cooldown(pair_id=pairs[i].pair_id):
+                        active[i] = False
+
+            if isinstance(rule, PairAnomalyRule):
+                hits = self._check_anomaly(rule, pairs, data, active)
+            elif isinstance(rule, PairDrawdownRule):
+                hits = self._check_drawdown(rule, pairs, data, active)
+            elif isinstance(rule, PairHoldingTimeoutRule):
+                hits = self._check_timeout(rule, pairs, data, active)
+            else:
+                hits = self._check_scalar(rule, pairs, active)
+
+            for i, description in hits:
+                triggered[i] = (pairs[i], rule, description)
+                pending[i] = False
+
+        return [triggered[i] for i in sorted(triggered)]
+
+
+    # ===== 规则 =====
+
+    def _check_anomaly(self, rule, pairs, data, active) -> List[Tuple[int, str]]:
+        hits = []
+        for i in np.flatnonzero(active & data['anomaly']):
+            pair = pairs[i]
+            hits.append((i, rule.describe(pair, pair.position_mode, pair.tracked_qty1, pair.tracked_qty2)))
+        return hits
+
+
+    def _check_drawdown(self, rule, pairs, data, active) -> List[Tuple[int, str]]:
+        """PnL / 保证金成本 / HWM / 回撤(与 Pairs.get_pair_pnl / get_pair_cost / PairDrawdownRule.check 相同运算顺序)"""
+        qty1, qty2 = data['qty1'], data['qty2']
+        entry1, entry2 = data['entry1'], data['entry2']
+
+        # 持仓中用实时价格,已有成交价格时用成交价格
+        use_exit = ~np.isnan(data['exit1']) & ~np.isnan(data['exit2'])
+        price1 = np.where(use_exit, data['exit1'], data['price1'])
+        price2 = np.where(use_exit, data['exit2'], data['price2'])
+
+        with np.errstate(invalid='ignore'):
+            pnl = (qty1 * price1 + qty2 * price2) - (qty1 * entry1 + qty2 * entry2)
+
+            market_value1 = np.abs(qty1 * entry1)
+            market_value2 = np.abs(qty2 * entry2)
+            long_leg1 = qty1 > 0
+            margin1 = np.where(long_leg1, market_value1 * data['margin_long'], market_value1 * data['margin_short'])
+            margin2 = np.where(long_leg1, market_value2 * data['margin_short'], market_value2 * data['margin_long'])
+            pair_cost = margin1 + margin2
+
+            valid = active & data['normal'] & ~np.isnan(pnl) & ~np.isnan(pair_cost) & (pair_cost > 0)
+            pair_value = pnl + pair_cost
+
+        # HWM: 初始为pair_cost,追踪pair_value峰值
+        hwm_dict = rule.pair_hwm_dict
+        index = np.flatnonzero(valid)
+        hwm = np.array([hwm_dict.get(pairs[i].pair_id, pair_cost[i]) for i in index])
+        hwm = np.where(pair_value[index] > hwm, pair_value[index], hwm)
+        for i, value in zip(index, hwm):
+            hwm_dict[pairs[i].pair_id] = float(value)
+
+        drawdown = (hwm - pair_value[index]) / hwm
+        threshold = rule.config['threshold']
+
+        hits = []
+        for k in np.flatnonzero(drawdown >= threshold):
+            i = index[k]
+            hits.append((i, rule.describe(
+                float(drawdown[k]), float(pair_value[i]), float(hwm[k]), float(pnl[i]), float(pair_cost[i])
+            )))
+        return hits
+
+
+    def _check_timeout(self, rule, pairs, data, active) -> List[Tuple[int, str]]:
+        holding_days = data['holding_days']
+        hits = []
+        for i in np.flatnonzero(active & (holding_days >= 0) & (holding_days > rule.max_days)):
+            hits.append((i, rule.describe(pairs[i], int(holding_days[i]))))
+        return hits
+
+
+    def _check_scalar(self, rule, pairs, active) -> List[Tuple[int, str]]:
+        """未知规则类型: 逐配对调用 rule.check()"""
+        hits = []
+        for i in np.flatnonzero(active):
+            try:
+                is_triggered, description = rule.check(pair=pairs[i])
+            except Exception as e:
+                self.algorithm.Debug(f"[RiskManager] Pair规则检查异常 {rule.__class__.__name__}: {str(e)}")
+                continue
+            if is_triggered:
+                hits.append((i, description))
+        return hits
@@ -51,6 +51,7 @@ class RiskRule(ABC):
         # v7.1.2: 支持Portfolio和Pair两种cooldown模式
         self.cooldown_until = None    # Portfolio规则: 全局cooldown
         self.pair_cooldowns = {}      # Pair规则: per-pair cooldown {pair_id: cooldown_until}
+        self.cooldown_registry = None # 设置后per-pair cooldown登记到CooldownRegistry(不再使用pair_cooldowns)
 
 
     def __repr__(self):
@@ -129,6 +130,8 @@ class RiskRule(ABC):
             return self.algorithm.Time <= self.cooldown_until
         else:
             # Pair规则: 检查per-pair cooldown
+            if self.cooldown_registry is not None:
+                return self.cooldown_registry.is_active(pair_id, self.__class__.__name__)
             if pair_id not in self.pair_cooldowns:
                 return False
             return self.algorithm.Time <= self.pair_cooldowns[pair_id]
@@ -180,4 +183,14 @@ class RiskRule(ABC):
             self.cooldown_until = cooldown_end
         else:
             # Pair规则: 设置per-pair cooldown
-            self.pair_cooldowns[pair_id] = cooldown_end
+            if self.cooldown_registry is not None:
+                self.cooldown_registry.activate(pair_id, self.__class__.__name__, cooldown_end)
+            else:
+                self.pair_cooldowns[pair_id] = cooldown_end
+
+
+    def has_pair_cooldowns(self) -> bool:
+        """是否存在per-pair cooldown条目(可能已到期;无条目时调用方可跳过逐配对检查)"""
+        if self.cooldown_registry is not None:
+            return self.cooldown_registry.has_kind(self.__class__.__name__)
+        return bool(self.pair_cooldowns)
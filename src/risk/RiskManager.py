@@ -16,6 +16,8 @@ from .MarketCondition import MarketCondition
 from .PairHoldingTimeout import PairHoldingTimeoutRule
 from .PairAnomaly import PairAnomalyRule
 from .PairDrawdown import PairDrawdownRule
+from .PairRiskBatch import PairRiskBatch
+from .CooldownRegistry import CooldownRegistry
 from src.execution.OrderIntent import CloseIntent  
 from typing import List, Tuple, Optional
 
@@ -97,6 +99,13 @@ class RiskManager:
         # 注册Pair层面规则
         self.pair_rules = self._register_pair_rules()
 
+        # 配对冷却登记表(可选): Pair规则的per-pair cooldown与普通交易冷却统一索引
+        self.cooldown_registry = None
+        if config.risk_management.get('cooldown_registry', False):
+            self.cooldown_registry = CooldownRegistry(algorithm)
+            for rule in self.pair_rules:
+                rule.cooldown_registry = self.cooldown_registry
+
         # 初始化市场条件检查器（独立于风控规则）
         self.market_condition = MarketCondition(algorithm, config)
 
@@ -116,6 +125,12 @@ class RiskManager:
         # pair_id → Rule实例的映射(用于Intent执行后激活cooldown)
         self._pair_intent_to_rule_map = {}
 
+        # Pair规则批量评估器(check_all_pair_risks使用)
+        self.pair_risk_batch = (
+            PairRiskBatch(algorithm, self.pair_rules)
+            if config.risk_management.get('vectorized_pair_rules', False) else None
+        )
+
         # 调试信息
         if self.enabled:
             self.algorithm.Debug(
@@ -525,26 +540,7 @@ class RiskManager:
                 triggered, description = rule.check(pair=pair)
                 if triggered:
                     # 找到触发规则,立即生成Intent并返回(排他性: 最高优先级)
-                    self.algorithm.Debug(
-                        f"[Pair风控] {rule.__class__.__name__} 触发: {description}"
-                    )
-
-                    # 获取reason字符串
-                    reason = self._pair_rule_to_reason_map.get(
-                        rule.__class__.__name__, 'RISK_TRIGGER')
-
-                    # 生成CloseIntent
-                    intent = pair.get_close_intent(reason=reason)
-                    if intent:
-                        # 记录映射: pair_id → rule (用于cooldown激活)
-                        self._pair_intent_to_rule_map[intent.pair_id] = rule
-                        return intent
-                    else:
-                        # 理论上不应该发生(pair有持仓才会被检查)
-                        self.algorithm.Error(
-                            f"[Pair风控] {pair.pair_id} 触发{rule.__class__.__name__}但无法生成Intent"
-                        )
-                        return None
+                    return self._make_pair_intent(pair, rule, description)
 
             except Exception as e:
                 self.algorithm.Debug(
@@ -556,6 +552,70 @@ class RiskManager:
 
 
 
+    def check_all_pair_risks(self, pairs_with_position: dict) -> List[CloseIntent]:
+        """
+        检查全部持仓配对的Pair层面风控
+
+        - vectorized_pair_rules=True: PairRiskBatch一次计算全部配对的PnL/HWM/回撤/持仓天数
+        - 否则(或批量评估异常时): 逐配对调用check_pair_risks()
+        两种方式返回相同的Intent列表(输入顺序)和Rule映射
+
+        Args:
+            pairs_with_position: {pair_id: Pairs} 有持仓的配对
+
+        Returns:
+            List[CloseIntent]: 触发风控的配对平仓意图
+        """
+        if not self.enabled or not pairs_with_position:
+            return []
+
+        pairs = list(pairs_with_position.values())
+
+        if self.pair_risk_batch is not None:
+            try:
+                triggered = self.pair_risk_batch.evaluate(pairs)
+            except Exception as e:
+                self.algorithm.Debug(f"[RiskManager] Pair规则批量检查异常,回退逐配对检查: {str(e)}")
+            else:
+                intents = []
+                for pair, rule, description in triggered:
+                    intent = self._make_pair_intent(pair, rule, description)
+                    if intent:
+                        intents.append(intent)
+                return intents
+
+        intents = []
+        for pair in pairs:
+            intent = self.check_pair_risks(pair)
+            if intent:
+                intents.append(intent)
+        return intents
+
+
+    def _make_pair_intent(self, pair, rule: RiskRule, description: str) -> Optional[CloseIntent]:
+        """规则触发后生成CloseIntent并记录 pair_id → rule 映射(用于cooldown激活)"""
+        self.algorithm.Debug(
+            f"[Pair风控] {rule.__class__.__name__} 触发: {description}"
+        )
+
+        # 获取reason字符串
+        reason = self._pair_rule_to_reason_map.get(
+            rule.__class__.__name__, 'RISK_TRIGGER')
+
+        # 生成CloseIntent
+        intent = pair.get_close_intent(reason=reason)
+        if intent:
+            # 记录映射: pair_id → rule (用于cooldown激活)
+            self._pair_intent_to_rule_map[intent.pair_id] = rule
+            return intent
+
+        # 理论上不应该发生(pair有持仓才会被检查)
+        self.algorithm.Error(
+            f"[Pair风控] {pair.pair_id} 触发{rule.__class__.__name__}但无法生成Intent"
+        )
+        return None
+
+
     def activate_cooldown_for_pairs(self, executed_pair_ids: List[Tuple]) -> None:
         """
         为已执行的Pair层Intent激活对应Rule的per-pair cooldown
@@ -16,6 +16,8 @@ from .MarketCondition import MarketCondition
 from .PairHoldingTimeout import PairHoldingTimeoutRule
 from .PairAnomaly import PairAnomalyRule
 from .PairDrawdown import PairDrawdownRule
+from .PairRiskBatch import PairRiskBatch
+from .CooldownRegistry import CooldownRegistry
 from .RiskManager import RiskManager
 
 __all__ = [
@@ -26,5 +28,7 @@ __all__ = [
     'PairHoldingTimeoutRule',
     'PairAnomalyRule',
     'PairDrawdownRule',
+    'PairRiskBatch',
+    'CooldownRegistry',
     'RiskManager'
 ]
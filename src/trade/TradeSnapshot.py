@@ -23,7 +23,7 @@ if TYPE_CHECKING:
     from ..Pairs import Pairs
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TradeSnapshot:
     """
     交易快照 (不可变Value Object)
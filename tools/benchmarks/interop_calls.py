@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+OnData热路径 Python.NET 边界调用计数
+
+模拟一个bar内OnData对可交易配对的访问模式:
+    - 持仓配对: 风控(get_pair_pnl / get_position_info) + 出场信号(get_signal)
+    - 无持仓配对: 入场信号(get_signal) + 开仓定价(get_price)
+
+用计数代理替换 Slice / Portfolio,统计每bar的边界调用次数:
+    - Slice: `symbol in data`、`data[symbol]`、`bar.Close`
+    - Portfolio: `Portfolio[symbol]`、`holding.Price`
+
+对比三种配置:
+    - baseline: 逐配对标量计算(vectorized_signals=False, bar_snapshot=False)
+    - pair_book: 仅列式信号表
+    - bar_snapshot: 列式信号表 + bar级价格快照
+
+Usage:
+    在QuantConnect Research环境(或可导入AlgorithmImports的环境)中,于项目根目录执行:
+    python tools/benchmarks/interop_calls.py [--pairs 40] [--symbols 50] [--held 0.3]
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from src.config import StrategyConfig
+from src.Pairs import Pairs
+from src.PairsManager import PairsManager
+from src.BarSnapshot import BarSnapshot
+from src.SymbolRegistry import SymbolRegistry
+
+
+# ===== 计数代理 =====
+
+class FakeSymbol:
+    """只提供 Value 的Symbol替身(可哈希)"""
+
+    def __init__(self, value):
+        self.Value = value
+
+    def __repr__(self):
+        return self.Value
+
+
+class CountingBar:
+    def __init__(self, close, counter):
+        self._close = close
+        self._counter = counter
+
+    @property
+    def Close(self):
+        self._counter['slice.Close'] += 1
+        return self._close
+
+
+class CountingSlice:
+    def __init__(self, closes, counter):
+        self._bars = {symbol: CountingBar(close, counter) for symbol, close in closes.items()}
+        self._counter = counter
+
+    def __contains__(self, symbol):
+        self._counter['slice.contains'] += 1
+        return symbol in self._bars
+
+    def __getitem__(self, symbol):
+        self._counter['slice.getitem'] += 1
+        return self._bars[symbol]
+
+
+class CountingHolding:
+    def __init__(self, price, counter):
+        self._price = price
+        self._counter = counter
+
+    @property
+    def Price(self):
+        self._counter['portfolio.Price'] += 1
+        return self._price
+
+
+class CountingPortfolio:
+    def __init__(self, prices, counter):
+        self._holdings = {symbol: CountingHolding(price, counter) for symbol, price in prices.items()}
+        self._counter = counter
+
+    def __getitem__(self, symbol):
+        self._counter['portfolio.getitem'] += 1
+        return self._holdings[symbol]
+
+
+class FakeAlgorithm:
+    def __init__(self, portfolio):
+        self.Time = datetime(2024, 1, 2, 10, 0)
+        self.Portfolio = portfolio
+        self.symbol_registry = SymbolRegistry()
+        self.bar_snapshot = None
+
+    def Debug(self, message):
+        pass
+
+
+# ===== 场景构建 =====
+
+def build_scenario(num_pairs, num_symbols, held_ratio, vectorized, snapshot, seed=7):
+    """按配置构建算法替身、PairsManager和本bar的Slice"""
+    rng = random.Random(seed)
+    counter = Counter()
+
+    symbols = [FakeSymbol(f"S{i:03d}") for i in range(num_symbols)]
+    closes = {symbol: rng.uniform(20, 200) for symbol in symbols}
+
+    algorithm = FakeAlgorithm(CountingPortfolio(closes, counter))
+    config = dict(StrategyConfig().pairs_trading, vectorized_signals=vectorized, bar_snapshot=snapshot)
+    pairs_manager = PairsManager(algorithm, config)
+    algorithm.bar_snapshot = BarSnapshot(algorithm) if snapshot else None
+
+    pair_ids = set()
+    while len(pair_ids) < num_pairs:
+        symbol1, symbol2 = rng.sample(symbols, 2)
+        model_data = {
+            'symbol1': symbol1, 'symbol2': symbol2,
+            'alpha_mean': 0.0, 'beta_mean': 1.0,
+            'residual_mean': 0.0, 'residual_std': 0.05,
+            'quality_score': 0.8, 'industry_group': 'bench'
+        }
+        pair = Pairs(algorithm, model_data, config)
+        if pair.pair_id in pair_ids:
+            continue
+        if rng.random() < held_ratio:
+            pair.tracked_qty1, pair.tracked_qty2 = 100, -100
+            pair.entry_price1, pair.entry_price2 = closes[symbol1], closes[symbol2]
+            pair._refresh_position_mode()
+        pairs_manager.all_pairs[pair.pair_id] = pair
+        pair_ids.add(pair.pair_id)
+
+    pairs_manager.reclassify_pairs(pair_ids)
+    data = CountingSlice(closes, counter)
+    return algorithm, pairs_manager, data, counter
+
+
+def run_bar(algorithm, pairs_manager, data):
+    """模拟一个bar的OnData访问模式"""
+    if algorithm.bar_snapshot is not None:
+        algorithm.bar_snapshot.build(data, pairs_manager.get_tradeable_symbols())
+
+    pairs_manager.evaluate_pair_book(data)
+
+    for pair in pairs_manager.get_pairs_with_position().values():
+        pair.get_pair_pnl()
+        pair.get_position_info()
+        pair.get_signal(data)
+
+    for pair in pairs_manager.get_pairs_without_position().values():
+        pair.get_signal(data)
+        pair.get_price(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OnData热路径边界调用计数')
+    parser.add_argument('--pairs', type=int, default=40)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--held', type=float, default=0.3, help='持仓配对比例')
+    args = parser.parse_args()
+
+    modes = [
+        ('baseline', False, False),
+        ('pair_book', True, False),
+        ('bar_snapshot', True, True),
+    ]
+
+    print(f"配对数: {args.pairs}, 股票数: {args.symbols}, 持仓比例: {args.held:.0%}")
+    print(f"{'模式':<14}{'Slice':>10}{'Portfolio':>12}{'合计':>10}")
+    print('-' * 46)
+
+    for name, vectorized, snapshot in modes:
+        algorithm, pairs_manager, data, counter = build_scenario(
+            args.pairs, args.symbols, args.held, vectorized, snapshot
+        )
+        counter.clear()
+        run_bar(algorithm, pairs_manager, data)
+
+        slice_calls = sum(v for k, v in counter.items() if k.startswith('slice.'))
+        portfolio_calls = sum(v for k, v in counter.items() if k.startswith('portfolio.'))
+        print(f"{name:<14}{slice_calls:>10}{portfolio_calls:>12}{slice_calls + portfolio_calls:>10}")
+
+
+if __name__ == '__main__':
+    main()
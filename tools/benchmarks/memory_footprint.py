@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+配对对象内存占用基准
+
+在合成配对簿(默认10k配对)上统计:
+    - Pairs: 每个配对的字节数(tracemalloc,含实例本身及其独占的pair_id元组)
+    - OpenIntent / CloseIntent: 每个意图的字节数,以及按每bar意图数估算的每bar分配量
+    - PairData / TradeSnapshot: 每个值对象的字节数(不含共享的价格数组)
+
+对比改动前后: 用 --root 指向另一份代码树(如 git worktree 检出的旧版本),同一脚本分别运行。
+
+Usage:
+    在QuantConnect Research环境(或可导入AlgorithmImports的环境)中,于项目根目录执行:
+    python tools/benchmarks/memory_footprint.py [--pairs 10000] [--intents-per-bar 20] [--root .]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+
+class FakeSymbol:
+    """只提供 Value 的Symbol替身(可哈希)"""
+
+    def __init__(self, value):
+        self.Value = value
+
+    def __repr__(self):
+        return self.Value
+
+
+class FakeAlgorithm:
+    def __init__(self, symbol_registry=None):
+        self.Time = datetime(2024, 1, 2, 10, 0)
+        self.symbol_registry = symbol_registry
+        self.bar_snapshot = None
+
+    def Debug(self, message):
+        pass
+
+
+def measure(factory, count):
+    """创建count个对象并保持引用,返回每个对象的平均字节数"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del objects
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='配对对象内存占用基准')
+    parser.add_argument('--pairs', type=int, default=10000)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--intents-per-bar', type=int, default=20, help='每bar生成的意图数(估算每bar分配量)')
+    parser.add_argument('--root', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'),
+                        help='被测代码树根目录')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from src.config import StrategyConfig
+    from src.Pairs import Pairs
+    from src.execution.OrderIntent import OpenIntent, CloseIntent
+    from src.analysis.PairData import PairData
+    from src.trade.TradeSnapshot import TradeSnapshot
+    try:
+        from src.SymbolRegistry import SymbolRegistry
+        registry = SymbolRegistry()
+    except ImportError:
+        registry = None
+
+    rng = random.Random(7)
+    symbols = [FakeSymbol(f"S{i:04d}") for i in range(args.symbols)]
+    legs = [tuple(rng.sample(symbols, 2)) for _ in range(args.pairs)]
+    algorithm = FakeAlgorithm(registry)
+    config = StrategyConfig().pairs_trading
+
+    def make_pair(i):
+        symbol1, symbol2 = legs[i]
+        return Pairs(algorithm, {
+            'symbol1': symbol1, 'symbol2': symbol2,
+            'alpha_mean': 0.0, 'beta_mean': 1.0, 'residual_mean': 0.0, 'residual_std': 0.05,
+            'quality_score': 0.8, 'industry_group': 'bench'
+        }, config)
+
+    def make_open_intent(i):
+        symbol1, symbol2 = legs[i]
+        return OpenIntent(pair_id=(symbol1.Value, symbol2.Value), symbol1=symbol1, symbol2=symbol2,
+                          qty1=100, qty2=-100, signal='LONG_SPREAD', tag='bench')
+
+    def make_close_intent(i):
+        symbol1, symbol2 = legs[i]
+        return CloseIntent(pair_id=(symbol1.Value, symbol2.Value), symbol1=symbol1, symbol2=symbol2,
+                           qty1=100, qty2=-100, reason='CLOSE', tag='bench')
+
+    prices = np.linspace(100, 110, 252)
+    log_prices = np.log(prices)
+
+    def make_pair_data(i):
+        symbol1, symbol2 = legs[i]
+        return PairData(symbol1=symbol1, symbol2=symbol2, prices1=prices, prices2=prices,
+                        log_prices1=log_prices, log_prices2=log_prices)
+
+    def make_trade_snapshot(i):
+        symbol1, symbol2 = legs[i]
+        return TradeSnapshot(pair_id=(symbol1.Value, symbol2.Value), entry_time=algorithm.Time,
+                             exit_time=algorithm.Time, pnl=1.0, pnl_pct=0.01, reason='CLOSE',
+                             holding_days=5, exit_zscore=0.1)
+
+    pair_bytes = measure(make_pair, args.pairs)
+    open_bytes = measure(make_open_intent, args.pairs)
+    close_bytes = measure(make_close_intent, args.pairs)
+    pair_data_bytes = measure(make_pair_data, args.pairs)
+    snapshot_bytes = measure(make_trade_snapshot, args.pairs)
+
+    print(f"代码树: {os.path.abspath(args.root)}")
+    print(f"配对数: {args.pairs}, 股票数: {args.symbols}")
+    print('-' * 50)
+    print(f"{'Pairs':<16}{pair_bytes:>10.0f} B/配对   (合计 {pair_bytes * args.pairs / 1024 / 1024:.1f} MB)")
+    print(f"{'OpenIntent':<16}{open_bytes:>10.0f} B/个")
+    print(f"{'CloseIntent':<16}{close_bytes:>10.0f} B/个")
+    print(f"{'PairData':<16}{pair_data_bytes:>10.0f} B/个     (不含共享价格数组)")
+    print(f"{'TradeSnapshot':<16}{snapshot_bytes:>10.0f} B/个")
+    print(f"每bar意图分配: {args.intents_per_bar}个 ≈ {args.intents_per_bar * open_bytes:.0f} B")
+
+
+if __name__ == '__main__':
+    main()